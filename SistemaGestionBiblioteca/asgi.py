@@ -14,4 +14,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SistemaGestionBiblioteca.settings')
 
+# Servidor ASGI (las vistas async de hola/views.py atienden sin ocupar un
+# hilo mientras esperan a la base de datos):
+#
+#   pip install uvicorn
+#   uvicorn SistemaGestionBiblioteca.asgi:application --workers 4
+#   # o: gunicorn SistemaGestionBiblioteca.asgi:application -k uvicorn.workers.UvicornWorker
+#
+# Los estáticos los sirve ServidorEstaticos solo en WSGI (wsgi.py); con ASGI
+# hay que servir STATIC_ROOT desde el proxy (nginx) o seguir con WSGI para ellos.
+#
+# Comparación con WSGI: `python manage.py benchmark_asgi`. Con SQLite y
+# datos locales el rendimiento es igual a la misma concurrencia (≈17 pet/s
+# con 8 hilos / 8 peticiones simultáneas); la ventaja de ASGI es aceptar
+# más conexiones abiertas que hilos, no hacer más rápida cada consulta.
 application = get_asgi_application()
@@ -38,8 +38,19 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hola.middleware.InstrumentacionSQLMiddleware',
 ]
 
+# ==============================
+# INSTRUMENTACIÓN SQL (hola/middleware.py)
+# ==============================
+SQL_INSTRUMENTACION = {
+    'ACTIVO': True,
+    'UMBRAL_LENTA_MS': 100,   # consultas más lentas se registran con su plan
+    'UMBRAL_REPETIDAS': 5,    # misma sentencia N veces en una petición = posible N+1
+    'MAX_LENTAS': 5,
+}
+
 # ==============================
 # ROOT URLS
 # ==============================
@@ -79,9 +90,76 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # Conexión de solo lectura para reportes (hola/routers.py). Por defecto abre
+    # el mismo archivo con mode=ro; BIBLIOTECA_BD_LECTURA puede apuntar a una copia.
+    # Sobre el mismo archivo, los reportes solo dejan de bloquear las escrituras
+    # con WAL, es decir, con BIBLIOTECA_BD_PRODUCCION=1 (más abajo). Sin él, el
+    # diario por defecto de SQLite hace que cada lectura larga retrase los
+    # préstamos y devoluciones hasta que termina.
+    'lectura': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'file:{}?mode=ro'.format(
+            Path(os.environ.get('BIBLIOTECA_BD_LECTURA', BASE_DIR / 'db.sqlite3')).as_posix()
+        ),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['hola.routers.EnrutadorLecturaEscritura']
+
+# Perfil de producción de SQLite: se activa con BIBLIOTECA_BD_PRODUCCION=1.
+# WAL deja leer mientras se escribe, busy_timeout espera el bloqueo en vez de
+# fallar con "database is locked" y BEGIN IMMEDIATE toma el bloqueo de
+# escritura al empezar la transacción (sin choques al pasar de lectura a escritura).
+# Mantenimiento periódico: `manage.py mantenimiento_bd`.
+SQLITE_PRAGMAS_PRODUCCION = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA cache_size=-65536',      # 64 MB de caché de páginas
+    'PRAGMA mmap_size=268435456',    # 256 MB mapeados en memoria
+    'PRAGMA temp_store=MEMORY',
+)
+SQLITE_OPCIONES_PRODUCCION = {
+    'init_command': '; '.join(SQLITE_PRAGMAS_PRODUCCION),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 5,
+}
+# La conexión de lectura no puede cambiar journal_mode ni synchronous
+SQLITE_OPCIONES_LECTURA = {
+    'init_command': '; '.join(SQLITE_PRAGMAS_PRODUCCION[2:]),
+    'timeout': 5,
+}
+
+if os.environ.get('BIBLIOTECA_BD_PRODUCCION') == '1':
+    DATABASES['default'].update({
+        'OPTIONS': SQLITE_OPCIONES_PRODUCCION,
+        'CONN_MAX_AGE': 600,        # conexiones persistentes
+        'CONN_HEALTH_CHECKS': True,
+    })
+    DATABASES['lectura'].update({
+        'OPTIONS': SQLITE_OPCIONES_LECTURA,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# ==============================
+# CACHE
+# ==============================
+# Caché en archivos: la comparten todos los procesos del servidor
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# Páginas con ETag/304 y gzip (hola/cache_http.py)
+CACHE_PAGINAS = {
+    'TIEMPO': 60 * 60 * 24,
+    'GZIP_MINIMO': 1024,
+}
+
 # ==============================
 # AUTH PASSWORD VALIDATION
 # ==============================
@@ -118,6 +196,17 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic genera nombres con hash + copias .gz (hola/estaticos.py);
+# wsgi.py los sirve con Cache-Control inmutable
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "hola.estaticos.EstaticosComprimidos"},
+}
+ESTATICOS = {
+    'MAX_AGE_INMUTABLE': 60 * 60 * 24 * 365,
+    'MAX_AGE': 60,
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -133,6 +222,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = '/principal/'
 LOGIN_URL = '/login/'
 
+# ==============================
+# LOGGING
+# ==============================
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'sql_lentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'sql_lentas.log',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'hola.sql': {
+            'handlers': ['sql_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 
 
@@ -12,5 +12,7 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SistemaGestionBiblioteca.settings')
 
+from hola.estaticos import ServidorEstaticos
 
-application = get_wsgi_application()
+# Los archivos de STATIC_ROOT se sirven antes de llegar a Django
+application = ServidorEstaticos(get_wsgi_application())
@@ -1,7 +1,15 @@
-from django.contrib import admin
-from hola.models import Multa, Notificacion
+from django import forms
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max, Prefetch
+from django.http import HttpResponseRedirect
+from django.utils.functional import cached_property
+from hola.models import CorreoPendiente, Multa, Notificacion
+from hola import inventario
 from .models import (
     Libro,
+    Escritor,
     Etiqueta,
     Categoria,
     Autor,
@@ -11,6 +19,57 @@ from .models import (
     Reserva,
 )
 
+# ===========================
+# Listados grandes
+# ===========================
+LIMITE_CONTEO = 10000
+
+
+def conteo_estimado(modelo, using='default'):
+    """
+    Número aproximado de filas sin COUNT(*): estadísticas de ANALYZE
+    (sqlite_stat1 / pg_class) o, si no hay, el id más alto.
+    """
+    conexion = connections[using]
+    tabla = modelo._meta.db_table
+    consultas = {
+        # Con índices, sqlite_stat1 solo tiene filas por índice y el primer
+        # número de `stat` son las filas que cubre; los índices parciales
+        # cubren menos, así que el total es el mayor (CAST toma ese número)
+        'sqlite': ("SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s", [tabla]),
+        # reltuples es -1 si la tabla nunca se analizó
+        'postgresql': ("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [tabla]),
+    }
+    if conexion.vendor in consultas:
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute(*consultas[conexion.vendor])
+                fila = cursor.fetchone()
+        except DatabaseError:
+            fila = None
+        if fila and fila[0] is not None and fila[0] >= 0:
+            return int(fila[0])
+    return modelo._default_manager.using(using).aggregate(maximo=Max('pk'))['maximo'] or 0
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador para tablas de millones de filas: sin filtros usa el conteo
+    estimado; con filtros cuenta como mucho LIMITE_CONTEO filas.
+    """
+    @cached_property
+    def count(self):
+        consulta = self.object_list
+        if not consulta.query.where:
+            return conteo_estimado(consulta.model, consulta.db)
+        return consulta[:LIMITE_CONTEO].count()
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
 # ===========================
 # Autor Admin
 # ===========================
@@ -19,20 +78,39 @@ class AutorAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'libros_info')
     search_fields = ('nombre',)
 
+    def get_queryset(self, request):
+        # Los libros de toda la página (con su categoría) en una sola consulta
+        libros = Libro.objects.select_related('categoria').only(
+            'titulo', 'isbn', 'fecha_publicacion', 'estado', 'autor_id', 'categoria__nombre'
+        )
+        return super().get_queryset(request).prefetch_related(Prefetch('libro_set', queryset=libros))
+
     def libros_info(self, obj):
-        libros = Libro.objects.filter(autor=obj)
+        libros = obj.libro_set.all()
         return ", ".join([
             f"{libro.titulo} | ISBN: {libro.isbn} | Categoría: {libro.categoria} | Fecha: {libro.fecha_publicacion} | Estado: {libro.estado}" 
             for libro in libros
         ])
     libros_info.short_description = "Libros del Autor"
 
+# ===========================
+# Escritor Admin
+# ===========================
+@admin.register(Escritor)
+class EscritorAdmin(admin.ModelAdmin):
+    list_display = ('slug', 'autor', 'orden')
+    list_select_related = ('autor',)
+    list_editable = ('orden',)
+    search_fields = ('slug', 'autor__nombre')
+    autocomplete_fields = ('autor',)
+
 # ===========================
 # Libro Admin
 # ===========================
 @admin.register(Libro)
-class LibroAdmin(admin.ModelAdmin):
+class LibroAdmin(AdminTablaGrande):
     list_display = ('titulo', 'autor', 'isbn', 'categoria', 'editorial', 'fecha_publicacion', 'estado', 'ejemplares')
+    list_select_related = ('autor', 'categoria', 'editorial')
     list_filter = ('estado', 'categoria', 'editorial')
     search_fields = ('titulo', 'autor__nombre', 'isbn')
 
@@ -56,7 +134,7 @@ class EditorialAdmin(admin.ModelAdmin):
 # Usuario Admin
 # ===========================
 @admin.register(Usuario)
-class UsuarioAdmin(admin.ModelAdmin):
+class UsuarioAdmin(AdminTablaGrande):
     list_display = ('nombre', 'apellido', 'email', 'tipo', 'fecha_registro')
     search_fields = ('nombre', 'apellido', 'email')
     list_filter = ('tipo',)
@@ -64,11 +142,61 @@ class UsuarioAdmin(admin.ModelAdmin):
 # ===========================
 # Prestamo Admin
 # ===========================
+class PrestamoAdminForm(forms.ModelForm):
+    def clean(self):
+        datos = super().clean()
+        libro = datos.get('libro')
+        if libro is None or datos.get('devuelto'):
+            return datos
+        # Solo ocupa un ejemplar nuevo si antes no lo ocupaba en ese libro
+        instancia = self.instance
+        ocupaba = not instancia._state.adding and not instancia.devuelto and instancia.libro_id == libro.id
+        if not ocupaba and libro.prestados >= libro.ejemplares:
+            self.add_error('libro', "No quedan ejemplares disponibles de este libro.")
+        return datos
+
+
 @admin.register(Prestamo)
-class PrestamoAdmin(admin.ModelAdmin):
+class PrestamoAdmin(AdminTablaGrande):
+    form = PrestamoAdminForm
     list_display = ('usuario', 'libro', 'fecha_prestamo', 'fecha_limite', 'fecha_devolucion', 'devuelto')
     list_filter = ('devuelto',)
+    list_select_related = ('usuario', 'libro')
     search_fields = ('usuario__nombre', 'libro__titulo')
+    autocomplete_fields = ['usuario', 'libro']
+
+    def changeform_view(self, request, *args, **kwargs):
+        # El formulario ya comprueba la disponibilidad; esto cubre a quien
+        # se llevó el último ejemplar entre la validación y el guardado
+        try:
+            return super().changeform_view(request, *args, **kwargs)
+        except inventario.LibroNoDisponible:
+            self.message_user(request, "No quedan ejemplares disponibles de este libro. ❌", messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+
+    # Los préstamos nuevos pasan por realizar_prestamo; al editar se aplica el
+    # delta de contadores, que reclama el ejemplar con un UPDATE condicional
+    # si el préstamo se reactiva o cambia de libro. Todo ocurre dentro de la
+    # transacción de changeform_view: si no quedan ejemplares no se guarda nada.
+    def save_model(self, request, obj, form, change):
+        if not change and not obj.devuelto:
+            inventario.realizar_prestamo(obj)
+            return
+        anterior = None
+        if change:
+            fila = Prestamo.objects.filter(pk=obj.pk).values_list('libro_id', 'devuelto').first()
+            if fila:
+                anterior = (fila[0], not fila[1])
+        inventario.aplicar_cambio_prestamo(anterior, (obj.libro_id, not obj.devuelto))
+        super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        inventario.descontar_prestamos_eliminados(Prestamo.objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        inventario.descontar_prestamos_eliminados(queryset)
+        super().delete_queryset(request, queryset)
 
 # ===========================
 # Reserva Admin
@@ -77,26 +205,57 @@ from django.contrib import admin
 from .models import Reserva
 
 @admin.register(Reserva)
-class ReservaAdmin(admin.ModelAdmin):
+class ReservaAdmin(AdminTablaGrande):
     list_display = ('usuario', 'libro', 'fecha_inicio', 'fecha_fin', 'estado')
     list_filter = ('estado', 'fecha_inicio', 'fecha_fin')
+    list_select_related = ('usuario', 'libro')
     search_fields = ('usuario__nombre', 'libro__titulo')
     fields = ('usuario', 'libro', 'fecha_inicio', 'fecha_fin', 'estado')  # Todos editables
     autocomplete_fields = ['usuario', 'libro']  # útil si hay muchos registros
 
+    # Mantener los contadores de inventario al editar desde el admin
+    def save_model(self, request, obj, form, change):
+        anterior = None
+        if change:
+            anterior = Reserva.objects.filter(pk=obj.pk).values_list('libro_id', 'estado').first()
+        super().save_model(request, obj, form, change)
+        inventario.aplicar_cambio_reserva(anterior, (obj.libro_id, obj.estado), obj.fecha_inicio)
+
+    def delete_model(self, request, obj):
+        inventario.descontar_reservas_eliminadas(Reserva.objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        inventario.descontar_reservas_eliminadas(queryset)
+        super().delete_queryset(request, queryset)
+
 
 # ===========================
 # Multa Admin
 # ===========================
 @admin.register(Multa)
-class MultaAdmin(admin.ModelAdmin):
-    list_display = ('monto', 'fecha')
-    list_filter = ('fecha',)
+class MultaAdmin(AdminTablaGrande):
+    list_display = ('monto', 'fecha', 'pagada', 'prestamo')
+    list_filter = ('fecha', 'pagada')
+    list_select_related = ('prestamo__usuario', 'prestamo__libro')
+    raw_id_fields = ('prestamo',)
 
 # ===========================
 # Notificacion Admin
 # ===========================
 @admin.register(Notificacion)
-class NotificacionAdmin(admin.ModelAdmin):
+class NotificacionAdmin(AdminTablaGrande):
     list_display = ('usuario', 'mensaje', 'fecha')
+    list_select_related = ('usuario',)
     search_fields = ('usuario__nombre', 'mensaje')
+    raw_id_fields = ('usuario', 'prestamo')
+
+# ===========================
+# Bandeja de salida de correos
+# ===========================
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(AdminTablaGrande):
+    list_display = ('asunto', 'destinatario', 'estado', 'intentos', 'proximo_intento', 'enviado')
+    list_filter = ('estado',)
+    search_fields = ('destinatario', 'asunto')
+    readonly_fields = ('creado', 'enviado', 'ultimo_error')
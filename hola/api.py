@@ -0,0 +1,438 @@
+# hola/api.py
+import hashlib
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+
+from . import busqueda, inventario, paginacion
+from .models import Libro, Multa, Prestamo, Reserva, Usuario
+
+
+# ============================
+# API JSON v1
+# ============================
+# Listado y detalle de libros, préstamos, reservas y multas, y préstamos y
+# devoluciones en lote. Las filas salen de values() con solo las columnas
+# pedidas en ?fields= (sin instanciar modelos ni hacer JOIN que no haga
+# falta), se paginan por cursor (hola/paginacion.py) y cada respuesta
+# lleva un ETag: si el cliente ya tiene esa versión recibe un 304 vacío.
+#
+# Autenticación por sesión; los POST necesitan la cabecera X-CSRFToken.
+# Los lectores solo ven sus propios préstamos, reservas y multas.
+
+VERSION = 'v1'
+LIMITE = 50
+LIMITE_MAXIMO = 200
+LOTE_MAXIMO = 100
+PREFIJO_ALIAS = 'api_'
+
+
+class ErrorApi(Exception):
+    def __init__(self, mensaje, estado=400, **detalle):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.detalle = detalle
+
+
+def _url_portada(nombre):
+    return default_storage.url(nombre) if nombre else None
+
+
+# ============================
+# Recursos
+# ============================
+# 'campos': nombre público → expresión de values(); 'orden': campo de la
+# paginación (con su índice); 'propietario': camino hasta el User para
+# limitar lo que ve un lector (None: visible para todos).
+RECURSOS = {
+    'libros': {
+        'consulta': lambda: Libro.objects.with_availability(),
+        'orden': 'id',
+        'propietario': None,
+        'por_defecto': ('id', 'titulo', 'isbn', 'autor', 'disponibles'),
+        'campos': {
+            'id': 'id',
+            'titulo': 'titulo',
+            'isbn': 'isbn',
+            'autor_id': 'autor_id',
+            'autor': 'autor__nombre',
+            'categoria_id': 'categoria_id',
+            'categoria': 'categoria__nombre',
+            'editorial_id': 'editorial_id',
+            'editorial': 'editorial__nombre',
+            'fecha_publicacion': 'fecha_publicacion',
+            'paginas': 'paginas',
+            'ejemplares': 'ejemplares',
+            'prestados': 'prestados',
+            'reservados': 'reservados',
+            'disponibles': 'disponibles',
+            'estado': 'estado',
+            'portada': 'portada',
+        },
+        'convertir': {'portada': _url_portada},
+    },
+    'prestamos': {
+        'consulta': lambda: Prestamo.objects.all(),
+        'orden': 'fecha_prestamo',
+        'propietario': 'usuario__user',
+        'por_defecto': ('id', 'usuario_id', 'libro_id', 'fecha_prestamo', 'fecha_limite', 'devuelto'),
+        'campos': {
+            'id': 'id',
+            'usuario_id': 'usuario_id',
+            'usuario': 'usuario__nombre',
+            'libro_id': 'libro_id',
+            'libro': 'libro__titulo',
+            'fecha_prestamo': 'fecha_prestamo',
+            'fecha_limite': 'fecha_limite',
+            'fecha_devolucion': 'fecha_devolucion',
+            'devuelto': 'devuelto',
+        },
+    },
+    'reservas': {
+        'consulta': lambda: Reserva.objects.all(),
+        'orden': 'fecha_inicio',
+        'propietario': 'usuario__user',
+        'por_defecto': ('id', 'usuario_id', 'libro_id', 'fecha_inicio', 'fecha_fin', 'estado'),
+        'campos': {
+            'id': 'id',
+            'usuario_id': 'usuario_id',
+            'usuario': 'usuario__nombre',
+            'libro_id': 'libro_id',
+            'libro': 'libro__titulo',
+            'fecha_inicio': 'fecha_inicio',
+            'fecha_fin': 'fecha_fin',
+            'estado': 'estado',
+        },
+    },
+    'multas': {
+        'consulta': lambda: Multa.objects.all(),
+        'orden': 'id',
+        'propietario': 'prestamo__usuario__user',
+        'por_defecto': ('id', 'prestamo_id', 'monto', 'fecha', 'pagada'),
+        'campos': {
+            'id': 'id',
+            'prestamo_id': 'prestamo_id',
+            'usuario_id': 'prestamo__usuario_id',
+            'libro': 'prestamo__libro__titulo',
+            'monto': 'monto',
+            'fecha': 'fecha',
+            'pagada': 'pagada',
+        },
+    },
+}
+
+
+# ============================
+# Parámetros
+# ============================
+def _entero(valor, nombre):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorApi(f"'{nombre}' debe ser un número entero.")
+
+
+def _booleano(valor, nombre):
+    if valor.lower() in ('1', 'true', 'si', 'sí'):
+        return True
+    if valor.lower() in ('0', 'false', 'no'):
+        return False
+    raise ErrorApi(f"'{nombre}' debe ser true o false.")
+
+
+def _fecha(valor, nombre):
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ErrorApi(f"'{nombre}' debe ser una fecha AAAA-MM-DD.")
+    return fecha
+
+
+def _limite(valor):
+    if not valor:
+        return LIMITE
+    return max(1, min(_entero(valor, 'limite'), LIMITE_MAXIMO))
+
+
+def _cursores(recurso, parametros):
+    """
+    `despues` y `antes` del querystring. Un cursor corrupto es un 400: si se
+    ignorara, el cliente recibiría otra vez la primera página sin fin.
+    """
+    campo = recurso['consulta']().model._meta.get_field(recurso['orden'])
+    cursores = []
+    for nombre in ('despues', 'antes'):
+        cursor = parametros.get(nombre)
+        if cursor and paginacion.decodificar_cursor(cursor, campo) is None:
+            raise ErrorApi(f"'{nombre}' no es un cursor válido.")
+        cursores.append(cursor)
+    return cursores
+
+
+def campos_pedidos(recurso, parametro):
+    """
+    Lista de campos de ?fields=a,b,c (los de por defecto si no se indica).
+    """
+    if not parametro:
+        return list(recurso['por_defecto'])
+    pedidos = list(dict.fromkeys(c.strip() for c in parametro.split(',') if c.strip()))
+    desconocidos = [c for c in pedidos if c not in recurso['campos']]
+    if desconocidos or not pedidos:
+        raise ErrorApi(
+            f"Campos desconocidos: {', '.join(desconocidos)}" if desconocidos else "'fields' está vacío.",
+            campos_validos=sorted(recurso['campos']),
+        )
+    return pedidos
+
+
+def _filtros(nombre, parametros):
+    """
+    Filtros de cada recurso a partir del querystring.
+    """
+    filtros = {}
+    if nombre == 'libros':
+        if parametros.get('q'):
+            texto = parametros['q'].strip()
+            if busqueda.disponible():
+                filtros['id__in'] = busqueda.buscar_ids(texto)
+            else:
+                filtros['titulo__icontains'] = texto
+        for campo in ('autor', 'categoria', 'editorial'):
+            if parametros.get(campo):
+                filtros[f'{campo}_id'] = _entero(parametros[campo], campo)
+        if parametros.get('disponibles') and _booleano(parametros['disponibles'], 'disponibles'):
+            filtros['disponibles__gt'] = 0
+        return filtros
+
+    if nombre == 'multas':
+        if parametros.get('usuario'):
+            filtros['prestamo__usuario_id'] = _entero(parametros['usuario'], 'usuario')
+        if parametros.get('pagada'):
+            filtros['pagada'] = _booleano(parametros['pagada'], 'pagada')
+        return filtros
+
+    for campo in ('usuario', 'libro'):
+        if parametros.get(campo):
+            filtros[f'{campo}_id'] = _entero(parametros[campo], campo)
+    if nombre == 'prestamos' and parametros.get('devuelto'):
+        filtros['devuelto'] = _booleano(parametros['devuelto'], 'devuelto')
+    if nombre == 'reservas' and parametros.get('estado'):
+        estados = [valor for valor, _ in Reserva.ESTADO_CHOICES]
+        if parametros['estado'] not in estados:
+            raise ErrorApi("'estado' no es válido.", estados_validos=estados)
+        filtros['estado'] = parametros['estado']
+    desde = _fecha(parametros['desde'], 'desde') if parametros.get('desde') else None
+    hasta = _fecha(parametros['hasta'], 'hasta') if parametros.get('hasta') else None
+    orden = RECURSOS[nombre]['orden']
+    filtros.update(paginacion.rango_fechas(orden, desde, hasta, con_hora=(nombre == 'prestamos')))
+    return filtros
+
+
+# ============================
+# Proyección y serialización
+# ============================
+def _columna(recurso, campo):
+    # values() no admite un alias igual a un campo del modelo (p. ej. 'autor')
+    return campo if recurso['campos'][campo] == campo else PREFIJO_ALIAS + campo
+
+
+def proyectar(queryset, recurso, campos):
+    """
+    values() con los campos pedidos más los que necesita la paginación.
+    """
+    directos, renombrados = [], {}
+    for campo in dict.fromkeys([*campos, recurso['orden'], 'id']):
+        columna = _columna(recurso, campo)
+        if columna == campo:
+            directos.append(campo)
+        else:
+            renombrados[columna] = F(recurso['campos'][campo])
+    return queryset.values(*directos, **renombrados)
+
+
+def serializar(filas, recurso, campos):
+    convertir = recurso.get('convertir', {})
+    columnas = [(campo, _columna(recurso, campo), convertir.get(campo)) for campo in campos]
+    return [
+        {campo: funcion(fila[columna]) if funcion else fila[columna] for campo, columna, funcion in columnas}
+        for fila in filas
+    ]
+
+
+def respuesta_json(request, datos, estado=200):
+    """
+    JSON con ETag (hash del cuerpo) en las lecturas: 304 si coincide con If-None-Match.
+    """
+    contenido = json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    respuesta = HttpResponse(contenido, status=estado, content_type='application/json')
+    if request.method in ('GET', 'HEAD') and estado == 200:
+        etag = 'W/"%s"' % hashlib.md5(contenido).hexdigest()
+        respuesta = get_conditional_response(request, etag=etag) or respuesta
+        respuesta['ETag'] = etag
+        # Depende del usuario: el navegador puede guardarla pero debe revalidar
+        respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
+def es_personal(user):
+    return user.is_superuser or user.groups.filter(name='Bibliotecario').exists()
+
+
+def _visibles(request, recurso):
+    queryset = recurso['consulta']()
+    if recurso['propietario'] and not es_personal(request.user):
+        queryset = queryset.filter(**{recurso['propietario']: request.user})
+    return queryset
+
+
+# ============================
+# Operaciones en lote
+# ============================
+def _lote(request):
+    try:
+        elementos = json.loads(request.body or b'null')
+    except ValueError:
+        raise ErrorApi("El cuerpo no es JSON válido.")
+    if not isinstance(elementos, list) or not elementos:
+        raise ErrorApi("El cuerpo debe ser un arreglo JSON no vacío.")
+    if len(elementos) > LOTE_MAXIMO:
+        raise ErrorApi(f"Como máximo {LOTE_MAXIMO} elementos por lote.")
+    return elementos
+
+
+def prestar_lote(elementos):
+    """
+    Crea un préstamo por cada {"usuario": id, "libro": id} en una sola
+    transacción: si uno falla (p. ej. sin ejemplares) no se crea ninguno.
+    Devuelve los ids creados.
+    """
+    pares = []
+    for indice, elemento in enumerate(elementos):
+        if not isinstance(elemento, dict):
+            raise ErrorApi("Cada préstamo debe ser un objeto {\"usuario\", \"libro\"}.", indice=indice)
+        pares.append((_entero(elemento.get('usuario'), 'usuario'), _entero(elemento.get('libro'), 'libro')))
+
+    usuarios = set(Usuario.objects.filter(id__in={u for u, _ in pares}).values_list('id', flat=True))
+    libros = set(Libro.objects.filter(id__in={l for _, l in pares}).values_list('id', flat=True))
+    for indice, (usuario_id, libro_id) in enumerate(pares):
+        if usuario_id not in usuarios:
+            raise ErrorApi(f"El usuario {usuario_id} no existe.", 404, indice=indice)
+        if libro_id not in libros:
+            raise ErrorApi(f"El libro {libro_id} no existe.", 404, indice=indice)
+
+    creados = []
+    with transaction.atomic():
+        for indice, (usuario_id, libro_id) in enumerate(pares):
+            try:
+                prestamo = inventario.realizar_prestamo(Prestamo(usuario_id=usuario_id, libro_id=libro_id))
+            except inventario.LibroNoDisponible:
+                # Al salir del atomic se deshacen también los anteriores del lote
+                raise ErrorApi(
+                    f"No quedan ejemplares disponibles del libro {libro_id}.", 409,
+                    indice=indice, libro=libro_id,
+                )
+            creados.append(prestamo.pk)
+    return creados
+
+
+def devolver_lote(elementos):
+    """
+    Devuelve los préstamos indicados (lista de ids) en una sola transacción,
+    con sus multas si hay retraso. Si uno no existe o ya estaba devuelto no
+    se devuelve ninguno. Devuelve [{'id', 'multa'}].
+    """
+    ids = [_entero(elemento, 'prestamo') for elemento in elementos]
+    prestamos = Prestamo.objects.only('id', 'usuario_id', 'libro_id', 'fecha_limite').in_bulk(ids)
+    for indice, prestamo_id in enumerate(ids):
+        if prestamo_id not in prestamos:
+            raise ErrorApi(f"El préstamo {prestamo_id} no existe.", 404, indice=indice)
+
+    resultados = []
+    with transaction.atomic():
+        for indice, prestamo_id in enumerate(ids):
+            try:
+                monto = inventario.realizar_devolucion(prestamos[prestamo_id])
+            except inventario.PrestamoYaDevuelto:
+                raise ErrorApi(
+                    f"El préstamo {prestamo_id} ya fue devuelto.", 409,
+                    indice=indice, prestamo=prestamo_id,
+                )
+            resultados.append({'id': prestamo_id, 'multa': monto})
+    return resultados
+
+
+# ============================
+# Vistas
+# ============================
+def vista_api(metodos=('GET', 'HEAD'), solo_personal=False):
+    """
+    Sesión obligatoria (401 en JSON, sin redirigir al login), método
+    permitido y ErrorApi convertido en {"error": ...} con su estado.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return respuesta_json(request, {'error': "Debes iniciar sesión."}, 401)
+            if request.method not in metodos:
+                respuesta = respuesta_json(request, {'error': f"Método {request.method} no permitido."}, 405)
+                respuesta['Allow'] = ', '.join(metodos)
+                return respuesta
+            if solo_personal and not es_personal(request.user):
+                return respuesta_json(request, {'error': "Solo el personal de la biblioteca."}, 403)
+            try:
+                return vista(request, *args, **kwargs)
+            except ErrorApi as error:
+                return respuesta_json(request, {'error': str(error), **error.detalle}, error.estado)
+        return envoltura
+    return decorador
+
+
+@vista_api()
+def lista(request, recurso):
+    config = RECURSOS[recurso]
+    campos = campos_pedidos(config, request.GET.get('fields'))
+    queryset = _visibles(request, config).filter(**_filtros(recurso, request.GET))
+    despues, antes = _cursores(config, request.GET)
+    pagina = paginacion.paginar(
+        proyectar(queryset, config, campos), config['orden'],
+        despues, antes, _limite(request.GET.get('limite')),
+    )
+    return respuesta_json(request, {
+        'resultados': serializar(pagina, config, campos),
+        'siguiente': pagina.siguiente,
+        'anterior': pagina.anterior,
+    })
+
+
+@vista_api()
+def detalle(request, recurso, pk):
+    config = RECURSOS[recurso]
+    campos = campos_pedidos(config, request.GET.get('fields'))
+    fila = proyectar(_visibles(request, config).filter(pk=pk), config, campos).first()
+    if fila is None:
+        raise ErrorApi("No encontrado.", 404)
+    return respuesta_json(request, serializar([fila], config, campos)[0])
+
+
+@vista_api(metodos=('POST',), solo_personal=True)
+def prestamos_lote(request):
+    ids = prestar_lote(_lote(request))
+    config = RECURSOS['prestamos']
+    campos = list(config['por_defecto'])
+    filas = proyectar(Prestamo.objects.filter(id__in=ids).order_by('id'), config, campos)
+    return respuesta_json(request, {'resultados': serializar(filas, config, campos)}, 201)
+
+
+@vista_api(metodos=('POST',), solo_personal=True)
+def devoluciones_lote(request):
+    return respuesta_json(request, {'resultados': devolver_lote(_lote(request))})
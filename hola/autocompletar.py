@@ -0,0 +1,93 @@
+# hola/autocompletar.py
+from django.db.models import Q
+
+from . import busqueda
+from .models import Libro, Usuario
+
+
+# ============================
+# Búsquedas para autocompletar
+# ============================
+# Sugerencias por prefijo con un límite de resultados, para que los
+# formularios de préstamo y reserva no tengan que listar todo el catálogo
+# ni todos los usuarios en un <select>.
+
+LIMITE = 10
+LIMITE_MAXIMO = 50
+MINIMO_CARACTERES = 2
+
+
+def _limite(valor):
+    try:
+        return max(1, min(int(valor), LIMITE_MAXIMO))
+    except (TypeError, ValueError):
+        return LIMITE
+
+
+def _rango_prefijo(campo, prefijo):
+    # campo >= prefijo AND campo < prefijo + U+FFFF: usa el índice de la columna
+    return {f'{campo}__gte': prefijo, f'{campo}__lt': prefijo + '\uffff'}
+
+
+def texto_libro(libro):
+    autor = libro.get('autor__nombre')
+    return f"{libro['titulo']} — {autor}" if autor else libro['titulo']
+
+
+def texto_usuario(usuario):
+    return f"{usuario['nombre']} {usuario['apellido']} ({usuario['email']})"
+
+
+def buscar_libros(texto, limite=LIMITE):
+    """
+    Libros con ejemplares disponibles cuyo título/autor/etc. empieza por `texto`
+    (o cuyo ISBN empieza por él). Devuelve [{'id', 'texto', 'disponibles'}].
+    """
+    texto = (texto or '').strip()
+    limite = _limite(limite)
+    if len(texto) < MINIMO_CARACTERES:
+        return []
+
+    libros = Libro.objects.disponibles()
+    if texto.isdigit():
+        libros = libros.filter(**_rango_prefijo('isbn', texto)).order_by('isbn')
+    elif busqueda.disponible():
+        # Se piden más candidatos porque algunos pueden no tener ejemplares
+        ids = busqueda.buscar_ids(texto, limite=limite * 5)
+        posicion = {libro_id: i for i, libro_id in enumerate(ids)}
+        filas = list(
+            libros.filter(id__in=ids).values('id', 'titulo', 'autor__nombre', 'disponibles')
+        )
+        filas.sort(key=lambda fila: posicion[fila['id']])
+        return [
+            {'id': fila['id'], 'texto': texto_libro(fila), 'disponibles': fila['disponibles']}
+            for fila in filas[:limite]
+        ]
+    else:
+        libros = libros.filter(titulo__istartswith=texto).order_by('titulo')
+
+    return [
+        {'id': fila['id'], 'texto': texto_libro(fila), 'disponibles': fila['disponibles']}
+        for fila in libros.values('id', 'titulo', 'autor__nombre', 'disponibles')[:limite]
+    ]
+
+
+def buscar_usuarios(texto, limite=LIMITE):
+    """
+    Usuarios cuyo nombre, apellido o email empieza por `texto`.
+    Devuelve [{'id', 'texto'}].
+    """
+    texto = (texto or '').strip()
+    limite = _limite(limite)
+    if len(texto) < MINIMO_CARACTERES:
+        return []
+
+    filtro = (
+        Q(nombre__istartswith=texto) | Q(apellido__istartswith=texto)
+        | Q(**_rango_prefijo('email', texto.lower()))
+    )
+    usuarios = (
+        Usuario.objects.filter(filtro).order_by('nombre', 'apellido', 'id')
+        .values('id', 'nombre', 'apellido', 'email')[:limite]
+    )
+    return [{'id': usuario['id'], 'texto': texto_usuario(usuario)} for usuario in usuarios]
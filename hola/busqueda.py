@@ -0,0 +1,133 @@
+# hola/busqueda.py
+import re
+
+from django.db import connection
+
+from .models import Libro
+
+
+# ============================
+# Índice de búsqueda FTS5 (SQLite)
+# ============================
+# Tabla virtual con una fila por libro (rowid = id del libro). El
+# tokenizador unicode61 con remove_diacritics hace que "Mañosa" y
+# "Manosa" encuentren lo mismo. Se mantiene sincronizada desde
+# hola/signals.py y se reconstruye con `manage.py reconstruir_busqueda`.
+# La tabla la crea la migración 0006_libro_fts.
+
+TABLA_FTS = 'hola_libro_fts'
+COLUMNAS_FTS = ('titulo', 'autor', 'categoria', 'editorial', 'etiquetas')
+LOTE = 500
+LIMITE_RESULTADOS = 500
+
+
+def disponible(conexion=None):
+    return (conexion or connection).vendor == 'sqlite'
+
+
+def _documentos(ids):
+    """
+    Genera (id, titulo, autor, categoria, editorial, etiquetas) para cada libro.
+    """
+    etiquetas = {}
+    relaciones = (
+        Libro.etiquetas.through.objects.filter(libro_id__in=ids)
+        .values_list('libro_id', 'etiqueta__nombre')
+    )
+    for libro_id, nombre in relaciones:
+        etiquetas.setdefault(libro_id, []).append(nombre)
+
+    filas = Libro.objects.filter(id__in=ids).values_list(
+        'id', 'titulo', 'autor__nombre', 'categoria__nombre', 'editorial__nombre'
+    )
+    for libro_id, titulo, autor, categoria, editorial in filas:
+        yield (
+            libro_id, titulo, autor or '', categoria or '', editorial or '',
+            ' '.join(etiquetas.get(libro_id, [])),
+        )
+
+
+def _lotes(valores):
+    valores = list(valores)
+    for inicio in range(0, len(valores), LOTE):
+        yield valores[inicio:inicio + LOTE]
+
+
+def eliminar_libros(ids):
+    if not disponible():
+        return
+    with connection.cursor() as cursor:
+        for lote in _lotes(ids):
+            marcadores = ', '.join(['%s'] * len(lote))
+            cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid IN ({marcadores})", lote)
+
+
+def indexar_libros(ids):
+    """
+    (Re)indexa los libros indicados con dos consultas por lote.
+    """
+    if not disponible():
+        return
+    columnas = ', '.join(('rowid',) + COLUMNAS_FTS)
+    marcadores = ', '.join(['%s'] * (len(COLUMNAS_FTS) + 1))
+    for lote in _lotes(ids):
+        eliminar_libros(lote)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {TABLA_FTS} ({columnas}) VALUES ({marcadores})",
+                list(_documentos(lote)),
+            )
+
+
+def reconstruir_indice():
+    """
+    Vacía y vuelve a llenar el índice completo. Devuelve los libros indexados.
+    """
+    if not disponible():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS}")
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            Libro.objects.filter(id__gt=ultimo_id).order_by('id')
+            .values_list('id', flat=True)[:LOTE * 4]
+        )
+        if not ids:
+            break
+        indexar_libros(ids)
+        total += len(ids)
+        ultimo_id = ids[-1]
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('optimize')")
+    return total
+
+
+def _expresion(texto, columna=None):
+    # Cada palabra se busca como prefijo (en una columna o en todas)
+    prefijo = f'{columna} : ' if columna else ''
+    palabras = re.findall(r'\w+', texto)
+    return ' AND '.join(f'{prefijo}"{palabra}"*' for palabra in palabras)
+
+
+def buscar_ids(texto='', limite=LIMITE_RESULTADOS, **columnas):
+    """
+    Devuelve los ids de libros que coinciden, ordenados por relevancia (bm25).
+    `texto` busca en todas las columnas; `columnas` usa los nombres de
+    COLUMNAS_FTS, p. ej. buscar_ids(titulo="cien años", autor="garcia").
+    """
+    expresiones = [_expresion(texto)] + [
+        _expresion(valor, columna)
+        for columna, valor in columnas.items()
+        if columna in COLUMNAS_FTS and valor
+    ]
+    expresiones = [e for e in expresiones if e]
+    if not expresiones:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s ORDER BY rank LIMIT %s",
+            [' AND '.join(expresiones), limite],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
@@ -0,0 +1,132 @@
+# hola/cache_http.py
+import hashlib
+import time
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import compress_string
+
+from .models import InventarioGlobal
+
+
+# ============================
+# Caché HTTP de páginas
+# ============================
+# Las páginas decoradas con @pagina_cacheada se renderizan una vez por
+# versión y se guardan (cuerpo y versión gzip) en la caché de Django.
+# Cada respuesta lleva ETag y Last-Modified; si el navegador ya tiene la
+# versión actual se responde 304 sin renderizar nada.
+#
+# La versión de una página es la del código (plantillas y vistas) más,
+# en páginas del catálogo, la versión de los datos (ver version_catalogo).
+
+CONFIGURACION = {
+    'TIEMPO': 60 * 60 * 24,   # segundos que se guarda cada página
+    'GZIP_MINIMO': 1024,      # bytes a partir de los que se comprime
+}
+CLAVE_VERSION_CATALOGO = 'paginas:version_catalogo'
+
+
+def _config():
+    return {**CONFIGURACION, **getattr(settings, 'CACHE_PAGINAS', {})}
+
+
+@lru_cache(maxsize=None)
+def version_codigo():
+    """
+    Huella de las plantillas y vistas de la app: cambia al desplegar código nuevo.
+    """
+    carpeta = Path(__file__).resolve().parent
+    huella = hashlib.md5()
+    for archivo in sorted([carpeta / 'views.py', *(carpeta / 'templates').rglob('*.html')]):
+        huella.update(archivo.read_bytes())
+    return huella.hexdigest()[:12]
+
+
+def version_catalogo():
+    """
+    Versión de los datos del catálogo: un contador que se incrementa al
+    editar libros/autores (hola/signals.py) más la última actualización
+    de los contadores de circulación.
+    """
+    contador = cache.get(CLAVE_VERSION_CATALOGO)
+    if contador is None:
+        contador = int(time.time() * 1000)
+        cache.add(CLAVE_VERSION_CATALOGO, contador, None)
+    actualizado = InventarioGlobal.objects.filter(pk=1).values_list('actualizado', flat=True).first()
+    return f"{contador}-{actualizado.timestamp() if actualizado else 0}"
+
+
+def invalidar_catalogo():
+    try:
+        cache.incr(CLAVE_VERSION_CATALOGO)
+    except ValueError:
+        cache.set(CLAVE_VERSION_CATALOGO, int(time.time() * 1000), None)
+
+
+def _entrada(respuesta):
+    contenido = respuesta.content
+    minimo = _config()['GZIP_MINIMO']
+    comprimido = compress_string(contenido) if len(contenido) >= minimo else None
+    return {
+        'contenido': contenido,
+        'gzip': comprimido if comprimido and len(comprimido) < len(contenido) else None,
+        'tipo': respuesta['Content-Type'],
+        'etag': 'W/"%s"' % hashlib.md5(contenido).hexdigest(),
+        'modificado': int(time.time()),
+    }
+
+
+def _responder(request, entrada):
+    no_modificada = get_conditional_response(
+        request, etag=entrada['etag'], last_modified=entrada['modificado'],
+    )
+    if no_modificada is not None:
+        respuesta = no_modificada
+    else:
+        usa_gzip = entrada['gzip'] and 'gzip' in request.headers.get('Accept-Encoding', '')
+        respuesta = HttpResponse(
+            entrada['gzip'] if usa_gzip else entrada['contenido'], content_type=entrada['tipo'],
+        )
+        if usa_gzip:
+            respuesta['Content-Encoding'] = 'gzip'
+    respuesta['ETag'] = entrada['etag']
+    respuesta['Last-Modified'] = http_date(entrada['modificado'])
+    # El navegador puede guardarla pero debe revalidar (304) en cada visita
+    respuesta['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(respuesta, ('Accept-Encoding',))
+    return respuesta
+
+
+def pagina_cacheada(version_datos=None):
+    """
+    Decorador para páginas iguales para todos los usuarios. `version_datos`
+    es una función sin argumentos que devuelve la versión de los datos que
+    muestra la página (p. ej. version_catalogo); sin ella solo cuenta el código.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vista(request, *args, **kwargs)
+
+            version = version_codigo() + (f":{version_datos()}" if version_datos else '')
+            clave = 'paginas:' + hashlib.md5(
+                f"{vista.__module__}.{vista.__name__}:{request.get_full_path()}:{version}".encode()
+            ).hexdigest()
+
+            entrada = cache.get(clave)
+            if entrada is None:
+                respuesta = vista(request, *args, **kwargs)
+                if respuesta.status_code != 200 or respuesta.streaming or respuesta.cookies:
+                    return respuesta
+                entrada = _entrada(respuesta)
+                cache.set(clave, entrada, _config()['TIEMPO'])
+            return _responder(request, entrada)
+        return envoltura
+    return decorador
@@ -0,0 +1,122 @@
+# hola/correo.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CorreoPendiente
+
+
+# ============================
+# Bandeja de salida de correos
+# ============================
+# Las vistas solo encolan (un INSERT); el comando `enviar_correos`
+# vacía la cola por lotes reutilizando una única conexión SMTP y
+# reintenta los fallos con espera exponencial. Cada lote se reclama
+# con un UPDATE condicional antes de enviarlo, así que dos procesos
+# a la vez nunca mandan el mismo correo.
+
+TAMANO_LOTE = 50
+MAX_INTENTOS = 5
+ESPERA_BASE = 60  # segundos; se duplica en cada reintento
+RECLAMO_CADUCA = timedelta(minutes=15)  # un proceso que murió a medio lote
+
+
+def _correos(asunto, mensaje, destinatarios, remitente):
+    return [
+        CorreoPendiente(
+            destinatario=destinatario,
+            asunto=asunto,
+            cuerpo=mensaje,
+            remitente=remitente or '',
+        )
+        for destinatario in destinatarios
+    ]
+
+
+def encolar_correo(asunto, mensaje, destinatarios, remitente=None):
+    return CorreoPendiente.objects.bulk_create(_correos(asunto, mensaje, destinatarios, remitente))
+
+
+async def aencolar_correo(asunto, mensaje, destinatarios, remitente=None):
+    # Versión para vistas asíncronas: encola sin bloquear el event loop
+    return await CorreoPendiente.objects.abulk_create(_correos(asunto, mensaje, destinatarios, remitente))
+
+
+def _espera(intentos):
+    return timedelta(seconds=ESPERA_BASE * 2 ** (intentos - 1))
+
+
+def _reclamar(lote):
+    """
+    Pasa a 'enviando' hasta `lote` correos listos para enviar y devuelve
+    solo los que reclamó este proceso. Los que quedaron en 'enviando' más
+    de RECLAMO_CADUCA (proceso caído) vuelven a estar disponibles.
+    """
+    ahora = timezone.now()
+    disponibles = (
+        Q(estado='pendiente', proximo_intento__lte=ahora)
+        | Q(estado='enviando', reclamado__lt=ahora - RECLAMO_CADUCA)
+    )
+    ids = list(
+        CorreoPendiente.objects.filter(disponibles)
+        .order_by('proximo_intento', 'id').values_list('id', flat=True)[:lote]
+    )
+    if not ids:
+        return []
+    # `ahora` identifica este reclamo: otro proceso que leyó los mismos ids
+    # solo actualiza los que sigan disponibles
+    CorreoPendiente.objects.filter(disponibles, id__in=ids).update(estado='enviando', reclamado=ahora)
+    return list(
+        CorreoPendiente.objects.filter(id__in=ids, estado='enviando', reclamado=ahora).order_by('proximo_intento', 'id')
+    )
+
+
+def procesar_cola(lote=TAMANO_LOTE, max_intentos=MAX_INTENTOS, backend=None):
+    """
+    Envía un lote de correos pendientes con una sola conexión.
+    Devuelve (enviados, fallidos).
+    """
+    pendientes = _reclamar(lote)
+    if not pendientes:
+        return 0, 0
+
+    enviados = fallidos = 0
+    for correo in pendientes:
+        # Si el envío se corta, los que no se llegaron a enviar vuelven a la cola
+        correo.estado = 'pendiente'
+        correo.reclamado = None
+    conexion = get_connection(backend=backend, fail_silently=False)
+    try:
+        conexion.open()
+        for correo in pendientes:
+            mensaje = EmailMessage(
+                subject=correo.asunto,
+                body=correo.cuerpo,
+                from_email=correo.remitente or settings.DEFAULT_FROM_EMAIL,
+                to=[correo.destinatario],
+                connection=conexion,
+            )
+            correo.intentos += 1
+            try:
+                conexion.send_messages([mensaje])
+            except Exception as error:
+                correo.ultimo_error = str(error)
+                if correo.intentos >= max_intentos:
+                    correo.estado = 'fallido'
+                else:
+                    correo.proximo_intento = timezone.now() + _espera(correo.intentos)
+                fallidos += 1
+            else:
+                correo.estado = 'enviado'
+                correo.enviado = timezone.now()
+                correo.ultimo_error = ''
+                enviados += 1
+    finally:
+        conexion.close()
+        CorreoPendiente.objects.bulk_update(
+            pendientes, ['estado', 'intentos', 'proximo_intento', 'ultimo_error', 'enviado', 'reclamado']
+        )
+    return enviados, fallidos
@@ -0,0 +1,151 @@
+# hola/datos_sinteticos.py
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import F
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from . import busqueda, estadisticas, inventario
+from .models import Autor, Categoria, Editorial, Libro, Prestamo, Reserva, Usuario
+
+
+# ============================
+# Datos sintéticos para benchmarks
+# ============================
+# Llena la base de datos con volúmenes realistas usando bulk_create.
+# Pensado para bases de datos de prueba (ver `manage.py benchmark_vistas`),
+# nunca para la base de datos de producción.
+
+LOTE = 5000
+PALABRAS = (
+    'soledad', 'amor', 'guerra', 'ciudad', 'mar', 'noche', 'tiempo', 'sombra',
+    'reino', 'selva', 'perros', 'tierra', 'casa', 'espíritus', 'laberinto', 'mañana',
+)
+
+
+@contextmanager
+def base_de_prueba(archivo=None):
+    """
+    Crea una base de datos de prueba (los alias espejo, p. ej. 'lectura',
+    apuntan a ella) y la destruye al salir. La configurada nunca se toca.
+    `archivo` fuerza una base en disco en lugar de la de memoria de SQLite,
+    que bloquea tablas enteras cuando la usan varios hilos a la vez.
+    """
+    setup_test_environment()
+    if archivo:
+        connection.settings_dict['TEST']['NAME'] = archivo
+    nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    for alias in connections:
+        if connections[alias].settings_dict['TEST'].get('MIRROR') == DEFAULT_DB_ALIAS:
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+def _en_lotes(generador, modelo):
+    lote = []
+    for objeto in generador:
+        lote.append(objeto)
+        if len(lote) >= LOTE:
+            modelo.objects.bulk_create(lote, batch_size=LOTE)
+            lote = []
+    if lote:
+        modelo.objects.bulk_create(lote, batch_size=LOTE)
+
+
+def sembrar(libros=1000, usuarios=500, prestamos=10000, reservas=2000, dias=365, semilla=27, progreso=None):
+    """
+    Crea el catálogo, usuarios, préstamos (repartidos en `dias` días) y
+    reservas, y deja contadores, estadísticas e índice de búsqueda al día.
+    """
+    aleatorio = random.Random(semilla)
+    avisar = progreso or (lambda mensaje: None)
+    hoy = date.today()
+
+    with transaction.atomic():
+        autores = Autor.objects.bulk_create([Autor(nombre=f'Autor {i}') for i in range(max(libros // 20, 1))])
+        categorias = Categoria.objects.bulk_create([Categoria(nombre=f'Categoría {i}') for i in range(30)])
+        editoriales = Editorial.objects.bulk_create([Editorial(nombre=f'Editorial {i}') for i in range(50)])
+        avisar(f"{len(autores)} autores, {len(categorias)} categorías, {len(editoriales)} editoriales")
+
+        _en_lotes((
+            Libro(
+                titulo=f"{' '.join(aleatorio.sample(PALABRAS, 3)).capitalize()} {i}",
+                isbn=f'{9780000000000 + i}',
+                autor_id=aleatorio.choice(autores).id,
+                categoria_id=aleatorio.choice(categorias).id,
+                editorial_id=aleatorio.choice(editoriales).id,
+                fecha_publicacion=hoy - timedelta(days=aleatorio.randint(0, 36500)),
+                paginas=aleatorio.randint(50, 900),
+                ejemplares=aleatorio.randint(1, 10),
+            )
+            for i in range(libros)
+        ), Libro)
+        avisar(f"{libros} libros")
+
+        _en_lotes((
+            User(username=f'lector{i}', email=f'lector{i}@example.com', password='!')
+            for i in range(usuarios)
+        ), User)
+        user_ids = User.objects.filter(username__startswith='lector').values_list('id', flat=True)
+        _en_lotes((
+            Usuario(user_id=user_id, nombre=f'Lector {i}', apellido='Prueba', email=f'lector{i}@example.com')
+            for i, user_id in enumerate(user_ids.iterator())
+        ), Usuario)
+        avisar(f"{usuarios} usuarios")
+
+        libro_ids = list(Libro.objects.values_list('id', flat=True))
+        usuario_ids = list(Usuario.objects.values_list('id', flat=True))
+
+        # Préstamos repartidos por día; fecha_prestamo es auto_now_add y se corrige después
+        por_dia = max(prestamos // dias, 1)
+        creados = 0
+        for dia in range(dias):
+            cantidad = min(por_dia, prestamos - creados) if dia < dias - 1 else prestamos - creados
+            if cantidad <= 0:
+                break
+            inicio = hoy - timedelta(days=dias - dia)
+            ultimo_id = Prestamo.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            _en_lotes((
+                Prestamo(
+                    usuario_id=aleatorio.choice(usuario_ids),
+                    libro_id=aleatorio.choice(libro_ids),
+                    fecha_limite=inicio + timedelta(days=2),
+                    devuelto=dia < dias - 30 or aleatorio.random() < 0.7,
+                    fecha_devolucion=inicio + timedelta(days=aleatorio.randint(1, 5)),
+                )
+                for _ in range(cantidad)
+            ), Prestamo)
+            Prestamo.objects.filter(id__gt=ultimo_id).update(
+                fecha_prestamo=timezone.make_aware(datetime.combine(inicio, time(10)))
+            )
+            creados += cantidad
+        Prestamo.objects.filter(devuelto=False).update(fecha_devolucion=None)
+        avisar(f"{creados} préstamos")
+
+        estados = ('pendiente', 'activo', 'finalizado', 'finalizado')
+        _en_lotes((
+            Reserva(
+                usuario_id=aleatorio.choice(usuario_ids),
+                libro_id=aleatorio.choice(libro_ids),
+                fecha_inicio=(inicio := hoy - timedelta(days=aleatorio.randint(0, dias))),
+                fecha_fin=inicio + timedelta(days=7),
+                estado=aleatorio.choice(estados),
+            )
+            for _ in range(reservas)
+        ), Reserva)
+        avisar(f"{reservas} reservas")
+
+        # Los contadores pueden superar los ejemplares en datos aleatorios: se ajusta el stock
+        inventario.recalcular_inventario()
+        Libro.objects.filter(prestados__gt=F('ejemplares')).update(ejemplares=F('prestados') + 1)
+        estadisticas.reconstruir()
+        busqueda.reconstruir_indice()
+        avisar("contadores, estadísticas e índice de búsqueda reconstruidos")
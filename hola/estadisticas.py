@@ -0,0 +1,110 @@
+# hola/estadisticas.py
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import EstadisticaDiaria, EstadisticaLibro, Prestamo, Reserva
+
+
+# ============================
+# Estadísticas acumuladas (rollups)
+# ============================
+# Cada préstamo nuevo suma 1 al día en que se hace y cada reserva al de
+# su fecha_inicio (la misma regla que reconstruir()); ambos suman 1 a su
+# libro. Son históricas: eliminar un préstamo no las descuenta. El
+# tablero de estadísticas lee solo estas tablas, así que su costo no
+# crece con el historial. `manage.py backfill_estadisticas` las reconstruye.
+
+DIAS_GRAFICO = 90
+
+
+def _incrementar(modelo, campo, **clave):
+    if modelo.objects.filter(**clave).update(**{campo: F(campo) + 1}):
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**clave, **{campo: 1})
+    except IntegrityError:
+        # Otra petición creó la fila al mismo tiempo
+        modelo.objects.filter(**clave).update(**{campo: F(campo) + 1})
+
+
+def registrar_prestamo(libro_id, fecha=None):
+    _incrementar(EstadisticaDiaria, 'prestamos', fecha=fecha or timezone.localdate())
+    _incrementar(EstadisticaLibro, 'total_prestamos', libro_id=libro_id)
+
+
+def registrar_reserva(libro_id, fecha=None):
+    _incrementar(EstadisticaDiaria, 'reservas', fecha=fecha or timezone.localdate())
+    _incrementar(EstadisticaLibro, 'total_reservas', libro_id=libro_id)
+
+
+def _consulta_top(campo, limite):
+    return (
+        EstadisticaLibro.objects.filter(**{f'{campo}__gt': 0})
+        .order_by(f'-{campo}')
+        .values('libro__titulo', total=F(campo))[:limite]
+    )
+
+
+def _consulta_serie(campo, dias):
+    desde = timezone.localdate() - timedelta(days=dias)
+    return (
+        EstadisticaDiaria.objects.filter(fecha__gte=desde, **{f'{campo}__gt': 0})
+        .order_by('fecha')
+        .values('fecha', total=F(campo))
+    )
+
+
+def _punto(fila):
+    return {'dia': fila['fecha'].isoformat(), 'total': fila['total']}
+
+
+def top_libros(campo, limite=5):
+    return list(_consulta_top(campo, limite))
+
+
+def serie_diaria(campo='prestamos', dias=DIAS_GRAFICO):
+    return [_punto(fila) for fila in _consulta_serie(campo, dias)]
+
+
+async def atop_libros(campo, limite=5):
+    return [fila async for fila in _consulta_top(campo, limite)]
+
+
+async def aserie_diaria(campo='prestamos', dias=DIAS_GRAFICO):
+    return [_punto(fila) async for fila in _consulta_serie(campo, dias)]
+
+
+def reconstruir():
+    """
+    Vuelve a calcular todas las tablas de estadísticas desde el historial.
+    """
+    EstadisticaDiaria.objects.all().delete()
+    EstadisticaLibro.objects.all().delete()
+
+    por_dia = {}
+    prestamos = (
+        Prestamo.objects.order_by()
+        .annotate(dia=TruncDate('fecha_prestamo'))
+        .values('dia').annotate(total=Count('id'))
+    )
+    for fila in prestamos:
+        por_dia.setdefault(fila['dia'], EstadisticaDiaria(fecha=fila['dia'])).prestamos = fila['total']
+    # Las reservas no guardan fecha de creación; usamos fecha_inicio
+    reservas = Reserva.objects.order_by().values('fecha_inicio').annotate(total=Count('id'))
+    for fila in reservas:
+        por_dia.setdefault(fila['fecha_inicio'], EstadisticaDiaria(fecha=fila['fecha_inicio'])).reservas = fila['total']
+    EstadisticaDiaria.objects.bulk_create(por_dia.values(), batch_size=1000)
+
+    por_libro = {}
+    for fila in Prestamo.objects.order_by().values('libro_id').annotate(total=Count('id')):
+        por_libro.setdefault(fila['libro_id'], EstadisticaLibro(libro_id=fila['libro_id'])).total_prestamos = fila['total']
+    for fila in Reserva.objects.order_by().values('libro_id').annotate(total=Count('id')):
+        por_libro.setdefault(fila['libro_id'], EstadisticaLibro(libro_id=fila['libro_id'])).total_reservas = fila['total']
+    EstadisticaLibro.objects.bulk_create(por_libro.values(), batch_size=1000)
+
+    return len(por_dia), len(por_libro)
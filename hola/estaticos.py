@@ -0,0 +1,179 @@
+# hola/estaticos.py
+import gzip
+import json
+import mimetypes
+import os
+from pathlib import Path
+from urllib.parse import urlparse
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+
+
+# ============================
+# Archivos estáticos con hash y gzip
+# ============================
+# collectstatic copia cada archivo con un hash de su contenido en el
+# nombre (estilo.3f2a9c.css) y un manifiesto staticfiles.json. Como el
+# nombre cambia cuando cambia el contenido, esos archivos se sirven con
+# Cache-Control inmutable. Los de texto llevan además una copia .gz.
+
+CONFIGURACION = {
+    'MAX_AGE_INMUTABLE': 60 * 60 * 24 * 365,  # archivos con hash en el nombre
+    'MAX_AGE': 60,                            # archivos sin hash
+    'GZIP_MINIMO': 512,                       # bytes a partir de los que se comprime
+}
+EXTENSIONES_COMPRIMIBLES = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml',
+    '.ico', '.ttf', '.otf', '.eot',
+}
+
+
+def _config():
+    return {**CONFIGURACION, **getattr(settings, 'ESTATICOS', {})}
+
+
+class EstaticosComprimidos(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Sin manifiesto (no se ha ejecutado collectstatic: desarrollo, tests)
+        # o si falta el archivo, se usa el nombre original
+        if not self.hashed_files:
+            return name
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def url_converter(self, name, hashed_files, template=None):
+        convertir = super().url_converter(name, hashed_files, template)
+
+        def convertir_o_dejar(coincidencia):
+            try:
+                return convertir(coincidencia)
+            except (ValueError, SuspiciousFileOperation):
+                # Referencia rota en un CSS (archivo inexistente): se deja como estaba
+                return coincidencia.group(0)
+        return convertir_o_dejar
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nombre in set(paths) | set(self.hashed_files.values()):
+            self._comprimir(nombre)
+
+    def _comprimir(self, nombre):
+        if os.path.splitext(nombre)[1].lower() not in EXTENSIONES_COMPRIMIBLES:
+            return
+        ruta = Path(self.path(nombre))
+        contenido = ruta.read_bytes()
+        if len(contenido) < _config()['GZIP_MINIMO']:
+            return
+        # mtime=0: el mismo archivo produce siempre el mismo .gz
+        comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+        if len(comprimido) < len(contenido):
+            ruta.with_name(ruta.name + '.gz').write_bytes(comprimido)
+
+
+def nombres_con_hash(raiz):
+    """
+    Rutas (relativas a STATIC_ROOT) de los archivos con hash según el manifiesto.
+    """
+    try:
+        manifiesto = json.loads((Path(raiz) / EstaticosComprimidos.manifest_name).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return set()
+    return set(manifiesto.get('paths', {}).values())
+
+
+def archivos_estaticos(raiz):
+    """
+    Recorre STATIC_ROOT: {ruta relativa: (ruta, tamaño, tamaño del .gz o None)}.
+    """
+    raiz = Path(raiz)
+    archivos = {}
+    if not raiz.is_dir():
+        return archivos
+    for ruta in raiz.rglob('*'):
+        if ruta.suffix == '.gz' or not ruta.is_file():
+            continue
+        comprimido = ruta.with_name(ruta.name + '.gz')
+        archivos[ruta.relative_to(raiz).as_posix()] = (
+            ruta, ruta.stat().st_size, comprimido.stat().st_size if comprimido.is_file() else None,
+        )
+    return archivos
+
+
+# ============================
+# Servidor WSGI de estáticos
+# ============================
+class ServidorEstaticos:
+    """
+    Envoltura WSGI (ver wsgi.py) que sirve STATIC_ROOT sin pasar por Django.
+    Solo responde archivos que existían al arrancar; el resto sigue a la app.
+    """
+
+    def __init__(self, aplicacion, raiz=None, prefijo=None):
+        self.aplicacion = aplicacion
+        self.raiz = raiz or settings.STATIC_ROOT
+        self.prefijo = prefijo or urlparse(settings.STATIC_URL).path
+        self._archivos = None
+
+    @property
+    def archivos(self):
+        if self._archivos is None:
+            self._archivos = self._indexar()
+        return self._archivos
+
+    def _indexar(self):
+        config = _config()
+        con_hash = nombres_con_hash(self.raiz)
+        indice = {}
+        for nombre, (ruta, tamano, tamano_gzip) in archivos_estaticos(self.raiz).items():
+            estado = ruta.stat()
+            etag = f'"{int(estado.st_mtime):x}-{tamano:x}"'
+            max_age = config['MAX_AGE_INMUTABLE'] if nombre in con_hash else config['MAX_AGE']
+            tipo = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+            if tipo.startswith('text/') or tipo in ('application/javascript', 'application/json'):
+                tipo += '; charset=utf-8'
+            cabeceras = [
+                ('Content-Type', tipo),
+                ('Cache-Control', f'public, max-age={max_age}' + (', immutable' if nombre in con_hash else '')),
+                ('Vary', 'Accept-Encoding'),
+            ]
+            variantes = {None: (str(ruta), tamano, etag)}
+            if tamano_gzip is not None:
+                variantes['gzip'] = (str(ruta) + '.gz', tamano_gzip, etag[:-1] + '-gz"')
+            indice[self.prefijo + nombre] = (cabeceras, variantes)
+        return indice
+
+    def __call__(self, environ, start_response):
+        ruta = environ.get('PATH_INFO', '')
+        metodo = environ.get('REQUEST_METHOD')
+        if not ruta.startswith(self.prefijo) or metodo not in ('GET', 'HEAD'):
+            return self.aplicacion(environ, start_response)
+        archivo = self.archivos.get(ruta)
+        if archivo is None:
+            return self.aplicacion(environ, start_response)
+
+        cabeceras, variantes = archivo
+        codificacion = 'gzip' if 'gzip' in variantes and 'gzip' in environ.get('HTTP_ACCEPT_ENCODING', '') else None
+        ruta_archivo, tamano, etag = variantes[codificacion]
+        cabeceras = cabeceras + [('ETag', etag)]
+
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', cabeceras)
+            return []
+
+        cabeceras.append(('Content-Length', str(tamano)))
+        if codificacion:
+            cabeceras.append(('Content-Encoding', codificacion))
+        start_response('200 OK', cabeceras)
+        if metodo == 'HEAD':
+            return []
+        envolver = environ.get('wsgi.file_wrapper', FileWrapper)
+        return envolver(open(ruta_archivo, 'rb'), 64 * 1024)
@@ -0,0 +1,137 @@
+# hola/exports.py
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import inventario
+from .models import Multa, Prestamo, Reserva
+from .paginacion import rango_fechas
+
+
+# ============================
+# Exportación CSV en streaming
+# ============================
+class _Eco:
+    """
+    Pseudo-archivo para csv.writer: devuelve cada línea en vez de guardarla.
+    """
+    def write(self, valor):
+        return valor
+
+
+def filas_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+TAMANO_CHUNK = 2000      # filas que trae cada fetchmany() del iterator()
+LINEAS_POR_BLOQUE = 500  # líneas CSV que se envían juntas al cliente
+
+
+def _bloques(lineas):
+    # Una escritura por línea haría miles de llamadas al socket
+    lineas = iter(lineas)
+    while bloque := ''.join(islice(lineas, LINEAS_POR_BLOQUE)):
+        yield bloque
+
+
+async def _bloques_asincronos(lineas):
+    """
+    En ASGI un iterador síncrono se consumiría entero antes de enviar nada:
+    se pide cada bloque en el hilo de la petición (el mismo que abrió el cursor).
+    """
+    bloques = _bloques(lineas)
+    siguiente = sync_to_async(lambda: next(bloques, None))
+    while (bloque := await siguiente()) is not None:
+        yield bloque
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas, request=None):
+    """
+    Respuesta CSV que se envía por bloques de líneas; `filas` debe ser un
+    iterable perezoso (p. ej. values_list().iterator()) para mantener memoria
+    constante. Con `request` de ASGI el contenido se envía de forma asíncrona.
+    """
+    lineas = filas_csv(encabezados, filas)
+    respuesta = StreamingHttpResponse(
+        _bloques_asincronos(lineas) if isinstance(request, ASGIRequest) else _bloques(lineas),
+        content_type='text/csv; charset=utf-8',
+    )
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return respuesta
+
+
+# ============================
+# Exportaciones de circulación e inventario
+# ============================
+# Cada función devuelve (nombre de archivo, encabezados, filas) con las
+# filas como values_list().iterator(): las usan las vistas de exportación
+# y `manage.py exportar_csv`. Los filtros de fecha van sobre la columna
+# (sin __date) para que SQLite use el índice.
+
+def _hora_local(filas, posiciones):
+    for fila in filas:
+        fila = list(fila)
+        for posicion in posiciones:
+            if fila[posicion] is not None:
+                fila[posicion] = timezone.localtime(fila[posicion]).strftime('%Y-%m-%d %H:%M')
+        yield fila
+
+
+def exportar_prestamos(desde=None, hasta=None, usuario=None, devuelto=None):
+    prestamos = Prestamo.objects.filter(**rango_fechas('fecha_prestamo', desde, hasta, con_hora=True))
+    if usuario:
+        prestamos = prestamos.filter(usuario_id=usuario)
+    if devuelto is not None:
+        prestamos = prestamos.filter(devuelto=devuelto)
+    filas = prestamos.order_by('fecha_prestamo', 'id').values_list(
+        'id', 'usuario_id', 'usuario__nombre', 'usuario__apellido', 'libro_id', 'libro__titulo',
+        'fecha_prestamo', 'fecha_limite', 'fecha_devolucion', 'devuelto',
+    ).iterator(chunk_size=TAMANO_CHUNK)
+    return 'prestamos.csv', [
+        'ID', 'ID usuario', 'Nombre', 'Apellido', 'ID libro', 'Libro',
+        'Fecha de préstamo', 'Fecha límite', 'Fecha de devolución', 'Devuelto',
+    ], _hora_local(filas, [6])
+
+
+def exportar_reservas(desde=None, hasta=None, usuario=None, estado=None):
+    reservas = Reserva.objects.filter(**rango_fechas('fecha_inicio', desde, hasta))
+    if usuario:
+        reservas = reservas.filter(usuario_id=usuario)
+    if estado:
+        reservas = reservas.filter(estado=estado)
+    filas = reservas.order_by('fecha_inicio', 'id').values_list(
+        'id', 'usuario_id', 'usuario__nombre', 'usuario__apellido', 'libro_id', 'libro__titulo',
+        'fecha_inicio', 'fecha_fin', 'estado',
+    ).iterator(chunk_size=TAMANO_CHUNK)
+    return 'reservas.csv', [
+        'ID', 'ID usuario', 'Nombre', 'Apellido', 'ID libro', 'Libro', 'Fecha de reserva', 'Fecha de retiro', 'Estado',
+    ], filas
+
+
+def exportar_multas(desde=None, hasta=None, usuario=None, pagada=None):
+    multas = Multa.objects.filter(**rango_fechas('fecha', desde, hasta, con_hora=True))
+    if usuario:
+        multas = multas.filter(prestamo__usuario_id=usuario)
+    if pagada is not None:
+        multas = multas.filter(pagada=pagada)
+    filas = multas.order_by('id').values_list(
+        'id', 'prestamo_id', 'prestamo__usuario_id', 'prestamo__usuario__nombre', 'prestamo__usuario__apellido',
+        'prestamo__libro__titulo', 'monto', 'fecha', 'pagada',
+    ).iterator(chunk_size=TAMANO_CHUNK)
+    return 'multas.csv', [
+        'ID', 'ID préstamo', 'ID usuario', 'Nombre', 'Apellido', 'Libro', 'Monto', 'Fecha', 'Pagada',
+    ], _hora_local(filas, [7])
+
+
+def exportar_inventario(orden='titulo'):
+    filas = inventario.consulta_inventario(orden).values_list(
+        'id', 'titulo', 'ejemplares', 'disponible_real', 'prestados_real', 'reservados_real'
+    ).iterator(chunk_size=TAMANO_CHUNK)
+    return 'inventario.csv', ['ID', 'Título', 'Total', 'Disponibles', 'Prestados', 'Reservados'], filas
@@ -6,6 +6,7 @@ from django.contrib.auth.models import User
 from .models import Usuario, Libro, Prestamo, Reserva, Categoria, Autor
 from datetime import date
 from .models import Perfil
+from .widgets import AutocompletarWidget
 
 # -----------------------------
 # Formulario de Usuario
@@ -37,7 +38,7 @@ class LibroForm(forms.ModelForm):
 
     class Meta:
         model = Libro
-        fields = ['titulo', 'isbn', 'autor_nombre', 'categoria', 'editorial', 'fecha_publicacion', 'paginas', 'ejemplares', 'estado', 'etiquetas']
+        fields = ['titulo', 'isbn', 'autor_nombre', 'categoria', 'editorial', 'fecha_publicacion', 'paginas', 'ejemplares', 'estado', 'etiquetas', 'portada']
         widgets = {
             'fecha_publicacion': forms.DateInput(attrs={'type': 'date'}),
             'categoria': forms.Select(attrs={'class': 'form-select'}),
@@ -69,16 +70,16 @@ class PrestamoForm(forms.ModelForm):
         fields = ['usuario', 'libro', 'fecha_limite']
         widgets = {
             'fecha_limite': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
-            'libro': forms.Select(attrs={'class': 'form-control'}),
-            'usuario': forms.Select(attrs={'class': 'form-control'}),
+            # Autocompletar: el formulario no lista todo el catálogo ni todos los usuarios
+            'libro': AutocompletarWidget('autocompletar_libros', Libro, attrs={'class': 'form-control'}),
+            'usuario': AutocompletarWidget('autocompletar_usuarios', Usuario, attrs={'class': 'form-control'}),
         }
 
     def __init__(self, *args, usuario_logueado=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Mostrar solo libros realmente disponibles
-        libros_disponibles = [libro.id for libro in Libro.objects.all() if libro.disponible_real > 0]
-        self.fields['libro'].queryset = Libro.objects.filter(id__in=libros_disponibles)
+        # Solo se aceptan libros disponibles; el id enviado se valida con una sola consulta
+        self.fields['libro'].queryset = Libro.objects.disponibles()
 
         # Configuración de usuario
         if usuario_logueado is None:
@@ -111,16 +112,15 @@ class ReservaForm(forms.ModelForm):
         widgets = {
             'fecha_inicio': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'fecha_fin': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
-            'libro': forms.Select(attrs={'class': 'form-control'}),
-            'usuario': forms.Select(attrs={'class': 'form-control'}),
+            'libro': AutocompletarWidget('autocompletar_libros', Libro, attrs={'class': 'form-control'}),
+            'usuario': AutocompletarWidget('autocompletar_usuarios', Usuario, attrs={'class': 'form-control'}),
         }
 
     def __init__(self, *args, usuario_logueado=None, **kwargs):
         super().__init__(*args, **kwargs)
 
         # Mostrar solo libros disponibles
-        libros_disponibles = [libro.id for libro in Libro.objects.all() if libro.disponible_real > 0]
-        self.fields['libro'].queryset = Libro.objects.filter(id__in=libros_disponibles)
+        self.fields['libro'].queryset = Libro.objects.disponibles()
 
         # Configuración de usuario
         if usuario_logueado:
@@ -188,3 +188,45 @@ class PerfilForm(forms.ModelForm):
     class Meta:
         model = Perfil
         fields = ['avatar']
+
+
+# -----------------------------
+# Filtros de listados (préstamos y reservas)
+# -----------------------------
+class FiltroListadoForm(forms.Form):
+    desde = forms.DateField(
+        required=False, label="Desde",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    hasta = forms.DateField(
+        required=False, label="Hasta",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    usuario = forms.IntegerField(
+        required=False, min_value=1, label="ID de usuario",
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+
+
+class FiltroPrestamosForm(FiltroListadoForm):
+    devuelto = forms.ChoiceField(
+        required=False, label="Estado",
+        choices=[('', 'Todos'), ('no', 'Activos'), ('si', 'Devueltos')],
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+
+class FiltroReservasForm(FiltroListadoForm):
+    estado = forms.ChoiceField(
+        required=False, label="Estado",
+        choices=[('', 'Todos')] + Reserva.ESTADO_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+
+class FiltroMultasForm(FiltroListadoForm):
+    pagada = forms.ChoiceField(
+        required=False, label="Estado",
+        choices=[('', 'Todas'), ('no', 'Pendientes'), ('si', 'Pagadas')],
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
@@ -0,0 +1,147 @@
+# hola/imagenes.py
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+# ============================
+# Variantes de imágenes (portadas y avatares)
+# ============================
+# Al subir una portada o un avatar se generan copias reducidas en WebP y
+# JPEG junto al original (carpeta variantes/). Las plantillas las usan con
+# srcset ({% imagen_responsiva %} en templatetags/imagenes.py) para que el
+# navegador descargue solo el tamaño que va a mostrar. Nunca se amplía: los
+# anchos mayores que el original se omiten.
+
+VARIANTES = {
+    # Tarjetas de la galería: 150px de ancho en pantalla (1x, 2x, 3x)
+    'portada': {'anchos': (160, 320, 480), 'cuadrada': False, 'sizes': '150px'},
+    # Avatar de la barra de navegación: 45px, recortado en cuadrado
+    'avatar': {'anchos': (48, 96, 144), 'cuadrada': True, 'sizes': '45px'},
+}
+FORMATOS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 6}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+CLAVE_CACHE = 'imagenes:variantes:v2:%s'
+
+
+def _clave(nombre):
+    # Los nombres de archivo pueden tener espacios o acentos
+    return CLAVE_CACHE % hashlib.md5(nombre.encode()).hexdigest()
+
+
+def nombre_variante(nombre, ancho, extension):
+    """
+    'portadas/quijote.png' → 'portadas/variantes/quijote.png-320.webp'
+    (se conserva la extensión: quijote.png y quijote.jpg no comparten variantes)
+    """
+    carpeta, archivo = os.path.split(nombre)
+    return os.path.join(carpeta, 'variantes', f'{archivo}-{ancho}.{extension}').replace('\\', '/')
+
+
+def _anchos_posibles(original, config):
+    # Sin ampliar; si el original es más pequeño que todos, solo el menor
+    limite = min(original.size) if config['cuadrada'] else original.width
+    return tuple(ancho for ancho in config['anchos'] if ancho <= limite) or config['anchos'][:1]
+
+
+def _redimensionar(original, ancho, cuadrada):
+    if cuadrada:
+        return ImageOps.fit(original, (ancho, ancho), Image.Resampling.LANCZOS)
+    if ancho >= original.width:
+        return original
+    alto = max(round(original.height * ancho / original.width), 1)
+    return original.resize((ancho, alto), Image.Resampling.LANCZOS)
+
+
+def _sin_transparencia(imagen):
+    # JPEG no admite canal alfa: se aplana sobre fondo blanco
+    if imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info):
+        imagen = imagen.convert('RGBA')
+        fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+        fondo.paste(imagen, mask=imagen.getchannel('A'))
+        return fondo
+    return imagen.convert('RGB')
+
+
+def generar_variantes(archivo, tipo):
+    """
+    Genera las variantes WebP/JPEG de un FieldFile (p. ej. libro.portada).
+    Devuelve True si se generaron; una imagen ilegible se registra y se omite.
+    """
+    if not archivo:
+        return False
+    config = VARIANTES[tipo]
+    almacenamiento = archivo.storage
+    try:
+        with almacenamiento.open(archivo.name, 'rb') as contenido:
+            original = Image.open(contenido)
+            original.load()
+    except (OSError, Image.DecompressionBombError) as error:
+        logger.warning("No se pudieron generar variantes de %s: %s", archivo.name, error)
+        return False
+
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'A' in original.getbands() or 'transparency' in original.info else 'RGB')
+
+    anchos = _anchos_posibles(original, config)
+    for ancho in config['anchos']:
+        if ancho not in anchos:
+            # Variantes de un original anterior más grande con el mismo nombre
+            for extension, _, _ in FORMATOS:
+                sobrante = nombre_variante(archivo.name, ancho, extension)
+                if almacenamiento.exists(sobrante):
+                    almacenamiento.delete(sobrante)
+            continue
+        imagen = _redimensionar(original, ancho, config['cuadrada'])
+        for extension, formato, opciones in FORMATOS:
+            salida = BytesIO()
+            (imagen if formato == 'WEBP' else _sin_transparencia(imagen)).save(salida, formato, **opciones)
+            nombre = nombre_variante(archivo.name, ancho, extension)
+            if almacenamiento.exists(nombre):
+                almacenamiento.delete(nombre)
+            almacenamiento.save(nombre, ContentFile(salida.getvalue()))
+
+    cache.set(_clave(archivo.name), anchos, None)
+    return True
+
+
+def anchos_variantes(archivo, tipo):
+    """
+    Anchos de las variantes que existen, de menor a mayor; vacío si no hay
+    (se consulta el disco una vez por archivo).
+    """
+    if not archivo:
+        return ()
+    clave = _clave(archivo.name)
+    anchos = cache.get(clave)
+    if anchos is None:
+        anchos = tuple(
+            ancho for ancho in VARIANTES[tipo]['anchos']
+            if archivo.storage.exists(nombre_variante(archivo.name, ancho, FORMATOS[-1][0]))
+        )
+        cache.set(clave, anchos, None if anchos else 60 * 5)
+    return anchos
+
+
+def tiene_variantes(archivo, tipo):
+    return bool(anchos_variantes(archivo, tipo))
+
+
+def srcset(archivo, tipo, extension):
+    """
+    Valor del atributo srcset con todas las variantes de un formato.
+    """
+    return ', '.join(
+        f"{archivo.storage.url(nombre_variante(archivo.name, ancho, extension))} {ancho}w"
+        for ancho in anchos_variantes(archivo, tipo)
+    )
@@ -0,0 +1,328 @@
+# hola/importacion.py
+import csv
+import json
+import re
+import time
+from collections import Counter
+from datetime import date
+from itertools import islice
+
+from django.db import transaction
+
+from . import busqueda
+from .models import Autor, Categoria, Editorial, Etiqueta, Libro
+
+
+# ============================
+# Importación masiva del catálogo
+# ============================
+# Lee el catálogo de un proveedor (CSV o JSON Lines) fila a fila y lo
+# carga por lotes: autores, editoriales, categorías y etiquetas se
+# resuelven con diccionarios nombre → id cargados una sola vez, y los
+# libros y sus etiquetas se crean con bulk_create. Cada lote es una
+# transacción; si el proceso se corta se reanuda desde el último lote
+# confirmado (ver `manage.py importar_catalogo`). Los ISBN que ya existen
+# se omiten, así que repetir un lote no duplica nada.
+
+LOTE = 2000
+SEPARADOR_ETIQUETAS = '|'
+ESTADOS = {valor for valor, _ in Libro.ESTADO_CHOICES}
+
+
+def _clave(nombre):
+    return ' '.join(nombre.split()).casefold()
+
+
+class Resolutor:
+    """
+    nombre → id de un modelo con campo `nombre` (Autor, Editorial, ...).
+    Se carga entero al crearlo; los nombres nuevos se crean en bloque.
+    Con nombres repetidos en la tabla gana el de menor id.
+    """
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.maximo = modelo._meta.get_field('nombre').max_length
+        self.ids = {}
+        for pk, nombre in modelo.objects.order_by('-id').values_list('id', 'nombre').iterator():
+            self.ids[_clave(nombre)] = pk
+
+    def resolver(self, nombres):
+        """
+        Crea los nombres que faltan y devuelve el diccionario clave → id.
+        """
+        faltan = {}
+        for nombre in nombres:
+            if nombre and _clave(nombre) not in self.ids:
+                faltan.setdefault(_clave(nombre), ' '.join(nombre.split()))
+        if faltan:
+            creados = self.modelo.objects.bulk_create([self.modelo(nombre=n) for n in faltan.values()])
+            if any(objeto.pk is None for objeto in creados):
+                # Motores sin RETURNING en inserciones masivas
+                creados = self.modelo.objects.filter(nombre__in=faltan.values())
+            for objeto in creados:
+                self.ids.setdefault(_clave(objeto.nombre), objeto.pk)
+        return self.ids
+
+    def id(self, nombre):
+        return self.ids.get(_clave(nombre)) if nombre else None
+
+
+# ============================
+# Validación de filas
+# ============================
+def _digito_isbn13(doce):
+    suma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(doce))
+    return str((10 - suma % 10) % 10)
+
+
+def _isbn10_valido(isbn):
+    suma = sum((10 - i) * (10 if d == 'X' else int(d)) for i, d in enumerate(isbn))
+    return suma % 11 == 0
+
+
+def normalizar_isbn(valor, verificar_digito=True):
+    """
+    '978-84-376-0494-7' → '9788437604947'. Un ISBN-10 se convierte a
+    ISBN-13. Devuelve None si no es válido.
+    """
+    isbn = re.sub(r'[\s-]', '', str(valor or '')).upper()
+    if re.fullmatch(r'\d{9}[\dX]', isbn):
+        if verificar_digito and not _isbn10_valido(isbn):
+            return None
+        isbn = '978' + isbn[:9]
+        return isbn + _digito_isbn13(isbn)
+    if not re.fullmatch(r'\d{13}', isbn):
+        return None
+    if verificar_digito and _digito_isbn13(isbn[:12]) != isbn[12]:
+        return None
+    return isbn
+
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    return ' '.join(str(valor).split()) if valor not in (None, '') else ''
+
+
+def _fecha(valor):
+    valor = str(valor or '').strip()
+    if re.fullmatch(r'\d{4}', valor):
+        return date(int(valor), 1, 1)
+    try:
+        return date.fromisoformat(valor[:10])
+    except ValueError:
+        return None
+
+
+def _entero(valor, defecto=None):
+    if valor in (None, ''):
+        return defecto
+    try:
+        return int(str(valor).strip())
+    except ValueError:
+        return None
+
+
+def _etiquetas(valor):
+    if isinstance(valor, list):
+        nombres = valor
+    else:
+        nombres = str(valor or '').split(SEPARADOR_ETIQUETAS)
+    return list(dict.fromkeys(n for n in (' '.join(str(n).split()) for n in nombres) if n))
+
+
+def preparar_fila(fila, verificar_digito=True):
+    """
+    Limpia una fila del archivo. Devuelve (datos, None) o (None, motivo).
+    """
+    datos = {
+        'titulo': _texto(fila, 'titulo'),
+        'isbn': normalizar_isbn(fila.get('isbn'), verificar_digito),
+        'autor': _texto(fila, 'autor'),
+        'categoria': _texto(fila, 'categoria'),
+        'editorial': _texto(fila, 'editorial'),
+        'fecha_publicacion': _fecha(fila.get('fecha_publicacion')),
+        'paginas': _entero(fila.get('paginas')),
+        'ejemplares': _entero(fila.get('ejemplares'), 1),
+        'estado': _texto(fila, 'estado') or 'disponible',
+        'etiquetas': _etiquetas(fila.get('etiquetas')),
+    }
+    if not datos['titulo']:
+        return None, 'sin título'
+    if len(datos['titulo']) > Libro._meta.get_field('titulo').max_length:
+        return None, 'título demasiado largo'
+    if datos['isbn'] is None:
+        return None, 'ISBN inválido'
+    if not datos['autor']:
+        return None, 'sin autor'
+    if datos['fecha_publicacion'] is None:
+        return None, 'fecha de publicación inválida'
+    if not datos['paginas'] or datos['paginas'] < 1:
+        return None, 'páginas inválidas'
+    if datos['ejemplares'] is None or datos['ejemplares'] < 0:
+        return None, 'ejemplares inválidos'
+    if datos['estado'] not in ESTADOS:
+        return None, 'estado inválido'
+    return datos, None
+
+
+# ============================
+# Lectura en streaming
+# ============================
+def leer_filas(ruta):
+    """
+    Genera un dict por fila de un CSV (con encabezados) o de un JSON Lines.
+    Un .json que empieza por '[' se lee entero (no es streaming).
+    """
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        if ruta.lower().endswith('.csv'):
+            yield from csv.DictReader(archivo)
+            return
+        inicio = archivo.read(1)
+        while inicio.isspace():
+            inicio = archivo.read(1)
+        if inicio == '[':
+            archivo.seek(0)
+            yield from json.load(archivo)
+            return
+        archivo.seek(0)
+        for linea in archivo:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+# ============================
+# Carga por lotes
+# ============================
+class Importador:
+    """
+    Carga un iterable de filas (dicts) por lotes. Los resolutores se crean
+    una vez por importación; `rechazo(numero, fila, motivo)` y
+    `lote_confirmado(importador)` son ganchos opcionales.
+    """
+
+    def __init__(self, lote=LOTE, verificar_digito=True, rechazo=None, lote_confirmado=None):
+        self.lote = lote
+        self.verificar_digito = verificar_digito
+        self.rechazo = rechazo or (lambda numero, fila, motivo: None)
+        self.lote_confirmado = lote_confirmado or (lambda importador: None)
+        self.resolutores = {
+            'autor': Resolutor(Autor),
+            'categoria': Resolutor(Categoria),
+            'editorial': Resolutor(Editorial),
+            'etiquetas': Resolutor(Etiqueta),
+        }
+        self.procesadas = 0
+        self.creados = 0
+        self.existentes = 0
+        self.motivos = Counter()
+        self._rechazos_lote = []
+        self.inicio = time.perf_counter()
+        self.procesadas_al_inicio = 0
+
+    @property
+    def rechazados(self):
+        return sum(self.motivos.values())
+
+    @property
+    def filas_por_segundo(self):
+        segundos = time.perf_counter() - self.inicio
+        return (self.procesadas - self.procesadas_al_inicio) / segundos if segundos else 0.0
+
+    def _rechazar(self, numero, fila, motivo):
+        # Se informan al confirmar el lote, para no repetirlos al reanudar
+        self.motivos[motivo] += 1
+        self._rechazos_lote.append((numero, fila, motivo))
+
+    def _nombre_demasiado_largo(self, datos):
+        for campo, resolutor in self.resolutores.items():
+            nombres = datos[campo] if campo == 'etiquetas' else [datos[campo]]
+            if any(len(nombre) > resolutor.maximo for nombre in nombres):
+                return campo
+        return None
+
+    def _validar(self, numerados):
+        """
+        Valida un lote: campos, nombres demasiado largos, ISBN repetido en el
+        archivo y, con una sola consulta, ISBN que ya están en el catálogo.
+        """
+        validos = []
+        for numero, fila in numerados:
+            datos, motivo = preparar_fila(fila, self.verificar_digito)
+            if datos is None:
+                self._rechazar(numero, fila, motivo)
+                continue
+            largo = self._nombre_demasiado_largo(datos)
+            if largo:
+                self._rechazar(numero, fila, f'{largo} demasiado largo')
+                continue
+            validos.append((numero, fila, datos))
+
+        existentes = set(
+            Libro.objects.filter(isbn__in=[datos['isbn'] for _, _, datos in validos]).values_list('isbn', flat=True)
+        )
+        nuevos, vistos = [], set()
+        for numero, fila, datos in validos:
+            if datos['isbn'] in existentes:
+                self.existentes += 1
+            elif datos['isbn'] in vistos:
+                self._rechazar(numero, fila, 'ISBN repetido en el archivo')
+            else:
+                vistos.add(datos['isbn'])
+                nuevos.append(datos)
+        return nuevos
+
+    def _crear(self, nuevos):
+        for campo, resolutor in self.resolutores.items():
+            if campo == 'etiquetas':
+                resolutor.resolver(n for datos in nuevos for n in datos['etiquetas'])
+            else:
+                resolutor.resolver(datos[campo] for datos in nuevos)
+
+        libros = Libro.objects.bulk_create([
+            Libro(
+                titulo=datos['titulo'],
+                isbn=datos['isbn'],
+                autor_id=self.resolutores['autor'].id(datos['autor']),
+                categoria_id=self.resolutores['categoria'].id(datos['categoria']),
+                editorial_id=self.resolutores['editorial'].id(datos['editorial']),
+                fecha_publicacion=datos['fecha_publicacion'],
+                paginas=datos['paginas'],
+                ejemplares=datos['ejemplares'],
+                estado=datos['estado'],
+            )
+            for datos in nuevos
+        ], batch_size=self.lote)
+        ids = {libro.isbn: libro.pk for libro in libros}
+        if None in ids.values():
+            ids = dict(Libro.objects.filter(isbn__in=list(ids)).values_list('isbn', 'id'))
+
+        etiquetas = self.resolutores['etiquetas']
+        Libro.etiquetas.through.objects.bulk_create([
+            Libro.etiquetas.through(libro_id=ids[datos['isbn']], etiqueta_id=etiquetas.id(nombre))
+            for datos in nuevos
+            for nombre in datos['etiquetas']
+        ], batch_size=self.lote)
+        # bulk_create no dispara las señales: se indexan aquí, en la misma transacción
+        busqueda.indexar_libros(list(ids.values()))
+        return len(ids)
+
+    def importar(self, filas, desde=0):
+        """
+        Procesa `filas` saltando las `desde` primeras (ya importadas en una
+        ejecución anterior). Cada lote se confirma por separado.
+        """
+        self.procesadas = self.procesadas_al_inicio = desde
+        self.inicio = time.perf_counter()
+        numeradas = enumerate(islice(filas, desde, None), start=desde + 1)
+        while lote := list(islice(numeradas, self.lote)):
+            self._rechazos_lote = []
+            with transaction.atomic():
+                nuevos = self._validar(lote)
+                if nuevos:
+                    self.creados += self._crear(nuevos)
+            self.procesadas += len(lote)
+            for rechazo in self._rechazos_lote:
+                self.rechazo(*rechazo)
+            self.lote_confirmado(self)
+        return self
@@ -0,0 +1,333 @@
+# hola/inventario.py
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import estadisticas, multas
+from .models import InventarioGlobal, Libro, Multa, Notificacion, Prestamo, Reserva
+
+
+# ============================
+# Motor de inventario incremental
+# ============================
+# Cada préstamo, devolución, reserva o cancelación aplica un delta O(1)
+# sobre los contadores del libro y sobre la fila de InventarioGlobal
+# (y los nuevos préstamos/reservas también sobre hola/estadisticas.py).
+# Estas funciones deben llamarse dentro del mismo transaction.atomic()
+# que modifica el Prestamo o la Reserva, para que los contadores nunca
+# queden desfasados respecto a las tablas de circulación.
+
+INVENTARIO_ID = 1
+
+
+def _sumar(campo, delta):
+    if delta >= 0:
+        return F(campo) + delta
+    return Greatest(F(campo) + delta, 0)
+
+
+def _ajustar_libro(libro_id, prestados=0, reservados=0):
+    cambios = {}
+    if prestados:
+        cambios['prestados'] = _sumar('prestados', prestados)
+    if reservados:
+        cambios['reservados'] = _sumar('reservados', reservados)
+    if cambios:
+        Libro.objects.filter(id=libro_id).update(**cambios)
+
+
+def _ajustar_global(**deltas):
+    cambios = {campo: _sumar(campo, delta) for campo, delta in deltas.items() if delta}
+    if not cambios:
+        return
+    cambios['actualizado'] = timezone.now()
+    if not InventarioGlobal.objects.filter(id=INVENTARIO_ID).update(**cambios):
+        # La fila no existe todavía: la creamos ya calculada
+        recalcular_global()
+
+
+def aplicar_cambio_prestamo(anterior, nuevo):
+    """
+    Aplica el delta entre dos estados de un préstamo.
+    Cada estado es una tupla (libro_id, activo) o None si no existe.
+    Si el préstamo pasa a ocupar un ejemplar (reactivado o movido a otro
+    libro) lo reclama con reclamar_ejemplar, que puede lanzar LibroNoDisponible.
+    """
+    activo_antes = bool(anterior and anterior[1])
+    activo_ahora = bool(nuevo and nuevo[1])
+    mismo_ejemplar = activo_antes and activo_ahora and anterior[0] == nuevo[0]
+    if activo_ahora and not mismo_ejemplar:
+        reclamar_ejemplar(nuevo[0])
+    if activo_antes and not mismo_ejemplar:
+        _ajustar_libro(anterior[0], prestados=-1)
+    _ajustar_global(
+        total_prestamos=(nuevo is not None) - (anterior is not None),
+        prestamos_activos=activo_ahora - activo_antes,
+    )
+    if anterior is None and nuevo is not None:
+        estadisticas.registrar_prestamo(nuevo[0])
+
+
+def aplicar_cambio_reserva(anterior, nuevo, fecha=None):
+    """
+    Aplica el delta entre dos estados de una reserva.
+    Cada estado es una tupla (libro_id, estado) o None si no existe.
+    Una reserva nueva cuenta en las estadísticas el día `fecha` (su
+    fecha_inicio, igual que en estadisticas.reconstruir).
+    """
+    activa_antes = bool(anterior and anterior[1] in Reserva.ESTADOS_ACTIVOS)
+    activa_ahora = bool(nuevo and nuevo[1] in Reserva.ESTADOS_ACTIVOS)
+    if activa_antes:
+        _ajustar_libro(anterior[0], reservados=-1)
+    if activa_ahora:
+        _ajustar_libro(nuevo[0], reservados=1)
+    _ajustar_global(
+        total_reservas=(nuevo is not None) - (anterior is not None),
+        reservas_activas=activa_ahora - activa_antes,
+    )
+    if anterior is None and nuevo is not None:
+        estadisticas.registrar_reserva(nuevo[0], fecha)
+
+
+class LibroNoDisponible(Exception):
+    pass
+
+
+def reclamar_ejemplar(libro_id):
+    """
+    Ocupa un ejemplar con un UPDATE condicional (prestados < ejemplares).
+    Lanza LibroNoDisponible si no queda ninguno.
+    """
+    reclamado = Libro.objects.filter(
+        id=libro_id, prestados__lt=F('ejemplares')
+    ).update(prestados=F('prestados') + 1)
+    if not reclamado:
+        raise LibroNoDisponible(libro_id)
+
+
+def realizar_prestamo(prestamo):
+    """
+    Único punto de entrada para prestar un libro. Reclama un ejemplar con
+    un UPDATE condicional (prestados < ejemplares) y guarda el préstamo en
+    la misma transacción; si no quedan ejemplares lanza LibroNoDisponible
+    sin crear nada. Dos peticiones simultáneas nunca prestan la misma copia.
+    """
+    with transaction.atomic():
+        reclamar_ejemplar(prestamo.libro_id)
+        prestamo.save()
+        _ajustar_global(total_prestamos=1, prestamos_activos=1)
+        estadisticas.registrar_prestamo(prestamo.libro_id)
+    return prestamo
+
+
+def registrar_devolucion(libro_id):
+    aplicar_cambio_prestamo((libro_id, True), (libro_id, False))
+
+
+class PrestamoYaDevuelto(Exception):
+    pass
+
+
+def realizar_devolucion(prestamo, fecha=None):
+    """
+    Único punto de entrada para devolver un libro. Marca el préstamo con un
+    UPDATE condicional (devuelto=False), ajusta los contadores y, si hay
+    retraso, crea la multa; todo en la misma transacción. Si el préstamo ya
+    estaba devuelto lanza PrestamoYaDevuelto. Devuelve el monto de la multa
+    (0 si se devolvió a tiempo).
+    """
+    fecha = fecha or date.today()
+    with transaction.atomic():
+        marcado = Prestamo.objects.filter(pk=prestamo.pk, devuelto=False).update(
+            devuelto=True, fecha_devolucion=fecha,
+        )
+        if not marcado:
+            raise PrestamoYaDevuelto(prestamo.pk)
+        prestamo.devuelto, prestamo.fecha_devolucion = True, fecha
+        registrar_devolucion(prestamo.libro_id)
+
+        retraso = (fecha - prestamo.fecha_limite).days
+        monto = retraso * multas.MONTO_POR_DIA if retraso > 0 else 0
+        if monto:
+            Multa.objects.create(prestamo=prestamo, monto=monto)
+            mensaje = f"Tienes una multa de ${monto} por devolver con {retraso} día(s) de retraso."
+        else:
+            mensaje = "Has devuelto tu libro a tiempo. ¡Gracias!"
+        Notificacion.objects.create(usuario_id=prestamo.usuario_id, prestamo=prestamo, mensaje=mensaje)
+    return monto
+
+
+def registrar_reserva(libro_id, estado, fecha=None):
+    aplicar_cambio_reserva(None, (libro_id, estado), fecha)
+
+
+def registrar_cambio_estado_reserva(libro_id, estado_anterior, estado_nuevo):
+    aplicar_cambio_reserva((libro_id, estado_anterior), (libro_id, estado_nuevo))
+
+
+def descontar_prestamos_eliminados(prestamos):
+    """
+    Descuenta de los contadores los préstamos que se van a eliminar.
+    """
+    por_libro = (
+        prestamos.order_by()
+        .values('libro_id')
+        .annotate(total=Count('id'), activos=Count('id', filter=Q(devuelto=False)))
+    )
+    total = activos = 0
+    for fila in por_libro:
+        _ajustar_libro(fila['libro_id'], prestados=-fila['activos'])
+        total += fila['total']
+        activos += fila['activos']
+    _ajustar_global(total_prestamos=-total, prestamos_activos=-activos)
+
+
+def descontar_reservas_eliminadas(reservas):
+    """
+    Descuenta de los contadores las reservas que se van a eliminar.
+    """
+    por_libro = (
+        reservas.order_by()
+        .values('libro_id')
+        .annotate(
+            total=Count('id'),
+            activas=Count('id', filter=Q(estado__in=Reserva.ESTADOS_ACTIVOS)),
+        )
+    )
+    total = activas = 0
+    for fila in por_libro:
+        _ajustar_libro(fila['libro_id'], reservados=-fila['activas'])
+        total += fila['total']
+        activas += fila['activas']
+    _ajustar_global(total_reservas=-total, reservas_activas=-activas)
+
+
+# ============================
+# Lectura de contadores
+# ============================
+def resumen():
+    """
+    Totales globales de circulación leídos de InventarioGlobal.
+    """
+    inventario = InventarioGlobal.objects.filter(id=INVENTARIO_ID).first()
+    if inventario is None:
+        inventario = recalcular_global()
+    return _totales(inventario)
+
+
+async def aresumen():
+    """
+    resumen() para vistas asíncronas.
+    """
+    inventario = await InventarioGlobal.objects.filter(id=INVENTARIO_ID).afirst()
+    if inventario is None:
+        inventario = await sync_to_async(recalcular_global)()
+    return _totales(inventario)
+
+
+def _totales(inventario):
+    return {
+        'total_prestamos': inventario.total_prestamos,
+        'prestamos_activos': inventario.prestamos_activos,
+        'total_reservas': inventario.total_reservas,
+        'reservas_activas': inventario.reservas_activas,
+    }
+
+
+ORDENES_INVENTARIO = {
+    'titulo': ('titulo', 'id'),
+    'disponible': ('disponible_real', 'id'),
+    '-disponible': ('-disponible_real', '-id'),
+    'prestados': ('prestados_real', 'id'),
+    '-prestados': ('-prestados_real', '-id'),
+    'reservados': ('reservados_real', 'id'),
+    '-reservados': ('-reservados_real', '-id'),
+}
+
+
+def consulta_inventario(orden='titulo'):
+    """
+    Reporte de inventario en una sola consulta: una fila (dict) por libro
+    con ejemplares, prestados, reservados y disponibles, ordenada en SQL.
+    """
+    return (
+        Libro.objects.order_by()
+        .values('id', 'titulo', 'ejemplares')
+        .annotate(
+            prestados_real=F('prestados'),
+            reservados_real=F('reservados'),
+            disponible_real=Greatest(F('ejemplares') - F('prestados') - F('reservados'), 0),
+        )
+        .order_by(*ORDENES_INVENTARIO.get(orden, ORDENES_INVENTARIO['titulo']))
+    )
+
+
+# ============================
+# Verificación y reconstrucción
+# ============================
+def _totales_reales():
+    return {
+        'total_prestamos': Prestamo.objects.count(),
+        'prestamos_activos': Prestamo.objects.filter(devuelto=False).count(),
+        'total_reservas': Reserva.objects.count(),
+        'reservas_activas': Reserva.objects.filter(estado__in=Reserva.ESTADOS_ACTIVOS).count(),
+    }
+
+
+def detectar_desfases():
+    """
+    Compara los contadores persistidos con los valores reales.
+    Devuelve una lista de diccionarios con cada desfase encontrado.
+    """
+    desfases = []
+    libros = (
+        Libro.objects.with_live_availability()
+        .exclude(prestados=F('prestados_activos'), reservados=F('reservados_activos'))
+        .values('id', 'titulo', 'prestados', 'prestados_activos', 'reservados', 'reservados_activos')
+    )
+    for fila in libros.iterator():
+        desfases.append({
+            'libro_id': fila['id'],
+            'titulo': fila['titulo'],
+            'prestados': (fila['prestados'], fila['prestados_activos']),
+            'reservados': (fila['reservados'], fila['reservados_activos']),
+        })
+
+    reales = _totales_reales()
+    guardado = InventarioGlobal.objects.filter(id=INVENTARIO_ID).values(*reales).first() or {}
+    for campo, real in reales.items():
+        if guardado.get(campo) != real:
+            desfases.append({'global': campo, 'valor': (guardado.get(campo), real)})
+    return desfases
+
+
+def recalcular_global():
+    inventario, _ = InventarioGlobal.objects.update_or_create(
+        id=INVENTARIO_ID, defaults=_totales_reales()
+    )
+    return inventario
+
+
+def recalcular_inventario():
+    """
+    Reconstruye todos los contadores a partir de préstamos y reservas.
+    Devuelve cuántos libros tenían el contador desfasado.
+    """
+    libros = (
+        Libro.objects.with_live_availability()
+        .exclude(prestados=F('prestados_activos'), reservados=F('reservados_activos'))
+        .values('id', 'prestados_activos', 'reservados_activos')
+    )
+    corregidos = 0
+    for fila in libros.iterator():
+        Libro.objects.filter(id=fila['id']).update(
+            prestados=fila['prestados_activos'],
+            reservados=fila['reservados_activos'],
+        )
+        corregidos += 1
+    recalcular_global()
+    return corregidos
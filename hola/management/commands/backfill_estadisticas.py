@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hola import estadisticas
+
+
+class Command(BaseCommand):
+    help = "Llena las tablas de estadísticas acumuladas (por día y por libro) a partir del historial."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            dias, libros = estadisticas.reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas reconstruidas ✅ ({dias} día(s), {libros} libro(s))"
+        ))
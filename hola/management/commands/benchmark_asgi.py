@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from asgiref.sync import ThreadSensitiveContext
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from hola import datos_sinteticos, multas
+from hola.models import Multa, Usuario
+
+VISTAS = ('libros', 'estadisticas', 'multas', 'notificacion')
+
+
+def _resumir(resultados, segundos):
+    tiempos = sorted(ms for ms, _ in resultados)
+    cuantiles = statistics.quantiles(tiempos, n=100) if len(tiempos) >= 2 else tiempos * 99
+    return {
+        'peticiones': len(resultados),
+        'segundos': round(segundos, 2),
+        'peticiones_por_segundo': round(len(resultados) / segundos, 1) if segundos else None,
+        'p50_ms': round(cuantiles[49], 1),
+        'p95_ms': round(cuantiles[94], 1),
+        'max_ms': round(tiempos[-1], 1),
+        'errores': sum(1 for _, estado in resultados if estado is None or estado >= 500),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la concurrencia de las vistas asíncronas (búsqueda de libros, estadísticas, "
+        "multas y notificación) atendidas como ASGI (event loop, un hilo por petición solo "
+        "para el ORM) frente a WSGI (un hilo bloqueado por petición, como gunicorn --threads). "
+        "Trabaja sobre una base de datos de prueba con datos sintéticos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=400, help="Peticiones por modo.")
+        parser.add_argument('--concurrencia', type=int, default=50, help="Peticiones simultáneas en ASGI.")
+        parser.add_argument('--hilos', type=int, default=8, help="Hilos del servidor WSGI simulado.")
+        parser.add_argument('--vistas', nargs='+', choices=VISTAS, default=list(VISTAS))
+        parser.add_argument('--libros', type=int, default=5_000)
+        parser.add_argument('--usuarios', type=int, default=2_000)
+        parser.add_argument('--prestamos', type=int, default=50_000)
+        parser.add_argument('--salida', help="Guardar los resultados en este archivo JSON.")
+
+    def _urls(self, vistas, total):
+        multa_ids = cycle(Multa.objects.values_list('id', flat=True)[:500]) if 'notificacion' in vistas else None
+        urls = {
+            'libros': lambda: reverse('libros') + '?q=soledad',
+            'estadisticas': lambda: reverse('estadisticas'),
+            'multas': lambda: reverse('listar_multas_notificacion'),
+            'notificacion': lambda: reverse('enviar_notificacion_multa', args=[next(multa_ids)]),
+        }
+        return [urls[nombre]() for nombre in islice(cycle(vistas), total)]
+
+    # ============================
+    # WSGI: un hilo ocupado durante toda la petición
+    # ============================
+    def _wsgi(self, urls, hilos, user):
+        locales = threading.local()
+
+        def peticion(url):
+            cliente = getattr(locales, 'cliente', None)
+            if cliente is None:
+                cliente = locales.cliente = Client()
+                cliente.force_login(user)
+            inicio = time.perf_counter()
+            try:
+                estado = cliente.get(url).status_code
+            except Exception:
+                estado = None
+            return (time.perf_counter() - inicio) * 1000, estado
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+            resultados = list(ejecutor.map(peticion, urls))
+        return _resumir(resultados, time.perf_counter() - inicio)
+
+    # ============================
+    # ASGI: event loop + vistas async
+    # ============================
+    async def _asgi(self, urls, concurrencia, user):
+        cliente = AsyncClient()
+        await cliente.aforce_login(user)
+        semaforo = asyncio.Semaphore(concurrencia)
+
+        async def peticion(url):
+            async with semaforo:
+                inicio = time.perf_counter()
+                try:
+                    # Igual que ASGIHandler: cada petición con su propio hilo para el código síncrono
+                    async with ThreadSensitiveContext():
+                        estado = (await cliente.get(url)).status_code
+                except Exception:
+                    estado = None
+                return (time.perf_counter() - inicio) * 1000, estado
+
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(peticion(url) for url in urls))
+        return _resumir(resultados, time.perf_counter() - inicio)
+
+    def handle(self, *args, **opciones):
+        with tempfile.TemporaryDirectory() as carpeta, \
+                datos_sinteticos.base_de_prueba(os.path.join(carpeta, 'benchmark_asgi.sqlite3')):
+            if connection.vendor == 'sqlite':
+                # Como en producción (settings.SQLITE_PRAGMAS_PRODUCCION): lectores sin bloquear al escritor
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode=WAL')
+            self.stdout.write("Sembrando datos sintéticos…")
+            datos_sinteticos.sembrar(
+                libros=opciones['libros'], usuarios=opciones['usuarios'],
+                prestamos=opciones['prestamos'], reservas=opciones['prestamos'] // 10,
+            )
+            multas.generar_multas()
+            user = User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+            Usuario.objects.create(user=user, nombre='Benchmark', apellido='', email=user.email)
+            urls = self._urls(opciones['vistas'], opciones['peticiones'])
+
+            resultados = {}
+            self.stdout.write(f"WSGI ({opciones['hilos']} hilos)…")
+            resultados['wsgi'] = self._wsgi(urls, opciones['hilos'], user)
+            self.stdout.write(f"ASGI (concurrencia {opciones['concurrencia']})…")
+            resultados['asgi'] = asyncio.run(self._asgi(urls, opciones['concurrencia'], user))
+
+        for modo, r in resultados.items():
+            self.stdout.write(
+                f"  {modo}: {r['peticiones_por_segundo']} pet/s p50={r['p50_ms']}ms "
+                f"p95={r['p95_ms']}ms errores={r['errores']}"
+            )
+        if opciones['salida']:
+            informe = {
+                'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'vistas': opciones['vistas'],
+                'hilos_wsgi': opciones['hilos'],
+                'concurrencia_asgi': opciones['concurrencia'],
+                'modos': resultados,
+            }
+            with open(opciones['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Resultados guardados en {opciones['salida']}")
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado ✅"))
@@ -0,0 +1,173 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+
+from hola import inventario
+from hola.models import Autor, Libro, Prestamo, Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la concurrencia de escritura de SQLite con la configuración por "
+        "defecto y con el perfil de producción (WAL, busy_timeout, BEGIN IMMEDIATE…). "
+        "Cada perfil usa una base de datos temporal nueva; la configurada no se toca."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=8, help="Hilos que prestan y devuelven libros.")
+        parser.add_argument('--lectores', type=int, default=4, help="Hilos que leen el catálogo.")
+        parser.add_argument('--segundos', type=float, default=5.0, help="Duración de cada prueba.")
+        parser.add_argument('--libros', type=int, default=20)
+        parser.add_argument('--salida', help="Guardar los resultados en este archivo JSON.")
+
+    # ============================
+    # Base de datos temporal
+    # ============================
+    def _usar_base(self, ruta, opciones):
+        # Todos los hilos crean su conexión a partir de este diccionario
+        connections.close_all()
+        ajustes = connections.settings['default']
+        ajustes['NAME'] = ruta
+        ajustes['OPTIONS'] = dict(opciones)
+
+    def _preparar(self, libros):
+        call_command('migrate', verbosity=0, interactive=False)
+        user = User.objects.create(username='benchmark-escrituras')
+        usuario = Usuario.objects.create(user=user, nombre='Benchmark', apellido='', email='benchmark@example.com')
+        autor = Autor.objects.create(nombre='Benchmark')
+        ids = [
+            Libro.objects.create(
+                titulo=f'Benchmark {i}', isbn=f'{9770000000000 + i}', autor=autor,
+                fecha_publicacion=date.today(), paginas=1, ejemplares=1000,
+            ).id
+            for i in range(libros)
+        ]
+        return usuario, ids
+
+    # ============================
+    # Hilos de trabajo
+    # ============================
+    def _escritor(self, usuario, libro_ids, fin, resultado):
+        latencias, errores = [], 0
+        i = 0
+        try:
+            while time.monotonic() < fin:
+                libro_id = libro_ids[i % len(libro_ids)]
+                i += 1
+                inicio = time.perf_counter()
+                try:
+                    prestamo = Prestamo(usuario=usuario, libro_id=libro_id, fecha_limite=date.today())
+                    inventario.realizar_prestamo(prestamo)
+                    with transaction.atomic():
+                        Prestamo.objects.filter(pk=prestamo.pk).update(devuelto=True, fecha_devolucion=date.today())
+                        inventario.registrar_devolucion(libro_id)
+                except (OperationalError, inventario.LibroNoDisponible):
+                    errores += 1
+                    continue
+                latencias.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            connection.close()
+            with resultado['cerrojo']:
+                resultado['escrituras'].extend(latencias)
+                resultado['errores_escritura'] += errores
+
+    def _lector(self, fin, resultado):
+        latencias, errores = [], 0
+        try:
+            while time.monotonic() < fin:
+                inicio = time.perf_counter()
+                try:
+                    list(Libro.objects.with_availability().values('id', 'disponibles')[:50])
+                    Prestamo.objects.filter(devuelto=False).count()
+                except OperationalError:
+                    errores += 1
+                    continue
+                latencias.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            connection.close()
+            with resultado['cerrojo']:
+                resultado['lecturas'].extend(latencias)
+                resultado['errores_lectura'] += errores
+
+    def _medir(self, opciones):
+        usuario, libro_ids = self._preparar(opciones['libros'])
+        resultado = {
+            'cerrojo': threading.Lock(), 'escrituras': [], 'lecturas': [],
+            'errores_escritura': 0, 'errores_lectura': 0,
+        }
+        fin = time.monotonic() + opciones['segundos']
+        hilos = [
+            threading.Thread(target=self._escritor, args=(usuario, libro_ids, fin, resultado))
+            for _ in range(opciones['escritores'])
+        ] + [
+            threading.Thread(target=self._lector, args=(fin, resultado))
+            for _ in range(opciones['lectores'])
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        def p95(valores):
+            return round(statistics.quantiles(valores, n=20)[-1], 2) if len(valores) >= 2 else None
+
+        segundos = opciones['segundos']
+        return {
+            'escrituras_por_segundo': round(len(resultado['escrituras']) / segundos, 1),
+            'escritura_p95_ms': p95(resultado['escrituras']),
+            'errores_escritura': resultado['errores_escritura'],
+            'lecturas_por_segundo': round(len(resultado['lecturas']) / segundos, 1),
+            'lectura_p95_ms': p95(resultado['lecturas']),
+            'errores_lectura': resultado['errores_lectura'],
+        }
+
+    def handle(self, *args, **opciones):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Este benchmark solo aplica a SQLite.")
+
+        perfiles = {
+            'por_defecto': {},
+            'produccion': settings.SQLITE_OPCIONES_PRODUCCION,
+        }
+        ajustes = connections.settings['default']
+        originales = {'NAME': ajustes['NAME'], 'OPTIONS': ajustes.get('OPTIONS', {})}
+        resultados = {}
+        try:
+            for nombre, opciones_bd in perfiles.items():
+                with tempfile.TemporaryDirectory() as carpeta:
+                    self._usar_base(os.path.join(carpeta, 'benchmark.sqlite3'), opciones_bd)
+                    self.stdout.write(f"Perfil {nombre}…")
+                    resultados[nombre] = self._medir(opciones)
+                    connections.close_all()
+                r = resultados[nombre]
+                self.stdout.write(
+                    f"  escrituras: {r['escrituras_por_segundo']}/s p95={r['escritura_p95_ms']}ms "
+                    f"errores={r['errores_escritura']} | lecturas: {r['lecturas_por_segundo']}/s "
+                    f"p95={r['lectura_p95_ms']}ms errores={r['errores_lectura']}"
+                )
+        finally:
+            connections.close_all()
+            ajustes.update(originales)
+
+        if opciones['salida']:
+            informe = {
+                'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'escritores': opciones['escritores'],
+                'lectores': opciones['lectores'],
+                'segundos': opciones['segundos'],
+                'perfiles': resultados,
+            }
+            with open(opciones['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Resultados guardados en {opciones['salida']}")
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado ✅"))
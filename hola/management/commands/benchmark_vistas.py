@@ -0,0 +1,185 @@
+import json
+import platform
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import date
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hola import datos_sinteticos
+from hola.models import Libro, Prestamo, Usuario
+
+VISTAS = (
+    'libros_view', 'inventario_sgb', 'estadisticas', 'listaprestamos',
+    'reservas', 'prestamos_get', 'prestamos_post', 'devolver_prestamo',
+)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _percentil(valores, p):
+    # Percentil por rango más cercano sobre valores ya ordenados
+    indice = max(int(round(p / 100 * len(valores) + 0.5)) - 1, 0)
+    return valores[min(indice, len(valores) - 1)]
+
+
+def _resumir(tiempos, consultas, estados):
+    tiempos = sorted(tiempos)
+    resumen = {
+        'repeticiones': len(tiempos),
+        'media_ms': round(statistics.fmean(tiempos), 2),
+        'min_ms': round(tiempos[0], 2),
+        'max_ms': round(tiempos[-1], 2),
+        'consultas_min': min(consultas),
+        'consultas_max': max(consultas),
+        'estados': sorted(set(estados)),
+    }
+    for p in PERCENTILES:
+        resumen[f'p{p}_ms'] = round(_percentil(tiempos, p), 2)
+    return resumen
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de las vistas principales sobre un conjunto de datos sintético. "
+        "Crea una base de datos de prueba, la llena con bulk_create, mide latencia "
+        "(percentiles) y número de consultas SQL por vista y escribe el resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--libros', type=int, default=100_000)
+        parser.add_argument('--usuarios', type=int, default=50_000)
+        parser.add_argument('--prestamos', type=int, default=1_000_000)
+        parser.add_argument('--reservas', type=int, default=200_000)
+        parser.add_argument('--repeticiones', type=int, default=10, help="Peticiones medidas por vista.")
+        parser.add_argument('--calentamiento', type=int, default=1, help="Peticiones no medidas por vista.")
+        parser.add_argument('--vistas', nargs='+', choices=VISTAS, default=list(VISTAS))
+        parser.add_argument('--salida', default='benchmark_vistas.json', help="Archivo JSON de resultados.")
+        parser.add_argument('--comparar', help="JSON de una ejecución anterior para mostrar diferencias.")
+        parser.add_argument('--semilla', type=int, default=27)
+
+    # ============================
+    # Peticiones por vista
+    # ============================
+    def _peticiones(self, cliente, nombre, usuario):
+        """
+        Devuelve una función sin argumentos que hace una petición a la vista.
+        Las vistas que escriben consumen un préstamo/libro distinto en cada llamada.
+        """
+        if nombre == 'prestamos_post':
+            libros = Libro.objects.disponibles().values_list('id', flat=True).iterator()
+            fecha = date.today().isoformat()
+            return lambda: cliente.post(
+                reverse('prestamos'),
+                {'usuario': usuario.id, 'libro': next(libros), 'fecha_limite': fecha},
+            )
+        if nombre == 'devolver_prestamo':
+            pendientes = Prestamo.objects.filter(devuelto=False).values_list('id', flat=True).iterator()
+            return lambda: cliente.get(reverse('devolver_prestamo', args=[next(pendientes)]))
+
+        url = {
+            'libros_view': reverse('libros'),
+            'inventario_sgb': reverse('inventario_sgb'),
+            'estadisticas': reverse('estadisticas'),
+            'listaprestamos': reverse('listaprestamos'),
+            'reservas': reverse('reservas'),
+            'prestamos_get': reverse('prestamos'),
+        }[nombre]
+        return lambda: cliente.get(url)
+
+    def _medir(self, peticion, repeticiones, calentamiento):
+        tiempos, consultas, estados = [], [], []
+        for i in range(calentamiento + repeticiones):
+            # Se cuentan las consultas de todos los alias (incluido el de lectura)
+            with ExitStack() as pila:
+                capturas = [pila.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                inicio = time.perf_counter()
+                respuesta = peticion()
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+                milisegundos = (time.perf_counter() - inicio) * 1000
+            if i >= calentamiento:
+                tiempos.append(milisegundos)
+                consultas.append(sum(len(captura) for captura in capturas))
+                estados.append(respuesta.status_code)
+        return _resumir(tiempos, consultas, estados)
+
+    def _comparar(self, anterior, resultados):
+        self.stdout.write("\nDiferencia con la ejecución anterior (p95 / consultas):")
+        for nombre, actual in resultados.items():
+            previo = anterior.get('vistas', {}).get(nombre)
+            if not previo:
+                continue
+            cambio = (actual['p95_ms'] - previo['p95_ms']) / previo['p95_ms'] * 100 if previo['p95_ms'] else 0
+            estilo = self.style.ERROR if cambio > 10 else self.style.SUCCESS
+            self.stdout.write(estilo(
+                f"  {nombre:<18} {previo['p95_ms']:>9.1f} → {actual['p95_ms']:>9.1f} ms ({cambio:+.0f}%)  "
+                f"{previo['consultas_max']} → {actual['consultas_max']} consultas"
+            ))
+
+    def handle(self, *args, **opciones):
+        anterior = None
+        if opciones['comparar']:
+            try:
+                with open(opciones['comparar'], encoding='utf-8') as archivo:
+                    anterior = json.load(archivo)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"No se pudo leer {opciones['comparar']}: {error}")
+
+        # Nunca se toca la base de datos configurada: se trabaja sobre una de prueba
+        with datos_sinteticos.base_de_prueba():
+            self.stdout.write("Sembrando datos sintéticos…")
+            inicio = time.perf_counter()
+            datos_sinteticos.sembrar(
+                libros=opciones['libros'], usuarios=opciones['usuarios'],
+                prestamos=opciones['prestamos'], reservas=opciones['reservas'],
+                semilla=opciones['semilla'], progreso=lambda mensaje: self.stdout.write(f"  {mensaje}"),
+            )
+            segundos_siembra = time.perf_counter() - inicio
+
+            user = User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+            usuario = Usuario.objects.create(user=user, nombre='Benchmark', apellido='', email=user.email)
+            cliente = Client()
+            cliente.force_login(user)
+
+            resultados = {}
+            for nombre in opciones['vistas']:
+                self.stdout.write(f"Midiendo {nombre}…")
+                peticion = self._peticiones(cliente, nombre, usuario)
+                resultados[nombre] = self._medir(peticion, opciones['repeticiones'], opciones['calentamiento'])
+                r = resultados[nombre]
+                self.stdout.write(
+                    f"  p50={r['p50_ms']:.1f}ms p95={r['p95_ms']:.1f}ms p99={r['p99_ms']:.1f}ms "
+                    f"consultas={r['consultas_max']} estados={r['estados']}"
+                )
+
+        informe = {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'motor': connection.vendor,
+            },
+            'datos': {
+                'libros': opciones['libros'],
+                'usuarios': opciones['usuarios'],
+                'prestamos': opciones['prestamos'],
+                'reservas': opciones['reservas'],
+                'semilla': opciones['semilla'],
+                'segundos_siembra': round(segundos_siembra, 1),
+            },
+            'repeticiones': opciones['repeticiones'],
+            'vistas': resultados,
+        }
+        with open(opciones['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {opciones['salida']} ✅"))
+
+        if anterior:
+            self._comparar(anterior, resultados)
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hola.correo import MAX_INTENTOS, TAMANO_LOTE, procesar_cola
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de la bandeja de salida por lotes, "
+        "reutilizando una conexión SMTP por lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Correos por lote.")
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS,
+                            help="Intentos antes de marcar un correo como fallido.")
+        parser.add_argument('--backend', default=None,
+                            help="Backend de correo a usar (por defecto EMAIL_BACKEND).")
+        parser.add_argument('--continuo', action='store_true',
+                            help="Sigue vaciando la cola indefinidamente.")
+        parser.add_argument('--pausa', type=float, default=5.0,
+                            help="Segundos de espera cuando la cola está vacía (modo continuo).")
+
+    def handle(self, *args, **options):
+        total_enviados = total_fallidos = 0
+        while True:
+            try:
+                enviados, fallidos = procesar_cola(
+                    lote=options['lote'],
+                    max_intentos=options['max_intentos'],
+                    backend=options['backend'],
+                )
+            except Exception as error:
+                # No se pudo abrir la conexión: se reintenta en la próxima vuelta
+                self.stderr.write(f"Error de conexión: {error}")
+                enviados = fallidos = 0
+                if not options['continuo']:
+                    break
+            total_enviados += enviados
+            total_fallidos += fallidos
+            if enviados or fallidos:
+                self.stdout.write(f"  lote: {enviados} enviado(s), {fallidos} con error")
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Correos enviados ✅ ({total_enviados} enviados, {total_fallidos} con error)"
+        ))
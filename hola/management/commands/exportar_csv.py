@@ -0,0 +1,64 @@
+import argparse
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from hola import exports, inventario
+from hola.models import Reserva
+from hola.routers import leyendo_de_replica
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida: {valor} (usa AAAA-MM-DD)")
+
+
+def _si_no(valor):
+    return None if valor is None else valor == 'si'
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta préstamos, reservas, multas o el inventario a CSV en streaming "
+        "(memoria constante), leyendo de la base de solo lectura si está configurada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=['prestamos', 'reservas', 'multas', 'inventario'])
+        parser.add_argument('--salida', help="Archivo de destino (por defecto, la salida estándar).")
+        parser.add_argument('--desde', type=_fecha)
+        parser.add_argument('--hasta', type=_fecha)
+        parser.add_argument('--usuario', type=int, help="ID de usuario.")
+        parser.add_argument('--devuelto', choices=['si', 'no'], help="Solo préstamos.")
+        parser.add_argument('--pagada', choices=['si', 'no'], help="Solo multas.")
+        parser.add_argument('--estado', choices=[valor for valor, _ in Reserva.ESTADO_CHOICES], help="Solo reservas.")
+        parser.add_argument('--orden', choices=list(inventario.ORDENES_INVENTARIO), default='titulo', help="Solo inventario.")
+
+    def _exportacion(self, opciones):
+        tipo = opciones['tipo']
+        if tipo == 'inventario':
+            return exports.exportar_inventario(opciones['orden'])
+        filtros = {'desde': opciones['desde'], 'hasta': opciones['hasta'], 'usuario': opciones['usuario']}
+        if tipo == 'prestamos':
+            return exports.exportar_prestamos(devuelto=_si_no(opciones['devuelto']), **filtros)
+        if tipo == 'reservas':
+            return exports.exportar_reservas(estado=opciones['estado'], **filtros)
+        return exports.exportar_multas(pagada=_si_no(opciones['pagada']), **filtros)
+
+    def handle(self, *args, **opciones):
+        salida = open(opciones['salida'], 'w', encoding='utf-8', newline='') if opciones['salida'] else sys.stdout
+        filas = 0
+        try:
+            with leyendo_de_replica():
+                _, encabezados, datos = self._exportacion(opciones)
+                for linea in exports.filas_csv(encabezados, datos):
+                    salida.write(linea)
+                    filas += 1
+        finally:
+            if opciones['salida']:
+                salida.close()
+        if opciones['salida']:
+            self.stdout.write(self.style.SUCCESS(f"{filas - 1} fila(s) exportadas a {opciones['salida']} ✅"))
@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from hola.multas import TAMANO_LOTE, generar_multas
+
+
+class Command(BaseCommand):
+    help = "Genera o actualiza las multas y notificaciones de los préstamos vencidos, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Préstamos por rango de id.")
+        parser.add_argument('--fecha', type=date.fromisoformat, default=None,
+                            help="Fecha de referencia (AAAA-MM-DD); por defecto hoy.")
+        parser.add_argument('--dry-run', action='store_true', help="Calcula sin guardar nada.")
+
+    def handle(self, *args, **options):
+        resultado = generar_multas(
+            hoy=options['fecha'], tamano_lote=options['lote'], dry_run=options['dry_run'],
+        )
+        prefijo = "[dry-run] " if resultado['dry_run'] else ""
+        self.stdout.write(
+            f"{prefijo}{resultado['prestamos_vencidos']} préstamo(s) vencido(s) en {resultado['lotes']} lote(s) "
+            f"— {resultado['segundos']}s"
+        )
+        self.stdout.write(
+            f"  multas: {resultado['multas_creadas']} nuevas, {resultado['multas_actualizadas']} actualizadas"
+        )
+        self.stdout.write(
+            f"  notificaciones: {resultado['notificaciones_creadas']} nuevas, "
+            f"{resultado['notificaciones_actualizadas']} actualizadas"
+        )
+        if resultado['segundos'] and resultado['prestamos_vencidos']:
+            ritmo = resultado['prestamos_vencidos'] / resultado['segundos']
+            self.stdout.write(f"  ritmo: {ritmo:.0f} préstamos/s")
+        self.stdout.write(self.style.SUCCESS("Multas generadas ✅"))
@@ -0,0 +1,77 @@
+import os
+
+from django.contrib.staticfiles import finders
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from hola import imagenes
+from hola.models import Libro, Perfil
+
+# Portadas que la galería asignaba a mano por título (archivos en static/)
+PORTADAS_ESTATICAS = {
+    'Cien años de soledad': 'hola/js/CienAñosSoledad.png',
+    'La casa de los espíritus': 'hola/js/CasaDeEspiritus.png',
+    'La ciudad y los perros': 'hola/js/LaciudadYLosperros.png',
+    'La poesía completa de Pablo Neruda': 'hola/js/PoesiaCompleta.png',
+    'La tierra de la alborada': 'hola/js/TierraDeAlborada.png',
+    'Don Quijote de la Mancha': 'hola/js/DonQuijoteDeLaMancha.png',
+    'El principito': 'hola/js/ELprincipito.png',
+    'La mañosa': 'hola/js/LaMañosa.png',
+    'Cuentos de la selva': 'hola/js/CuentosDeLaselva.png',
+    'El Reino del Revés': 'hola/ElReinoDelReves.png',
+    'La invención de Morel': 'hola/js/LaInvencionDelMorel.png',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las variantes WebP/JPEG de portadas y avatares que aún no las tienen "
+        "(pasada en segundo plano para imágenes subidas antes de existir el proceso)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', choices=['portada', 'avatar', 'todos'], default='todos')
+        parser.add_argument('--regenerar', action='store_true', help="Vuelve a generar aunque ya existan.")
+        parser.add_argument(
+            '--importar-portadas', action='store_true',
+            help="Copia a Libro.portada las portadas estáticas que usaba la galería.",
+        )
+
+    def _importar_portadas(self):
+        importadas = 0
+        for libro in Libro.objects.filter(portada='', titulo__in=PORTADAS_ESTATICAS):
+            ruta = finders.find(PORTADAS_ESTATICAS[libro.titulo])
+            if not ruta:
+                self.stdout.write(self.style.WARNING(f"  No se encontró {PORTADAS_ESTATICAS[libro.titulo]}"))
+                continue
+            with open(ruta, 'rb') as archivo:
+                # save() guarda el libro y la señal genera las variantes
+                libro.portada.save(os.path.basename(ruta), File(archivo))
+            importadas += 1
+        self.stdout.write(f"  {importadas} portada(s) importadas")
+
+    def _procesar(self, objetos, campo, tipo, regenerar):
+        generadas = fallidas = 0
+        vistos = set()
+        for objeto in objetos.iterator():
+            archivo = getattr(objeto, campo)
+            # Varios registros pueden compartir el mismo archivo
+            if archivo.name in vistos or (not regenerar and imagenes.tiene_variantes(archivo, tipo)):
+                continue
+            vistos.add(archivo.name)
+            if imagenes.generar_variantes(archivo, tipo):
+                generadas += 1
+            else:
+                fallidas += 1
+        self.stdout.write(f"  {tipo}: {generadas} generada(s), {fallidas} con error")
+
+    def handle(self, *args, **opciones):
+        if opciones['importar_portadas']:
+            self._importar_portadas()
+        if opciones['tipo'] in ('portada', 'todos'):
+            libros = Libro.objects.exclude(portada='').only('id', 'portada')
+            self._procesar(libros, 'portada', 'portada', opciones['regenerar'])
+        if opciones['tipo'] in ('avatar', 'todos'):
+            perfiles = Perfil.objects.exclude(avatar='').only('id', 'avatar')
+            self._procesar(perfiles, 'avatar', 'avatar', opciones['regenerar'])
+        self.stdout.write(self.style.SUCCESS("Variantes de imágenes listas ✅"))
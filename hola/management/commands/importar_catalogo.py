@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hola import cache_http, importacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa el catálogo de un proveedor desde un CSV o JSON Lines (titulo, isbn, autor, "
+        "categoria, editorial, fecha_publicacion, paginas, ejemplares, estado, etiquetas "
+        "separadas por '|'). Lee el archivo en streaming y crea los libros por lotes; si se "
+        "interrumpe, al volver a ejecutarlo continúa desde el último lote confirmado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=importacion.LOTE, help="Filas por transacción.")
+        parser.add_argument(
+            '--estado',
+            help="Archivo de progreso para reanudar (por defecto <archivo>.progreso).",
+        )
+        parser.add_argument('--reiniciar', action='store_true', help="Ignora el progreso guardado.")
+        parser.add_argument('--rechazos', help="Guardar las filas rechazadas (con el motivo) en este CSV.")
+        parser.add_argument(
+            '--sin-digito-control', action='store_true',
+            help="Acepta ISBN con el dígito de control incorrecto (solo se exige el formato).",
+        )
+
+    def _leer_estado(self, ruta_estado, archivo):
+        try:
+            with open(ruta_estado, encoding='utf-8') as entrada:
+                estado = json.load(entrada)
+        except FileNotFoundError:
+            return None
+        if estado.get('archivo') != os.path.abspath(archivo) or estado.get('tamano') != os.path.getsize(archivo):
+            raise CommandError(
+                f"{ruta_estado} corresponde a otro archivo o el archivo cambió; usa --reiniciar."
+            )
+        return estado
+
+    def _guardar_estado(self, ruta_estado, archivo, importador):
+        estado = {
+            'archivo': os.path.abspath(archivo),
+            'tamano': os.path.getsize(archivo),
+            'procesadas': importador.procesadas,
+            'creados': importador.creados,
+            'existentes': importador.existentes,
+            'motivos': dict(importador.motivos),
+        }
+        temporal = ruta_estado + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as salida:
+            json.dump(estado, salida, ensure_ascii=False)
+        os.replace(temporal, ruta_estado)
+
+    def handle(self, *args, **opciones):
+        archivo = opciones['archivo']
+        if not os.path.isfile(archivo):
+            raise CommandError(f"No existe {archivo}")
+        ruta_estado = opciones['estado'] or archivo + '.progreso'
+        estado = None if opciones['reiniciar'] else self._leer_estado(ruta_estado, archivo)
+
+        salida_rechazos = escritor_rechazos = None
+        if opciones['rechazos']:
+            # Al reanudar se añaden a los rechazos de la ejecución anterior
+            nuevo = estado is None or not os.path.exists(opciones['rechazos'])
+            salida_rechazos = open(opciones['rechazos'], 'a' if not nuevo else 'w', encoding='utf-8', newline='')
+            escritor_rechazos = csv.writer(salida_rechazos)
+            if nuevo:
+                escritor_rechazos.writerow(['fila', 'motivo', 'isbn', 'titulo'])
+
+        def rechazo(numero, fila, motivo):
+            if escritor_rechazos:
+                escritor_rechazos.writerow([numero, motivo, fila.get('isbn', ''), fila.get('titulo', '')])
+
+        def lote_confirmado(importador):
+            self._guardar_estado(ruta_estado, archivo, importador)
+            if salida_rechazos:
+                salida_rechazos.flush()
+            self.stdout.write(
+                f"  {importador.procesadas} filas: {importador.creados} creados, "
+                f"{importador.existentes} ya existían, {importador.rechazados} rechazados "
+                f"({importador.filas_por_segundo:,.0f} filas/s)"
+            )
+
+        self.stdout.write("Cargando autores, editoriales, categorías y etiquetas…")
+        importador = importacion.Importador(
+            lote=opciones['lote'],
+            verificar_digito=not opciones['sin_digito_control'],
+            rechazo=rechazo,
+            lote_confirmado=lote_confirmado,
+        )
+        desde = 0
+        if estado:
+            desde = estado['procesadas']
+            importador.creados = estado['creados']
+            importador.existentes = estado['existentes']
+            importador.motivos.update(estado['motivos'])
+            self.stdout.write(f"Reanudando después de la fila {desde}…")
+
+        try:
+            importador.importar(importacion.leer_filas(archivo), desde=desde)
+        except (ValueError, UnicodeDecodeError) as error:
+            raise CommandError(
+                f"Archivo ilegible después de la fila {importador.procesadas}: {error}. "
+                f"Corrígelo y vuelve a ejecutar con --reiniciar (los ISBN ya importados se omiten)."
+            )
+        finally:
+            if salida_rechazos:
+                salida_rechazos.close()
+            if importador.creados:
+                # bulk_create no dispara las señales que invalidan las páginas del catálogo
+                cache_http.invalidar_catalogo()
+
+        if os.path.exists(ruta_estado):
+            os.remove(ruta_estado)
+        for motivo, total in importador.motivos.most_common():
+            self.stdout.write(f"  rechazadas por {motivo}: {total}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada ✅ ({importador.creados} libros creados, "
+            f"{importador.existentes} ya existían, {importador.rechazados} filas rechazadas)"
+        ))
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hola.estaticos import archivos_estaticos, nombres_con_hash
+
+
+def _kb(bytes_):
+    return f"{bytes_ / 1024:,.1f} KB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Informe de STATIC_ROOT tras collectstatic: los archivos más pesados, "
+        "cuáles tienen hash (caché inmutable) y los bytes que ahorran las copias .gz."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help="Cantidad de archivos a listar.")
+
+    def handle(self, *args, **opciones):
+        archivos = archivos_estaticos(settings.STATIC_ROOT)
+        if not archivos:
+            raise CommandError(f"{settings.STATIC_ROOT} está vacío: ejecuta primero collectstatic.")
+
+        con_hash = nombres_con_hash(settings.STATIC_ROOT)
+        if con_hash:
+            # Los originales sin hash también se copian; se cuentan solo las versiones servidas
+            archivos = {nombre: datos for nombre, datos in archivos.items() if nombre in con_hash}
+        else:
+            self.stdout.write(self.style.WARNING(
+                "No hay manifiesto (staticfiles.json): los archivos no tienen hash y no se pueden cachear a largo plazo."
+            ))
+
+        total = sum(tamano for _, tamano, _ in archivos.values())
+        comprimibles = [(tamano, tamano_gzip) for _, tamano, tamano_gzip in archivos.values() if tamano_gzip is not None]
+        ahorro = sum(tamano - tamano_gzip for tamano, tamano_gzip in comprimibles)
+
+        self.stdout.write(f"{'Archivo':<60} {'Tamaño':>12} {'gzip':>12}")
+        mayores = sorted(archivos.items(), key=lambda item: item[1][1], reverse=True)[:opciones['top']]
+        for nombre, (_, tamano, tamano_gzip) in mayores:
+            self.stdout.write(
+                f"{nombre[-60:]:<60} {_kb(tamano):>12} {_kb(tamano_gzip) if tamano_gzip is not None else '—':>12}"
+            )
+
+        self.stdout.write(
+            f"\n{len(archivos)} archivos, {_kb(total)} en total; "
+            f"{len(comprimibles)} con copia .gz que ahorran {_kb(ahorro)} por descarga completa"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Transferencia con gzip: {_kb(total - ahorro)} ({ahorro / total * 100 if total else 0:.0f}% menos) ✅"
+        ))
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento de la base de datos SQLite: ANALYZE, PRAGMA optimize, "
+        "vacuum incremental y checkpoint del WAL. Pensado para ejecutarse a diario (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sin-analyze', action='store_true', help="Solo PRAGMA optimize, sin ANALYZE completo.")
+        parser.add_argument(
+            '--paginas', type=int, default=0,
+            help="Páginas libres a devolver con incremental_vacuum (0 = todas).",
+        )
+        parser.add_argument(
+            '--activar-vacuum-incremental', action='store_true',
+            help="Cambia auto_vacuum a INCREMENTAL y ejecuta un VACUUM completo (bloquea la base).",
+        )
+
+    def _pragma(self, cursor, pragma):
+        cursor.execute(f'PRAGMA {pragma}')
+        fila = cursor.fetchone()
+        return fila[0] if fila else None
+
+    def _paso(self, cursor, sentencia, nombre=None):
+        inicio = time.perf_counter()
+        cursor.execute(sentencia)
+        filas = cursor.fetchall()
+        self.stdout.write(f"  {nombre or sentencia}: {time.perf_counter() - inicio:.2f}s")
+        return filas
+
+    def handle(self, *args, **opciones):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Este comando solo aplica a SQLite.")
+
+        with connection.cursor() as cursor:
+            tamano_pagina = self._pragma(cursor, 'page_size')
+            paginas_antes = self._pragma(cursor, 'page_count')
+            libres_antes = self._pragma(cursor, 'freelist_count')
+            diario = self._pragma(cursor, 'journal_mode')
+            auto_vacuum = self._pragma(cursor, 'auto_vacuum')  # 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+            self.stdout.write(
+                f"Base de datos: {paginas_antes * tamano_pagina / 1024 / 1024:.1f} MB, "
+                f"{libres_antes} páginas libres, journal_mode={diario}, auto_vacuum={auto_vacuum}"
+            )
+
+            if not opciones['sin_analyze']:
+                self._paso(cursor, 'ANALYZE')
+            self._paso(cursor, 'PRAGMA optimize')
+
+            if opciones['activar_vacuum_incremental'] and auto_vacuum != 2:
+                cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                self._paso(cursor, 'VACUUM', "VACUUM (activar auto_vacuum incremental)")
+                auto_vacuum = 2
+
+            if auto_vacuum == 2:
+                paginas = opciones['paginas']
+                self._paso(cursor, f'PRAGMA incremental_vacuum({paginas})' if paginas else 'PRAGMA incremental_vacuum')
+            elif libres_antes:
+                self.stdout.write(
+                    f"  incremental_vacuum: omitido (auto_vacuum={auto_vacuum}); "
+                    "usa --activar-vacuum-incremental una vez para habilitarlo"
+                )
+
+            if diario == 'wal':
+                ocupada, registradas, copiadas = self._paso(cursor, 'PRAGMA wal_checkpoint(TRUNCATE)')[0]
+                if ocupada:
+                    self.stdout.write(self.style.WARNING(
+                        f"    checkpoint incompleto: {copiadas}/{registradas} páginas (hay lectores activos)"
+                    ))
+
+            paginas_despues = self._pragma(cursor, 'page_count')
+            libres_despues = self._pragma(cursor, 'freelist_count')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Mantenimiento terminado ✅ {paginas_despues * tamano_pagina / 1024 / 1024:.1f} MB, "
+            f"{libres_despues} páginas libres (antes {libres_antes})"
+        ))
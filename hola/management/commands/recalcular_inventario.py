@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hola.inventario import recalcular_inventario
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los contadores de inventario (por libro y globales) a partir de préstamos y reservas."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            corregidos = recalcular_inventario()
+        self.stdout.write(self.style.SUCCESS(f"Inventario recalculado ✅ ({corregidos} libro(s) corregidos)"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hola import busqueda
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda FTS5 del catálogo de libros."
+
+    def handle(self, *args, **options):
+        if not busqueda.disponible():
+            raise CommandError("El índice FTS5 solo está disponible con SQLite.")
+        with transaction.atomic():
+            total = busqueda.reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido ✅ ({total} libro(s))"))
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Count
+
+from hola import datos_sinteticos, inventario
+from hola.models import Autor, Libro, Prestamo, Usuario
+
+PREFIJO = 'stress-prestamos'
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de concurrencia del préstamo: varios hilos intentan prestar los "
+        "mismos libros a la vez. Comprueba que no se presta más de lo que hay "
+        "y muestra préstamos por segundo. Trabaja sobre una base de datos de "
+        "prueba que se destruye al final; la configurada no se toca."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--intentos', type=int, default=50, help="Intentos de préstamo por hilo.")
+        parser.add_argument('--libros', type=int, default=5)
+        parser.add_argument('--ejemplares', type=int, default=20, help="Ejemplares por libro.")
+
+    def _preparar(self, opciones):
+        user = User.objects.create_user(PREFIJO)
+        usuario = Usuario.objects.create(user=user, nombre=PREFIJO, apellido='', email=f'{PREFIJO}@example.com')
+        autor = Autor.objects.create(nombre=PREFIJO)
+        libros = [
+            Libro.objects.create(
+                titulo=f'{PREFIJO} {i}', isbn=f'{9990000000000 + i}', autor=autor,
+                fecha_publicacion=date.today(), paginas=1, ejemplares=opciones['ejemplares'],
+            )
+            for i in range(opciones['libros'])
+        ]
+        return usuario, libros
+
+    def _hilo(self, usuario, libro_ids, intentos, resultado, cerrojo):
+        exitos = agotados = errores = 0
+        try:
+            for i in range(intentos):
+                libro_id = libro_ids[i % len(libro_ids)]
+                prestamo = Prestamo(usuario=usuario, libro_id=libro_id, fecha_limite=date.today())
+                try:
+                    inventario.realizar_prestamo(prestamo)
+                    exitos += 1
+                except inventario.LibroNoDisponible:
+                    agotados += 1
+                except OperationalError:
+                    errores += 1
+        finally:
+            connection.close()
+            with cerrojo:
+                resultado['exitos'] += exitos
+                resultado['agotados'] += agotados
+                resultado['errores'] += errores
+
+    def _probar(self, opciones):
+        usuario, libros = self._preparar(opciones)
+        libro_ids = [libro.id for libro in libros]
+        resultado = {'exitos': 0, 'agotados': 0, 'errores': 0}
+        cerrojo = threading.Lock()
+        hilos = [
+            threading.Thread(target=self._hilo, args=(usuario, libro_ids, opciones['intentos'], resultado, cerrojo))
+            for _ in range(opciones['hilos'])
+        ]
+
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        prestamos = dict(
+            Prestamo.objects.filter(libro_id__in=libro_ids, devuelto=False)
+            .values_list('libro_id').annotate(total=Count('id'))
+        )
+        sobreprestados = []
+        for libro in Libro.objects.filter(id__in=libro_ids):
+            reales = prestamos.get(libro.id, 0)
+            if reales > libro.ejemplares or reales != libro.prestados:
+                sobreprestados.append((libro.id, libro.ejemplares, libro.prestados, reales))
+
+        intentos = opciones['hilos'] * opciones['intentos']
+        esperados = min(intentos, opciones['libros'] * opciones['ejemplares'])
+        self.stdout.write(
+            f"{intentos} intento(s) en {opciones['hilos']} hilo(s): {resultado['exitos']} préstamos, "
+            f"{resultado['agotados']} sin ejemplares, {resultado['errores']} errores de bloqueo"
+        )
+        self.stdout.write(f"  {segundos:.2f}s — {resultado['exitos'] / segundos:.0f} préstamos/s")
+
+        if sobreprestados:
+            for libro_id, ejemplares, contador, reales in sobreprestados:
+                self.stderr.write(
+                    f"  libro {libro_id}: ejemplares={ejemplares} contador={contador} préstamos={reales}"
+                )
+            raise CommandError("Se prestaron más ejemplares de los disponibles ❌")
+        if resultado['exitos'] + resultado['errores'] < esperados:
+            raise CommandError(f"Se esperaban {esperados} préstamos y solo hubo {resultado['exitos']} ❌")
+        self.stdout.write(self.style.SUCCESS("Sin sobre-préstamos ✅"))
+
+    def handle(self, *args, **opciones):
+        # Nunca se toca la base de datos configurada: se trabaja sobre una de
+        # prueba en disco (la de memoria de SQLite no admite varios hilos)
+        with tempfile.TemporaryDirectory() as carpeta:
+            archivo = os.path.join(carpeta, 'stress.sqlite3') if connection.vendor == 'sqlite' else None
+            with datos_sinteticos.base_de_prueba(archivo):
+                self._probar(opciones)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hola.inventario import detectar_desfases, recalcular_inventario
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los contadores de inventario con los préstamos y reservas reales. "
+        "Pensado para ejecutarse periódicamente (cron); termina con error si hay desfases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reparar', action='store_true',
+            help="Reconstruye los contadores si se detecta algún desfase.",
+        )
+
+    def handle(self, *args, **options):
+        desfases = detectar_desfases()
+        if not desfases:
+            self.stdout.write(self.style.SUCCESS("Inventario correcto ✅"))
+            return
+
+        for desfase in desfases:
+            if 'global' in desfase:
+                guardado, real = desfase['valor']
+                self.stdout.write(f"  global.{desfase['global']}: guardado={guardado} real={real}")
+            else:
+                self.stdout.write(
+                    f"  libro {desfase['libro_id']} ({desfase['titulo']}): "
+                    f"prestados={desfase['prestados'][0]}/{desfase['prestados'][1]} "
+                    f"reservados={desfase['reservados'][0]}/{desfase['reservados'][1]}"
+                )
+
+        if options['reparar']:
+            with transaction.atomic():
+                recalcular_inventario()
+            self.stdout.write(self.style.WARNING(f"{len(desfases)} desfase(s) corregidos."))
+            return
+
+        raise CommandError(f"{len(desfases)} desfase(s) detectados. Usa --reparar para corregirlos.")
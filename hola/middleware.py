@@ -0,0 +1,169 @@
+# hola/middleware.py
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('hola.sql')
+
+
+# ============================
+# Instrumentación SQL por petición
+# ============================
+# Envuelve cada consulta con connection.execute_wrapper para contar
+# consultas y tiempo de base de datos por petición. Detecta patrones
+# N+1 (la misma sentencia repetida muchas veces, p. ej. un COUNT por
+# libro en una plantilla), añade la cabecera Server-Timing y escribe
+# las consultas lentas con su EXPLAIN QUERY PLAN en el logger 'hola.sql'
+# (archivo rotativo configurado en settings.LOGGING).
+
+CONFIGURACION = {
+    'ACTIVO': True,
+    'UMBRAL_LENTA_MS': 100,
+    'UMBRAL_REPETIDAS': 5,
+    'MAX_LENTAS': 5,
+}
+
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+
+
+def _config():
+    return {**CONFIGURACION, **getattr(settings, 'SQL_INSTRUMENTACION', {})}
+
+
+def forma_sentencia(sql):
+    """
+    Normaliza una sentencia para agrupar las que solo cambian en sus
+    parámetros: IN (%s, %s, %s) e IN (%s) quedan iguales.
+    """
+    return _LISTA_PARAMETROS.sub('(…)', ' '.join(sql.split()))
+
+
+class RegistroConsultas:
+    """
+    Wrapper para connection.execute_wrapper que guarda (alias, sql, params, ms).
+    """
+    def __init__(self):
+        self.consultas = []
+
+    def envoltorio(self, alias):
+        def ejecutar(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                milisegundos = (time.perf_counter() - inicio) * 1000
+                self.consultas.append((alias, sql, None if many else params, milisegundos))
+        return ejecutar
+
+    @property
+    def total_ms(self):
+        return sum(c[3] for c in self.consultas)
+
+    def repetidas(self, umbral):
+        conteo = Counter(forma_sentencia(c[1]) for c in self.consultas)
+        return [(forma, veces) for forma, veces in conteo.most_common() if veces >= umbral]
+
+    def mas_lentas(self, limite):
+        return sorted(self.consultas, key=lambda c: c[3], reverse=True)[:limite]
+
+
+def plan_consulta(alias, sql, params):
+    """
+    EXPLAIN QUERY PLAN (SQLite) o EXPLAIN (otros motores) de una sentencia SELECT.
+    """
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    conexion = connections[alias]
+    prefijo = 'EXPLAIN QUERY PLAN' if conexion.vendor == 'sqlite' else 'EXPLAIN'
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute(f'{prefijo} {sql}', params)
+            return '\n'.join(' '.join(str(columna) for columna in fila) for fila in cursor.fetchall())
+    except Exception as error:  # el plan es informativo, nunca debe romper la petición
+        return f'(sin plan: {error})'
+
+
+class InstrumentacionSQLMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _registrar(self, pila, registro):
+        for alias in connections:
+            pila.enter_context(connections[alias].execute_wrapper(registro.envoltorio(alias)))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = _config()
+        if not config['ACTIVO']:
+            return self.get_response(request)
+
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            self._registrar(pila, registro)
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        return self._informar(request, response, registro, total_ms, config)
+
+    async def __acall__(self, request):
+        config = _config()
+        if not config['ACTIVO']:
+            return await self.get_response(request)
+
+        # Las conexiones son locales a cada hilo: los wrappers se instalan
+        # (y se quitan) en el hilo donde sync_to_async ejecuta el ORM
+        registro = RegistroConsultas()
+        pila = ExitStack()
+        await sync_to_async(self._registrar)(pila, registro)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+        total_ms = (time.perf_counter() - inicio) * 1000
+        if registro.mas_lentas(1) and registro.mas_lentas(1)[0][3] >= config['UMBRAL_LENTA_MS']:
+            # El EXPLAIN de las consultas lentas es una consulta síncrona
+            return await sync_to_async(self._informar)(request, response, registro, total_ms, config)
+        return self._informar(request, response, registro, total_ms, config)
+
+    def _informar(self, request, response, registro, total_ms, config):
+        repetidas = registro.repetidas(config['UMBRAL_REPETIDAS'])
+        request.sql_instrumentacion = registro
+
+        metricas = [
+            f'db;dur={registro.total_ms:.1f};desc="{len(registro.consultas)} consultas"',
+            f'app;dur={total_ms - registro.total_ms:.1f}',
+        ]
+        if repetidas:
+            metricas.append(f'n1;desc="{len(repetidas)} sentencias repetidas"')
+        response['Server-Timing'] = ', '.join(metricas)
+
+        for forma, veces in repetidas:
+            logger.warning("Posible N+1 en %s %s: %s veces → %s", request.method, request.path, veces, forma)
+
+        for alias, sql, params, milisegundos in registro.mas_lentas(config['MAX_LENTAS']):
+            if milisegundos < config['UMBRAL_LENTA_MS']:
+                break
+            logger.warning(
+                "Consulta lenta (%.1f ms) en %s %s:\n%s\nparámetros: %s\nplan:\n%s",
+                milisegundos, request.method, request.path, sql, params,
+                plan_consulta(alias, sql, params) if params is not None else '(executemany)',
+            )
+
+        logger.debug(
+            "%s %s: %s consultas, %.1f ms en base de datos de %.1f ms",
+            request.method, request.path, len(registro.consultas), registro.total_ms, total_ms,
+        )
+        return response
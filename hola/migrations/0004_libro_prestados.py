@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:35
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def calcular_prestados(apps, schema_editor):
+    Libro = apps.get_model('hola', 'Libro')
+    libros = Libro.objects.annotate(
+        activos=Count('prestamo', filter=Q(prestamo__devuelto=False))
+    ).filter(activos__gt=0)
+    for libro in libros.iterator():
+        Libro.objects.filter(id=libro.id).update(prestados=libro.activos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0003_alter_perfil_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libro',
+            name='prestados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_prestados, migrations.RunPython.noop),
+    ]
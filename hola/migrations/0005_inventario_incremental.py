@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:37
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+ESTADOS_ACTIVOS = ('activo', 'pendiente')
+
+
+def calcular_contadores(apps, schema_editor):
+    Libro = apps.get_model('hola', 'Libro')
+    Prestamo = apps.get_model('hola', 'Prestamo')
+    Reserva = apps.get_model('hola', 'Reserva')
+    InventarioGlobal = apps.get_model('hola', 'InventarioGlobal')
+
+    libros = Libro.objects.annotate(
+        activas=Count('reserva', filter=Q(reserva__estado__in=ESTADOS_ACTIVOS))
+    ).filter(activas__gt=0)
+    for libro in libros.iterator():
+        Libro.objects.filter(id=libro.id).update(reservados=libro.activas)
+
+    InventarioGlobal.objects.update_or_create(id=1, defaults={
+        'total_prestamos': Prestamo.objects.count(),
+        'prestamos_activos': Prestamo.objects.filter(devuelto=False).count(),
+        'total_reservas': Reserva.objects.count(),
+        'reservas_activas': Reserva.objects.filter(estado__in=ESTADOS_ACTIVOS).count(),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0004_libro_prestados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventarioGlobal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_prestamos', models.PositiveIntegerField(default=0)),
+                ('prestamos_activos', models.PositiveIntegerField(default=0)),
+                ('total_reservas', models.PositiveIntegerField(default=0)),
+                ('reservas_activas', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='libro',
+            name='reservados',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
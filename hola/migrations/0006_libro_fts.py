@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# SQL copiado tal cual: la migración no debe cambiar si cambia hola/busqueda.py
+SQL_CREAR_TABLA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS hola_libro_fts USING fts5("
+    "titulo, autor, categoria, editorial, etiquetas, tokenize='unicode61 remove_diacritics 2')"
+)
+SQL_BORRAR_TABLA = "DROP TABLE IF EXISTS hola_libro_fts"
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(SQL_CREAR_TABLA)
+    schema_editor.execute(
+        "INSERT INTO hola_libro_fts (rowid, titulo, autor, categoria, editorial, etiquetas) "
+        "SELECT l.id, l.titulo, COALESCE(a.nombre, ''), COALESCE(c.nombre, ''), COALESCE(e.nombre, ''), "
+        "COALESCE((SELECT group_concat(t.nombre, ' ') FROM hola_libro_etiquetas le "
+        "JOIN hola_etiqueta t ON t.id = le.etiqueta_id WHERE le.libro_id = l.id), '') "
+        "FROM hola_libro l "
+        "LEFT JOIN hola_autor a ON a.id = l.autor_id "
+        "LEFT JOIN hola_categoria c ON c.id = l.categoria_id "
+        "LEFT JOIN hola_editorial e ON e.id = l.editorial_id"
+    )
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(SQL_BORRAR_TABLA)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0005_inventario_incremental'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0006_libro_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('prestamos', models.PositiveIntegerField(default=0)),
+                ('reservas', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EstadisticaLibro',
+            fields=[
+                ('libro', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica', serialize=False, to='hola.libro')),
+                ('total_prestamos', models.PositiveIntegerField(db_index=True, default=0)),
+                ('total_reservas', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+        ),
+    ]
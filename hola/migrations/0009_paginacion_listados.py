@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0008_correo_pendiente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(fields=['fecha_prestamo', 'id'], name='prestamo_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(fields=['devuelto', 'fecha_prestamo', 'id'], name='prestamo_devuelto_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(fields=['usuario', 'fecha_prestamo', 'id'], name='prestamo_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='reserva_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_inicio', 'id'], name='reserva_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['usuario', 'fecha_inicio', 'id'], name='reserva_usuario_fecha_idx'),
+        ),
+    ]
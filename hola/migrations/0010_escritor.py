@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Perfiles que antes estaban escritos a mano en las vistas escritores/detalle_escritor
+ESCRITORES = [
+    ('gabriel-garcia-marquez', 'Gabriel García Márquez', 'hola/js/gabrielgarciamarquez.jpg',
+     'Escritor colombiano, premio Nobel de Literatura en 1982, conocido por su obra maestra "Cien Años de Soledad".'),
+    ('isabel-allende', 'Isabel Allende', 'hola/js/IsabelAllende.png',
+     'Escritora chilena conocida por novelas como "La Casa de los Espíritus", con gran influencia del realismo mágico.'),
+    ('miguel-cervantes', 'Miguel de Cervantes', 'hola/js/MiguelCervante.png',
+     'Novelista, poeta y dramaturgo español, autor de "Don Quijote de la Mancha".'),
+    ('maria-elena-walsh', 'María Elena Walsh', 'hola/js/MariaElenWalsh.png',
+     'Escritora y poeta argentina, famosa por su literatura infantil y compromiso social.'),
+    ('juan-bosch', 'Juan Bosch', 'hola/js/JuanBosh.png',
+     'Escritor y político dominicano, fundador del Partido Revolucionario Dominicano y prolífico cuentista.'),
+    ('mario-vargas-llosa', 'Mario Vargas Llosa', 'hola/js/MarioVargaLLosa.png',
+     'Escritor peruano, premio Nobel de Literatura 2010, conocido por novelas políticas y sociales.'),
+    ('pedro-mir', 'Pedro Mir', 'hola/js/PedroMir.png',
+     'Poeta dominicano, conocido por su obra social y compromiso con la realidad de su país.'),
+    ('octavio-paz', 'Octavio Paz', 'hola/js/OctavioPaz.png',
+     'Poeta y ensayista mexicano, premio Nobel de Literatura 1990, conocido por su obra lírica y crítica.'),
+    ('pablo-neruda', 'Pablo Neruda', 'hola/js/PabloNeruda.png',
+     'Poeta chileno, premio Nobel de Literatura 1971, conocido por su poesía romántica y social.'),
+    ('antoine-de-saint-exupery', 'Antoine de Saint-Exupéry', 'hola/js/AntonioDeSaint.png',
+     'Escritor y aviador francés, autor de "El Principito", conocido por su poesía y filosofía en narrativa infantil.'),
+    ('horacio-quiroga', 'Horacio Quiroga', 'hola/js/HoracioQuiroga.png',
+     'Cuentista y dramaturgo uruguayo, conocido por sus cuentos cortos y relatos de la selva.'),
+    ('adolfo-bioy-casares', 'Adolfo Bioy Casares', 'hola/js/AdolfoBIOYCas.png',
+     'Escritor argentino, colaborador de Jorge Luis Borges, famoso por su literatura fantástica y policial.'),
+]
+
+
+def crear_escritores(apps, schema_editor):
+    Autor = apps.get_model('hola', 'Autor')
+    Escritor = apps.get_model('hola', 'Escritor')
+    for orden, (slug, nombre, imagen, biografia) in enumerate(ESCRITORES):
+        # Se enlaza con el autor del catálogo si ya existe
+        autor = Autor.objects.filter(nombre__iexact=nombre).order_by('id').first()
+        if autor is None:
+            autor = Autor.objects.create(nombre=nombre)
+        Escritor.objects.get_or_create(
+            slug=slug,
+            defaults={'autor': autor, 'imagen': imagen, 'biografia': biografia, 'orden': orden},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0009_paginacion_listados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Escritor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=120, unique=True)),
+                ('imagen', models.CharField(blank=True, help_text='Ruta dentro de static/, p. ej. hola/js/foto.png', max_length=200)),
+                ('biografia', models.TextField(blank=True)),
+                ('orden', models.PositiveSmallIntegerField(default=0)),
+                ('autor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='escritor', to='hola.autor')),
+            ],
+            options={
+                'verbose_name_plural': 'escritores',
+                'ordering': ['orden', 'slug'],
+            },
+        ),
+        migrations.RunPython(crear_escritores, migrations.RunPython.noop),
+    ]
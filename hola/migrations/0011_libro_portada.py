@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0010_escritor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libro',
+            name='portada',
+            field=models.ImageField(blank=True, upload_to='portadas/'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0011_libro_portada'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='multa',
+            index=models.Index(condition=models.Q(('pagada', False)), fields=['fecha'], name='multa_pendiente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(condition=models.Q(('leida', False)), fields=['usuario', 'fecha'], name='notificacion_no_leidas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(condition=models.Q(('devuelto', False)), fields=['libro'], name='prestamo_libro_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamo',
+            index=models.Index(condition=models.Q(('devuelto', False)), fields=['fecha_limite'], name='prestamo_vencimiento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['libro', 'estado'], name='reserva_libro_estado_idx'),
+        ),
+    ]
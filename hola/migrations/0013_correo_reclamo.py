@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hola', '0012_indices_circulacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='correopendiente',
+            name='reclamado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='correopendiente',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=10),
+        ),
+    ]
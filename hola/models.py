@@ -1,7 +1,10 @@
 # hola/models.py
 from django.db import models
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, RegexValidator
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import timedelta, date
 
 
@@ -70,6 +73,48 @@ class Etiqueta(models.Model):
 # ============================
 # 6. Libro
 # ============================
+def _contar_relacionados(modelo, **filtros):
+    """
+    Subconsulta correlacionada que cuenta filas de `modelo` para cada libro.
+    """
+    conteo = (
+        modelo.objects.filter(libro=OuterRef('pk'), **filtros)
+        .order_by()
+        .values('libro')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(conteo, output_field=IntegerField()), Value(0))
+
+
+class LibroQuerySet(models.QuerySet):
+    def with_availability(self):
+        """
+        Expone prestados_activos, reservados_activos y disponibles a partir
+        de los contadores persistidos en cada libro (sin subconsultas).
+        """
+        return self.annotate(
+            prestados_activos=F('prestados'),
+            reservados_activos=F('reservados'),
+            disponibles=F('ejemplares') - F('prestados'),
+        )
+
+    def with_live_availability(self):
+        """
+        Igual que with_availability() pero contando préstamos y reservas
+        reales con subconsultas. Lo usa el verificador de inventario.
+        """
+        return self.annotate(
+            prestados_activos=_contar_relacionados(Prestamo, devuelto=False),
+            reservados_activos=_contar_relacionados(Reserva, estado__in=Reserva.ESTADOS_ACTIVOS),
+        ).annotate(
+            disponibles=F('ejemplares') - F('prestados_activos'),
+        )
+
+    def disponibles(self):
+        return self.with_availability().filter(disponibles__gt=0)
+
+
 class Libro(models.Model):
     ESTADO_CHOICES = [
         ('disponible', 'Disponible'),
@@ -89,17 +134,26 @@ class Libro(models.Model):
     fecha_publicacion = models.DateField()
     paginas = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     ejemplares = models.PositiveIntegerField(default=1)
+    # Contadores mantenidos por hola/inventario.py
+    prestados = models.PositiveIntegerField(default=0, editable=False)
+    reservados = models.PositiveIntegerField(default=0, editable=False)
     estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='disponible')
     etiquetas = models.ManyToManyField(Etiqueta, blank=True)
+    # Las variantes WebP/JPEG se generan al guardar (hola/imagenes.py)
+    portada = models.ImageField(upload_to='portadas/', blank=True)
 
+    objects = LibroQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.titulo} ({self.estado_real})"
 
     @property
     def disponible_real(self):
-        prestados = Prestamo.objects.filter(libro=self, devuelto=False).count()
-        return self.ejemplares - prestados
+        # Si viene de with_availability() usamos la anotación ya calculada
+        disponibles = getattr(self, 'disponibles', None)
+        if disponibles is None:
+            disponibles = self.ejemplares - self.prestados
+        return max(disponibles, 0)
 
     @property
     def estado_real(self):
@@ -117,6 +171,17 @@ class Prestamo(models.Model):
     fecha_devolucion = models.DateField(null=True, blank=True)
     devuelto = models.BooleanField(default=False)
 
+    class Meta:
+        # Paginación por cursor de listaprestamos: (fecha_prestamo, id) con y sin filtros
+        indexes = [
+            models.Index(fields=['fecha_prestamo', 'id'], name='prestamo_fecha_id_idx'),
+            models.Index(fields=['devuelto', 'fecha_prestamo', 'id'], name='prestamo_devuelto_fecha_idx'),
+            models.Index(fields=['usuario', 'fecha_prestamo', 'id'], name='prestamo_usuario_fecha_idx'),
+            # Solo préstamos activos (parciales): disponibilidad por libro y vencidos para multas
+            models.Index(fields=['libro'], condition=Q(devuelto=False), name='prestamo_libro_activo_idx'),
+            models.Index(fields=['fecha_limite'], condition=Q(devuelto=False), name='prestamo_vencimiento_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.pk:
             self.fecha_limite = date.today() + timedelta(days=2)
@@ -136,6 +201,7 @@ class Reserva(models.Model):
         ('activo', 'Activo'),
         ('finalizado', 'Finalizado'),
     ]
+    ESTADOS_ACTIVOS = ('activo', 'pendiente')
 
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE)
     libro = models.ForeignKey(Libro, on_delete=models.CASCADE)
@@ -143,6 +209,16 @@ class Reserva(models.Model):
     fecha_fin = models.DateField()
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
 
+    class Meta:
+        # Paginación por cursor de lista_reservas y mis_reservas: (fecha_inicio, id)
+        indexes = [
+            models.Index(fields=['fecha_inicio', 'id'], name='reserva_fecha_id_idx'),
+            models.Index(fields=['estado', 'fecha_inicio', 'id'], name='reserva_estado_fecha_idx'),
+            models.Index(fields=['usuario', 'fecha_inicio', 'id'], name='reserva_usuario_fecha_idx'),
+            # Reservas activas de un libro (estado IN ('activo', 'pendiente'))
+            models.Index(fields=['libro', 'estado'], name='reserva_libro_estado_idx'),
+        ]
+
     def __str__(self):
         return f"{self.usuario} → {self.libro} ({self.estado})"
 
@@ -156,6 +232,12 @@ class Multa(models.Model):
     fecha = models.DateTimeField(auto_now_add=True)
     pagada = models.BooleanField(default=False)
 
+    class Meta:
+        # Multas pendientes por fecha (listar_multas_notificacion); las pagadas no se indexan
+        indexes = [
+            models.Index(fields=['fecha'], condition=Q(pagada=False), name='multa_pendiente_fecha_idx'),
+        ]
+
     def __str__(self):
         estado = "Pagada" if self.pagada else "Pendiente"
         return f"Multa RD${self.monto} - ({estado})"
@@ -171,6 +253,13 @@ class Notificacion(models.Model):
     fecha = models.DateTimeField(auto_now_add=True)
     leida = models.BooleanField(default=False)
 
+    class Meta:
+        # No leídas de un usuario, de la más reciente a la más antigua. Es parcial porque
+        # filter(leida=False) se traduce a NOT leida, que no sirve como columna de un índice
+        indexes = [
+            models.Index(fields=['usuario', 'fecha'], condition=Q(leida=False), name='notificacion_no_leidas_idx'),
+        ]
+
     def __str__(self):
         return f"Notif. para {self.usuario} - {self.mensaje[:30]}..."
 
@@ -184,3 +273,96 @@ class Perfil(models.Model):
 
     def __str__(self):
         return self.user.username
+
+
+# ============================
+# 12. InventarioGlobal
+# ============================
+class InventarioGlobal(models.Model):
+    """
+    Fila única con los totales de circulación, mantenida por hola/inventario.py.
+    """
+    total_prestamos = models.PositiveIntegerField(default=0)
+    prestamos_activos = models.PositiveIntegerField(default=0)
+    total_reservas = models.PositiveIntegerField(default=0)
+    reservas_activas = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Inventario: {self.prestamos_activos} prestados, {self.reservas_activas} reservados"
+
+
+# ============================
+# 13. Estadísticas acumuladas
+# ============================
+class EstadisticaDiaria(models.Model):
+    fecha = models.DateField(unique=True)
+    prestamos = models.PositiveIntegerField(default=0)
+    reservas = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.fecha}: {self.prestamos} préstamos, {self.reservas} reservas"
+
+
+class EstadisticaLibro(models.Model):
+    libro = models.OneToOneField(Libro, on_delete=models.CASCADE, primary_key=True, related_name='estadistica')
+    total_prestamos = models.PositiveIntegerField(default=0, db_index=True)
+    total_reservas = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.libro_id}: {self.total_prestamos} préstamos, {self.total_reservas} reservas"
+
+
+# ============================
+# 14. CorreoPendiente (bandeja de salida)
+# ============================
+class CorreoPendiente(models.Model):
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    destinatario = models.EmailField()
+    asunto = models.CharField(max_length=200)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=200, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    # Momento en que un proceso reclamó el correo para enviarlo (estado 'enviando')
+    reclamado = models.DateTimeField(null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_cola_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} → {self.destinatario} ({self.estado})"
+
+
+# ============================
+# 15. Escritor (perfil público de un autor)
+# ============================
+class Escritor(models.Model):
+    autor = models.OneToOneField(Autor, on_delete=models.CASCADE, related_name='escritor')
+    slug = models.SlugField(max_length=120, unique=True)
+    imagen = models.CharField(max_length=200, blank=True, help_text="Ruta dentro de static/, p. ej. hola/js/foto.png")
+    biografia = models.TextField(blank=True)
+    orden = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['orden', 'slug']
+        verbose_name_plural = 'escritores'
+
+    @property
+    def nombre(self):
+        return self.autor.nombre
+
+    def __str__(self):
+        return self.slug
@@ -0,0 +1,107 @@
+# hola/multas.py
+import time
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Max, Min
+
+from .models import Multa, Notificacion, Prestamo
+
+
+# ============================
+# Generación masiva de multas
+# ============================
+# Recorre los préstamos vencidos por rangos de id y crea/actualiza sus
+# multas y notificaciones con bulk_create/bulk_update. Es idempotente:
+# ejecutarlo dos veces el mismo día no cambia nada la segunda vez.
+
+MONTO_POR_DIA = 100
+TAMANO_LOTE = 1000
+
+
+def mensaje_multa(monto, titulo):
+    return f"Tienes una multa de ${monto} por el libro '{titulo}'."
+
+
+def _procesar_lote(prestamos, hoy, dry_run, resultado):
+    ids = [p['id'] for p in prestamos]
+
+    multas = {}
+    for multa in Multa.objects.filter(prestamo_id__in=ids).order_by('id'):
+        multas.setdefault(multa.prestamo_id, multa)
+    notificaciones = {}
+    for noti in Notificacion.objects.filter(prestamo_id__in=ids).order_by('id'):
+        notificaciones.setdefault((noti.usuario_id, noti.prestamo_id), noti)
+
+    multas_nuevas, multas_cambiadas = [], []
+    notis_nuevas, notis_cambiadas = [], []
+
+    for prestamo in prestamos:
+        retraso = (hoy - prestamo['fecha_limite']).days
+        if retraso <= 0:
+            continue
+        monto = retraso * MONTO_POR_DIA
+
+        multa = multas.get(prestamo['id'])
+        if multa is None:
+            multas_nuevas.append(Multa(prestamo_id=prestamo['id'], monto=monto))
+        elif not multa.pagada and multa.monto != monto:
+            multa.monto = monto
+            multas_cambiadas.append(multa)
+
+        mensaje = mensaje_multa(monto, prestamo['libro__titulo'])
+        noti = notificaciones.get((prestamo['usuario_id'], prestamo['id']))
+        if noti is None:
+            notis_nuevas.append(Notificacion(
+                usuario_id=prestamo['usuario_id'], prestamo_id=prestamo['id'], mensaje=mensaje,
+            ))
+        elif noti.mensaje != mensaje:
+            noti.mensaje = mensaje
+            notis_cambiadas.append(noti)
+
+    if not dry_run:
+        with transaction.atomic():
+            Multa.objects.bulk_create(multas_nuevas)
+            Multa.objects.bulk_update(multas_cambiadas, ['monto'])
+            Notificacion.objects.bulk_create(notis_nuevas)
+            Notificacion.objects.bulk_update(notis_cambiadas, ['mensaje'])
+
+    resultado['multas_creadas'] += len(multas_nuevas)
+    resultado['multas_actualizadas'] += len(multas_cambiadas)
+    resultado['notificaciones_creadas'] += len(notis_nuevas)
+    resultado['notificaciones_actualizadas'] += len(notis_cambiadas)
+
+
+def generar_multas(hoy=None, tamano_lote=TAMANO_LOTE, dry_run=False):
+    """
+    Calcula las multas de todos los préstamos vencidos.
+    Devuelve un diccionario con conteos y tiempos.
+    """
+    hoy = hoy or date.today()
+    inicio = time.perf_counter()
+    resultado = {
+        'prestamos_vencidos': 0,
+        'lotes': 0,
+        'multas_creadas': 0,
+        'multas_actualizadas': 0,
+        'notificaciones_creadas': 0,
+        'notificaciones_actualizadas': 0,
+        'dry_run': dry_run,
+    }
+
+    vencidos = Prestamo.objects.filter(devuelto=False, fecha_limite__lt=hoy)
+    rango = vencidos.aggregate(desde=Min('id'), hasta=Max('id'))
+    if rango['desde'] is not None:
+        for desde in range(rango['desde'], rango['hasta'] + 1, tamano_lote):
+            prestamos = list(
+                vencidos.filter(id__gte=desde, id__lt=desde + tamano_lote)
+                .values('id', 'usuario_id', 'fecha_limite', 'libro__titulo')
+            )
+            if not prestamos:
+                continue
+            _procesar_lote(prestamos, hoy, dry_run, resultado)
+            resultado['prestamos_vencidos'] += len(prestamos)
+            resultado['lotes'] += 1
+
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
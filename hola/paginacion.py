@@ -0,0 +1,127 @@
+# hola/paginacion.py
+import base64
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+
+# ============================
+# Paginación por cursor (keyset)
+# ============================
+# En lugar de OFFSET, cada página se pide "después de" o "antes de" la
+# última fila vista, ordenando por (fecha, id) descendente. Con un índice
+# sobre esas columnas la página 10.000 cuesta lo mismo que la primera.
+# Funciona igual con instancias que con filas de values() (la API JSON),
+# y con campo_fecha='id' se ordena solo por id.
+
+TAMANO_PAGINA = 50
+
+
+def codificar_cursor(fecha, pk):
+    texto = json.dumps([fecha.isoformat() if hasattr(fecha, 'isoformat') else fecha, pk])
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campo):
+    """
+    Devuelve (fecha, id) o None si el cursor no es válido.
+    `campo` es el campo de orden del modelo, usado para convertir el valor.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        fecha, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return campo.to_python(fecha), int(pk)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _clave(fila, campo_fecha):
+    if isinstance(fila, dict):
+        return fila[campo_fecha], fila['id']
+    return getattr(fila, campo_fecha), fila.pk
+
+
+def _posteriores(campo_fecha, fecha, pk, operador):
+    """
+    Filas estrictamente después (o antes) de (fecha, pk) según `operador` ('lt'/'gt').
+    """
+    if campo_fecha == 'id':
+        return Q(**{f'id__{operador}': pk})
+    return Q(**{f'{campo_fecha}__{operador}': fecha}) | Q(**{campo_fecha: fecha, f'id__{operador}': pk})
+
+
+def _orden(campo_fecha, signo=''):
+    return [f'{signo}id'] if campo_fecha == 'id' else [f'{signo}{campo_fecha}', f'{signo}id']
+
+
+class PaginaKeyset:
+    def __init__(self, objetos, campo_fecha, hay_siguiente, hay_anterior):
+        self.objetos = objetos
+        self.siguiente = self.anterior = None
+        if objetos and hay_siguiente:
+            self.siguiente = codificar_cursor(*_clave(objetos[-1], campo_fecha))
+        if objetos and hay_anterior:
+            self.anterior = codificar_cursor(*_clave(objetos[0], campo_fecha))
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    @property
+    def tiene_otras_paginas(self):
+        return bool(self.siguiente or self.anterior)
+
+
+def paginar(queryset, campo_fecha, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Página de `queryset` ordenada por (campo_fecha, id) descendente.
+    `despues`/`antes` son cursores de PaginaKeyset.siguiente/anterior.
+    Si `queryset` es un values(), debe incluir `campo_fecha` e 'id'.
+    """
+    campo = queryset.model._meta.get_field(campo_fecha)
+    if antes and (clave := decodificar_cursor(antes, campo)):
+        filas = list(
+            queryset.filter(_posteriores(campo_fecha, *clave, 'gt'))
+            .order_by(*_orden(campo_fecha))[:tamano + 1]
+        )
+        hay_anterior = len(filas) > tamano
+        return PaginaKeyset(filas[:tamano][::-1], campo_fecha, True, hay_anterior)
+
+    clave = decodificar_cursor(despues, campo) if despues else None
+    if clave:
+        queryset = queryset.filter(_posteriores(campo_fecha, *clave, 'lt'))
+    filas = list(queryset.order_by(*_orden(campo_fecha, '-'))[:tamano + 1])
+    return PaginaKeyset(filas[:tamano], campo_fecha, len(filas) > tamano, clave is not None)
+
+
+def rango_fechas(campo_fecha, desde=None, hasta=None, con_hora=False):
+    """
+    Filtros `desde`/`hasta` (inclusive) sobre el campo sin funciones como
+    __date, para que SQLite pueda usar el índice de la columna.
+    """
+    filtros = {}
+    if desde:
+        filtros[f'{campo_fecha}__gte'] = (
+            timezone.make_aware(datetime.combine(desde, time.min)) if con_hora else desde
+        )
+    if hasta:
+        if con_hora:
+            filtros[f'{campo_fecha}__lt'] = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        else:
+            filtros[f'{campo_fecha}__lte'] = hasta
+    return filtros
+
+
+def parametros_sin_cursor(request):
+    """
+    Querystring de los filtros actuales, sin los cursores, para los enlaces de página.
+    """
+    parametros = request.GET.copy()
+    parametros.pop('despues', None)
+    parametros.pop('antes', None)
+    return parametros.urlencode()
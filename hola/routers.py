@@ -0,0 +1,91 @@
+# hola/routers.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# ============================
+# Enrutador lectura/escritura
+# ============================
+# Las vistas de reportes (decoradas con @usar_base_lectura) leen desde el
+# alias 'lectura', una conexión de solo lectura (mode=ro) al mismo archivo
+# o a una copia. Todo lo demás, y cualquier escritura, va a 'default'.
+# Dentro de una transacción abierta en 'default' también se lee de
+# 'default', para no perder lo recién escrito.
+
+ALIAS_LECTURA = 'lectura'
+
+_alias_lectura = ContextVar('alias_lectura', default=None)
+
+
+def _alias_disponible():
+    return ALIAS_LECTURA if ALIAS_LECTURA in connections.settings else None
+
+
+@contextmanager
+def leyendo_de_replica():
+    """
+    Dirige las lecturas del bloque a la base de solo lectura.
+    """
+    token = _alias_lectura.set(_alias_disponible())
+    try:
+        yield
+    finally:
+        _alias_lectura.reset(token)
+
+
+def _contenido_en_replica(contenido):
+    # Las respuestas en streaming ejecutan sus consultas al enviarse
+    with leyendo_de_replica():
+        yield from contenido
+
+
+async def _contenido_asincrono_en_replica(contenido):
+    with leyendo_de_replica():
+        async for parte in contenido:
+            yield parte
+
+
+def usar_base_lectura(vista):
+    """
+    Decorador para vistas de reportes: sus consultas de lectura (incluidas
+    las de una respuesta en streaming) van al alias 'lectura'. Sirve
+    también para vistas asíncronas: el ContextVar pasa a sync_to_async.
+    """
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_asincrona(request, *args, **kwargs):
+            with leyendo_de_replica():
+                return await vista(request, *args, **kwargs)
+        return envoltura_asincrona
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        with leyendo_de_replica():
+            respuesta = vista(request, *args, **kwargs)
+        if getattr(respuesta, 'streaming', False):
+            envolver = _contenido_asincrono_en_replica if respuesta.is_async else _contenido_en_replica
+            respuesta.streaming_content = envolver(respuesta.streaming_content)
+        return respuesta
+    return envoltura
+
+
+class EnrutadorLecturaEscritura:
+    def db_for_read(self, model, **hints):
+        alias = _alias_lectura.get()
+        if alias and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias son la misma base de datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,83 @@
+# hola/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda, cache_http, imagenes
+from .models import Autor, Categoria, Editorial, Escritor, Etiqueta, Libro, Perfil
+
+
+# ============================
+# Sincronización del índice de búsqueda
+# ============================
+@receiver(post_save, sender=Libro)
+def indexar_libro(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.indexar_libros([instance.id])
+
+
+@receiver(post_delete, sender=Libro)
+def desindexar_libro(sender, instance, **kwargs):
+    busqueda.eliminar_libros([instance.id])
+
+
+@receiver(m2m_changed, sender=Libro.etiquetas.through)
+def reindexar_etiquetas_libro(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Se cambiaron los libros de una etiqueta
+        ids = pk_set or []
+        if action == 'post_clear':
+            ids = Libro.objects.filter(etiquetas=instance).values_list('id', flat=True)
+        busqueda.indexar_libros(ids)
+    else:
+        busqueda.indexar_libros([instance.id])
+
+
+@receiver(post_save, sender=Autor)
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Editorial)
+def reindexar_libros_relacionados(sender, instance, created, raw=False, **kwargs):
+    # Un autor/categoría/editorial nuevo todavía no tiene libros
+    if created or raw:
+        return
+    campo = sender._meta.model_name
+    busqueda.indexar_libros(Libro.objects.filter(**{campo: instance}).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Etiqueta)
+def reindexar_libros_etiqueta(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    busqueda.indexar_libros(Libro.objects.filter(etiquetas=instance).values_list('id', flat=True))
+
+
+# ============================
+# Invalidación de páginas cacheadas del catálogo
+# ============================
+@receiver(post_save, sender=Libro)
+@receiver(post_delete, sender=Libro)
+@receiver(post_save, sender=Autor)
+@receiver(post_delete, sender=Autor)
+@receiver(post_save, sender=Escritor)
+@receiver(post_delete, sender=Escritor)
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Editorial)
+def invalidar_paginas_catalogo(sender, raw=False, **kwargs):
+    if not raw:
+        cache_http.invalidar_catalogo()
+
+
+# ============================
+# Variantes de portadas y avatares
+# ============================
+@receiver(post_save, sender=Libro)
+def generar_variantes_portada(sender, instance, raw=False, **kwargs):
+    if not raw and instance.portada and not imagenes.tiene_variantes(instance.portada, 'portada'):
+        imagenes.generar_variantes(instance.portada, 'portada')
+
+
+@receiver(post_save, sender=Perfil)
+def generar_variantes_avatar(sender, instance, raw=False, **kwargs):
+    if not raw and instance.avatar and not imagenes.tiene_variantes(instance.avatar, 'avatar'):
+        imagenes.generar_variantes(instance.avatar, 'avatar')
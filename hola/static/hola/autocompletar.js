@@ -0,0 +1,30 @@
+// Autocompletar de los formularios de préstamo y reserva (hola/widgets.py)
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('[data-autocompletar]').forEach(cuadro => {
+    const destino = document.getElementById(cuadro.dataset.destino);
+    const lista = document.getElementById(cuadro.getAttribute('list'));
+    let espera = null;
+
+    cuadro.addEventListener('input', () => {
+      // Si el texto coincide con una sugerencia se guarda su id
+      const elegida = [...lista.options].find(opcion => opcion.value === cuadro.value);
+      destino.value = elegida ? elegida.dataset.id : '';
+      if (elegida) return;
+
+      clearTimeout(espera);
+      espera = setTimeout(async () => {
+        const url = `${cuadro.dataset.autocompletar}?q=${encodeURIComponent(cuadro.value)}`;
+        const respuesta = await fetch(url, { headers: { 'Accept': 'application/json' } });
+        if (!respuesta.ok) return;
+        const datos = await respuesta.json();
+        lista.innerHTML = '';
+        datos.resultados.forEach(resultado => {
+          const opcion = document.createElement('option');
+          opcion.value = resultado.texto;
+          opcion.dataset.id = resultado.id;
+          lista.appendChild(opcion);
+        });
+      }, 200);
+    });
+  });
+});
@@ -0,0 +1,33 @@
+from django import template
+
+from hola import imagenes
+
+register = template.Library()
+
+
+@register.inclusion_tag('hola/widgets/imagen_responsiva.html')
+def imagen_responsiva(archivo, tipo, alt='', clase='', perezosa=True):
+    """
+    <picture> con srcset WebP/JPEG de una portada o avatar:
+    {% imagen_responsiva libro.portada 'portada' alt=libro.titulo %}
+    Si todavía no hay variantes se usa la imagen original.
+    """
+    contexto = {'archivo': archivo, 'alt': alt, 'clase': clase, 'perezosa': perezosa}
+    anchos = imagenes.anchos_variantes(archivo, tipo)
+    if anchos:
+        contexto.update({
+            'variantes': True,
+            'sizes': imagenes.VARIANTES[tipo]['sizes'],
+            'srcset_webp': imagenes.srcset(archivo, tipo, 'webp'),
+            'srcset_jpg': imagenes.srcset(archivo, tipo, 'jpg'),
+            'src': archivo.storage.url(imagenes.nombre_variante(archivo.name, anchos[0], 'jpg')),
+        })
+    return contexto
+
+
+@register.simple_tag
+def srcset(archivo, tipo, extension='webp'):
+    """
+    Solo el valor del atributo: <img srcset="{% srcset perfil.avatar 'avatar' 'jpg' %}">
+    """
+    return imagenes.srcset(archivo, tipo, extension) if imagenes.tiene_variantes(archivo, tipo) else ''
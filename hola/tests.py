@@ -1,3 +1,536 @@
-from django.test import TestCase
+import json
+import re
+from datetime import date, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django import forms
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import busqueda, correo, estadisticas, importacion, inventario, multas, paginacion
+from .admin import PrestamoAdminForm
+from .models import Autor, CorreoPendiente, EstadisticaDiaria, Libro, Multa, Notificacion, Prestamo, Reserva, Usuario
+
+
+# ============================
+# Planes de consulta de circulación
+# ============================
+# Cada consulta caliente debe resolverse con un índice (SEARCH ... USING
+# INDEX). Si un cambio en el código o en los índices la convierte en un
+# recorrido completo de la tabla (SCAN tabla), estas pruebas fallan.
+
+ESCANEO_COMPLETO = re.compile(r'\bSCAN (hola_\w+)(?! USING)')
+
+
+def plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [fila[-1] for fila in cursor.fetchall()]
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN solo existe en SQLite")
+class PlanesCirculacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        hoy = date.today()
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.usuario = Usuario.objects.create(user=cls.user, nombre='Ana', apellido='Pérez', email='ana@example.com')
+        autor = Autor.objects.create(nombre='Juan Bosch')
+        cls.libro = Libro.objects.create(
+            titulo='La mañosa', isbn='9780000000001', autor=autor,
+            fecha_publicacion=date(1936, 1, 1), paginas=200, ejemplares=3,
+        )
+        cls.prestamo = Prestamo.objects.create(usuario=cls.usuario, libro=cls.libro, fecha_limite=hoy)
+        Prestamo.objects.filter(pk=cls.prestamo.pk).update(fecha_limite=hoy - timedelta(days=3))
+        Reserva.objects.create(
+            usuario=cls.usuario, libro=cls.libro, fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=2),
+        )
+        Multa.objects.create(prestamo=cls.prestamo, monto=300)
+        Notificacion.objects.create(usuario=cls.usuario, prestamo=cls.prestamo, mensaje="Multa pendiente")
+
+    def planes_de(self, funcion):
+        """
+        Ejecuta `funcion` y devuelve el plan de cada SELECT que hizo.
+        """
+        with CaptureQueriesContext(connection) as consultas:
+            funcion()
+        return [
+            linea
+            for consulta in consultas.captured_queries if consulta['sql'].startswith('SELECT')
+            for linea in plan(consulta['sql'])
+        ]
+
+    def plan_de(self, queryset):
+        return queryset.explain().splitlines()
+
+    def assertSinEscaneoCompleto(self, planes, *tablas):
+        escaneos = [linea for linea in planes if (m := ESCANEO_COMPLETO.search(linea)) and m.group(1) in tablas]
+        self.assertEqual(escaneos, [], "Recorrido completo de tabla:\n" + "\n".join(planes))
+
+    def assertUsaIndice(self, planes, indice):
+        self.assertTrue(
+            any(f'INDEX {indice} ' in linea + ' ' for linea in planes),
+            f"No se usa {indice}:\n" + "\n".join(planes),
+        )
+
+    def test_prestamos_activos_de_un_libro(self):
+        planes = self.plan_de(Prestamo.objects.filter(libro=self.libro, devuelto=False))
+        self.assertSinEscaneoCompleto(planes, 'hola_prestamo')
+        self.assertUsaIndice(planes, 'prestamo_libro_activo_idx')
+
+    def test_disponibilidad_real_del_inventario(self):
+        # Subconsultas correlacionadas de with_live_availability(): una por libro
+        planes = self.planes_de(inventario.detectar_desfases)
+        self.assertSinEscaneoCompleto(planes, 'hola_prestamo', 'hola_reserva')
+        self.assertUsaIndice(planes, 'prestamo_libro_activo_idx')
+        self.assertUsaIndice(planes, 'reserva_libro_estado_idx')
+
+    def test_prestamos_vencidos_al_generar_multas(self):
+        planes = self.planes_de(lambda: multas.generar_multas(dry_run=True))
+        self.assertSinEscaneoCompleto(planes, 'hola_prestamo', 'hola_multa', 'hola_notificacion')
+        self.assertUsaIndice(planes, 'prestamo_vencimiento_idx')
+
+    def test_reservas_activas_de_un_libro(self):
+        planes = self.plan_de(Reserva.objects.filter(libro=self.libro, estado__in=Reserva.ESTADOS_ACTIVOS))
+        self.assertSinEscaneoCompleto(planes, 'hola_reserva')
+        self.assertUsaIndice(planes, 'reserva_libro_estado_idx')
+
+    def test_reservas_de_un_usuario(self):
+        self.client.force_login(self.user)
+        planes = self.planes_de(lambda: self.client.get(reverse('mis_reservas')))
+        self.assertSinEscaneoCompleto(planes, 'hola_reserva')
+        self.assertUsaIndice(planes, 'reserva_usuario_fecha_idx')
+
+    def test_multas_pendientes(self):
+        self.client.force_login(self.user)
+        planes = self.planes_de(lambda: self.client.get(reverse('listar_multas_notificacion')))
+        self.assertSinEscaneoCompleto(planes, 'hola_multa')
+        self.assertUsaIndice(planes, 'multa_pendiente_fecha_idx')
+
+    def test_notificaciones_no_leidas_de_un_usuario(self):
+        planes = self.plan_de(
+            Notificacion.objects.filter(usuario=self.usuario, leida=False).order_by('-fecha')
+        )
+        self.assertSinEscaneoCompleto(planes, 'hola_notificacion')
+        self.assertUsaIndice(planes, 'notificacion_no_leidas_idx')
+
+
+# ============================
+# Servicios de circulación
+# ============================
+# Prestar y devolver pasan por inventario.realizar_prestamo y
+# realizar_devolucion (UPDATE condicionales); los contadores de Libro
+# deben coincidir siempre con los préstamos activos reales.
+
+class CirculacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.usuario = Usuario.objects.create(user=cls.user, nombre='Ana', apellido='Pérez', email='ana@example.com')
+        autor = Autor.objects.create(nombre='Juan Bosch')
+        cls.libro = Libro.objects.create(
+            titulo='Cuentos escritos en el exilio', isbn='9780000000002', autor=autor,
+            fecha_publicacion=date(1962, 1, 1), paginas=150, ejemplares=1,
+        )
+
+    def prestar(self, dias=None):
+        prestamo = inventario.realizar_prestamo(Prestamo(usuario=self.usuario, libro=self.libro))
+        if dias is not None:
+            # Prestamo.save() fija el plazo al crearlo; se ajusta después
+            prestamo.fecha_limite = date.today() + timedelta(days=dias)
+            Prestamo.objects.filter(pk=prestamo.pk).update(fecha_limite=prestamo.fecha_limite)
+        return prestamo
+
+    def assertContadoresCoinciden(self):
+        self.libro.refresh_from_db()
+        activos = Prestamo.objects.filter(libro=self.libro, devuelto=False).count()
+        self.assertEqual(self.libro.prestados, activos)
+        self.assertLessEqual(self.libro.prestados, self.libro.ejemplares)
+
+    def test_segundo_prestamo_sin_ejemplares(self):
+        self.prestar()
+        with self.assertRaises(inventario.LibroNoDisponible):
+            self.prestar()
+        self.libro.refresh_from_db()
+        self.assertEqual(self.libro.prestados, 1)
+        self.assertEqual(Prestamo.objects.filter(libro=self.libro).count(), 1)
+
+    def test_devolucion_repetida(self):
+        prestamo = self.prestar(dias=-2)
+        self.assertEqual(inventario.realizar_devolucion(prestamo), 2 * multas.MONTO_POR_DIA)
+        with self.assertRaises(inventario.PrestamoYaDevuelto):
+            inventario.realizar_devolucion(Prestamo.objects.get(pk=prestamo.pk))
+        self.assertEqual(Multa.objects.filter(prestamo=prestamo).count(), 1)
+        self.assertContadoresCoinciden()
+        self.assertEqual(self.libro.prestados, 0)
+
+    def test_prestamo_desde_el_admin(self):
+        self.client.force_login(self.user)
+        datos = {
+            'usuario': self.usuario.pk, 'libro': self.libro.pk,
+            'fecha_limite': (date.today() + timedelta(days=7)).isoformat(),
+        }
+        url = reverse('admin:hola_prestamo_add')
+        respuesta = self.client.post(url, datos)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertContadoresCoinciden()
+        self.assertEqual(self.libro.prestados, 1)
+
+        # Sin ejemplares libres el formulario lo rechaza y no se crea nada
+        respuesta = self.client.post(url, datos)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "No quedan ejemplares disponibles")
+        self.assertEqual(Prestamo.objects.filter(libro=self.libro).count(), 1)
+        self.assertContadoresCoinciden()
+
+        # Reactivar un préstamo devuelto ocupa un ejemplar: rechazado sin copias libres
+        devuelto = Prestamo.objects.create(
+            usuario=self.usuario, libro=self.libro, devuelto=True, fecha_devolucion=date.today(),
+        )
+        url = reverse('admin:hola_prestamo_change', args=[devuelto.pk])
+        respuesta = self.client.post(url, datos)
+        self.assertContains(respuesta, "No quedan ejemplares disponibles")
+
+        # Aunque dos ediciones pasen la validación a la vez, el UPDATE condicional
+        # deja entrar solo a una: aquí la validación no ve el ejemplar ocupado
+        with mock.patch.object(PrestamoAdminForm, 'clean', forms.ModelForm.clean):
+            respuesta = self.client.post(url, datos)
+        self.assertRedirects(respuesta, url, fetch_redirect_response=False)
+        self.assertTrue(Prestamo.objects.get(pk=devuelto.pk).devuelto)
+        self.assertContadoresCoinciden()
+        self.assertEqual(self.libro.prestados, 1)
+
+        # Con el ejemplar libre la reactivación se guarda y lo ocupa
+        inventario.realizar_devolucion(Prestamo.objects.get(libro=self.libro, devuelto=False))
+        respuesta = self.client.post(url, datos)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertFalse(Prestamo.objects.get(pk=devuelto.pk).devuelto)
+        self.assertContadoresCoinciden()
+        self.assertEqual(self.libro.prestados, 1)
+
+    def test_estadisticas_coinciden_con_reconstruir(self):
+        self.prestar()
+        inicio = date.today() + timedelta(days=5)
+        reserva = Reserva.objects.create(
+            usuario=self.usuario, libro=self.libro, fecha_inicio=inicio,
+            fecha_fin=inicio + timedelta(days=2), estado='activo',
+        )
+        inventario.registrar_reserva(reserva.libro_id, reserva.estado, reserva.fecha_inicio)
+
+        def diarias():
+            return sorted(EstadisticaDiaria.objects.values_list('fecha', 'prestamos', 'reservas'))
+
+        en_vivo = diarias()
+        self.assertIn((inicio, 0, 1), en_vivo)
+        estadisticas.reconstruir()
+        self.assertEqual(diarias(), en_vivo)
+
+    def test_devolver_libro(self):
+        prestamo = self.prestar(dias=-1)
+        self.client.force_login(self.user)
+        url = reverse('devolver_libro', args=[self.libro.pk])
+        respuesta = self.client.get(url)
+        self.assertContains(respuesta, f"Multa generada: ${multas.MONTO_POR_DIA}")
+        self.assertTrue(Prestamo.objects.get(pk=prestamo.pk).devuelto)
+        self.assertEqual(Multa.objects.filter(prestamo=prestamo).count(), 1)
+        self.assertEqual(Notificacion.objects.filter(prestamo=prestamo).count(), 1)
+        self.assertContadoresCoinciden()
+
+        # Repetir la devolución no toca contadores ni crea otra multa
+        self.client.get(url)
+        self.assertEqual(Multa.objects.filter(prestamo=prestamo).count(), 1)
+        self.assertContadoresCoinciden()
+        self.assertEqual(self.libro.prestados, 0)
+
+
+# ============================
+# API JSON v1
+# ============================
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.lector = User.objects.create_user('lector', 'lector@example.com', 'clave')
+        cls.ana = Usuario.objects.create(user=cls.admin, nombre='Ana', apellido='Pérez', email='ana@example.com')
+        cls.luis = Usuario.objects.create(user=cls.lector, nombre='Luis', apellido='Gómez', email='luis@example.com')
+        autor = Autor.objects.create(nombre='Pedro Mir')
+        cls.libros = [
+            Libro.objects.create(
+                titulo=f'Libro {i}', isbn=f'97800000001{i:02d}', autor=autor,
+                fecha_publicacion=date(1950, 1, 1), paginas=100, ejemplares=2,
+            )
+            for i in range(7)
+        ]
+        cls.agotado = Libro.objects.create(
+            titulo='Agotado', isbn='9780000000200', autor=autor,
+            fecha_publicacion=date(1950, 1, 1), paginas=100, ejemplares=0,
+        )
+        for usuario, libro in [(cls.ana, cls.libros[0]), (cls.ana, cls.libros[1]), (cls.luis, cls.libros[2])]:
+            inventario.realizar_prestamo(Prestamo(usuario=usuario, libro=libro))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_campos_pedidos(self):
+        respuesta = self.client.get(reverse('api_libros'), {'fields': 'id,titulo,autor'})
+        self.assertEqual(respuesta.status_code, 200)
+        for fila in respuesta.json()['resultados']:
+            self.assertEqual(set(fila), {'id', 'titulo', 'autor'})
+        self.assertEqual(respuesta.json()['resultados'][0]['autor'], 'Pedro Mir')
+
+        respuesta = self.client.get(reverse('api_libros'), {'fields': 'id,clave'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('titulo', respuesta.json()['campos_validos'])
+
+    def test_recorrer_paginas_con_cursores(self):
+        url = reverse('api_libros')
+        paginas, parametros = [], {'limite': 3, 'fields': 'id'}
+        while True:
+            datos = self.client.get(url, parametros).json()
+            paginas.append([fila['id'] for fila in datos['resultados']])
+            if not datos['siguiente']:
+                break
+            parametros['despues'] = datos['siguiente']
+        ids = [pk for pagina in paginas for pk in pagina]
+        self.assertEqual(ids, sorted(Libro.objects.values_list('id', flat=True), reverse=True))
+        self.assertEqual(len(paginas), 3)
+
+        # Hacia atrás desde la última página se vuelven a ver las anteriores
+        anterior = datos['anterior']
+        for esperada in reversed(paginas[:-1]):
+            datos = self.client.get(url, {'limite': 3, 'fields': 'id', 'antes': anterior}).json()
+            self.assertEqual([fila['id'] for fila in datos['resultados']], esperada)
+            anterior = datos['anterior']
+        self.assertIsNone(anterior)
+
+    def test_cursor_no_valido(self):
+        respuesta = self.client.get(reverse('api_prestamos'), {'despues': 'basura'})
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_etag(self):
+        respuesta = self.client.get(reverse('api_libros'))
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.client.get(reverse('api_libros'), HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+
+    def test_lector_solo_ve_lo_suyo(self):
+        self.client.force_login(self.lector)
+        resultados = self.client.get(reverse('api_prestamos'), {'fields': 'id,usuario_id'}).json()['resultados']
+        self.assertEqual({fila['usuario_id'] for fila in resultados}, {self.luis.pk})
+        ajeno = Prestamo.objects.filter(usuario=self.ana).first()
+        self.assertEqual(self.client.get(reverse('api_prestamo', args=[ajeno.pk])).status_code, 404)
+        # El personal ve todos
+        self.client.force_login(self.admin)
+        self.assertEqual(len(self.client.get(reverse('api_prestamos')).json()['resultados']), 3)
+
+    def test_prestar_lote_sin_ejemplares_deshace_todo(self):
+        lote = [
+            {'usuario': self.luis.pk, 'libro': self.libros[3].pk},
+            {'usuario': self.luis.pk, 'libro': self.agotado.pk},
+        ]
+        respuesta = self.client.post(reverse('api_prestamos_lote'), json.dumps(lote), content_type='application/json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['indice'], 1)
+        self.assertFalse(Prestamo.objects.filter(libro=self.libros[3]).exists())
+        self.libros[3].refresh_from_db()
+        self.assertEqual(self.libros[3].prestados, 0)
+
+        respuesta = self.client.post(
+            reverse('api_prestamos_lote'), json.dumps(lote[:1]), content_type='application/json',
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json()['resultados'][0]['libro_id'], self.libros[3].pk)
+
+
+# ============================
+# Bandeja de salida de correos
+# ============================
+class BackendQueFalla(locmem.EmailBackend):
+    def send_messages(self, mensajes):
+        raise ConnectionRefusedError("SMTP caído")
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class BandejaSalidaTests(TestCase):
+
+    def test_encolar_y_enviar(self):
+        correo.encolar_correo("Aviso", "Tu libro vence mañana", ['ana@example.com', 'luis@example.com'])
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(correo.procesar_cola(), (2, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['ana@example.com', 'luis@example.com'])
+        self.assertEqual(mail.outbox[0].subject, "Aviso")
+        self.assertEqual(set(CorreoPendiente.objects.values_list('estado', flat=True)), {'enviado'})
+        # La cola ya está vacía
+        self.assertEqual(correo.procesar_cola(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_fallo_reintenta_con_espera(self):
+        correo.encolar_correo("Aviso", "Texto", ['ana@example.com'])
+        antes = timezone.now()
+        self.assertEqual(correo.procesar_cola(backend='hola.tests.BackendQueFalla'), (0, 1))
+        pendiente = CorreoPendiente.objects.get()
+        self.assertEqual(pendiente.estado, 'pendiente')
+        self.assertEqual(pendiente.intentos, 1)
+        self.assertIn("SMTP caído", pendiente.ultimo_error)
+        self.assertGreaterEqual(pendiente.proximo_intento, antes + timedelta(seconds=correo.ESPERA_BASE))
+        # Hasta que pase la espera no se vuelve a intentar
+        self.assertEqual(correo.procesar_cola(), (0, 0))
+
+        CorreoPendiente.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(correo.procesar_cola(backend='hola.tests.BackendQueFalla', max_intentos=2), (0, 1))
+        self.assertEqual(CorreoPendiente.objects.get().estado, 'fallido')
+
+    def test_correo_reclamado_no_se_envia_dos_veces(self):
+        correo.encolar_correo("Aviso", "Texto", ['ana@example.com'])
+        # Otro proceso ya reclamó el lote y lo está enviando
+        reclamados = correo._reclamar(correo.TAMANO_LOTE)
+        self.assertEqual(len(reclamados), 1)
+        self.assertEqual(correo.procesar_cola(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+        # Si ese proceso murió, el reclamo caduca y el correo se envía una vez
+        CorreoPendiente.objects.update(reclamado=timezone.now() - correo.RECLAMO_CADUCA - timedelta(seconds=1))
+        self.assertEqual(correo.procesar_cola(), (1, 0))
+        self.assertEqual(correo.procesar_cola(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+# ============================
+# Importación del catálogo
+# ============================
+def isbn_valido(numero):
+    doce = f'978{numero:09d}'
+    return doce + importacion._digito_isbn13(doce)
+
+
+def fila_catalogo(numero, **cambios):
+    fila = {
+        'titulo': f'Crónica {numero}', 'isbn': isbn_valido(numero), 'autor': 'Marcio Veloz Maggiolo',
+        'categoria': 'Novela', 'editorial': 'Editora Nacional', 'fecha_publicacion': '1981',
+        'paginas': '220', 'ejemplares': '2', 'etiquetas': 'caribe|clásico',
+    }
+    fila.update(cambios)
+    return fila
+
+
+class ImportacionTests(TestCase):
+
+    def test_normalizar_isbn(self):
+        self.assertEqual(importacion.normalizar_isbn('0-306-40615-2'), '9780306406157')
+        self.assertEqual(importacion.normalizar_isbn('978-84-376-0494-7'), '9788437604947')
+        self.assertIsNone(importacion.normalizar_isbn('978-84-376-0494-8'))
+        self.assertEqual(importacion.normalizar_isbn('978-84-376-0494-8', verificar_digito=False), '9788437604948')
+        self.assertIsNone(importacion.normalizar_isbn('0306406153'))
+        self.assertIsNone(importacion.normalizar_isbn('12345'))
+
+    def test_motivos_de_rechazo(self):
+        casos = {
+            'sin título': {'titulo': ' '},
+            'ISBN inválido': {'isbn': '123'},
+            'sin autor': {'autor': ''},
+            'fecha de publicación inválida': {'fecha_publicacion': 'ayer'},
+            'páginas inválidas': {'paginas': '0'},
+            'ejemplares inválidos': {'ejemplares': '-1'},
+            'estado inválido': {'estado': 'perdido'},
+        }
+        for motivo, cambios in casos.items():
+            with self.subTest(motivo=motivo):
+                self.assertEqual(importacion.preparar_fila(fila_catalogo(1, **cambios)), (None, motivo))
+        datos, motivo = importacion.preparar_fila(fila_catalogo(1))
+        self.assertIsNone(motivo)
+        self.assertEqual(datos['etiquetas'], ['caribe', 'clásico'])
+
+    def test_repetidos_y_existentes(self):
+        rechazos = []
+        filas = [fila_catalogo(1), fila_catalogo(2), fila_catalogo(1, titulo='Otra edición'), fila_catalogo(3, isbn='x')]
+        importacion.Importador(rechazo=lambda numero, fila, motivo: rechazos.append((numero, motivo))).importar(filas)
+        self.assertEqual(rechazos, [(4, 'ISBN inválido'), (3, 'ISBN repetido en el archivo')])
+        self.assertEqual(Libro.objects.count(), 2)
+
+        # Una segunda importación omite los ISBN que ya están en el catálogo
+        importador = importacion.Importador().importar([fila_catalogo(2), fila_catalogo(4)])
+        self.assertEqual((importador.creados, importador.existentes), (1, 1))
+        self.assertEqual(Libro.objects.count(), 3)
+        self.assertEqual(Autor.objects.filter(nombre='Marcio Veloz Maggiolo').count(), 1)
+
+    def test_reanudar_desde_el_ultimo_lote(self):
+        filas = [fila_catalogo(numero) for numero in range(1, 8)]
+
+        class Corte(Exception):
+            pass
+
+        def cortar(importador):
+            if importador.procesadas >= 4:
+                raise Corte
+
+        primero = importacion.Importador(lote=2, lote_confirmado=cortar)
+        with self.assertRaises(Corte):
+            primero.importar(filas)
+        self.assertEqual(Libro.objects.count(), 4)
+
+        segundo = importacion.Importador(lote=2).importar(filas, desde=primero.procesadas)
+        self.assertEqual((segundo.creados, segundo.existentes), (3, 0))
+        self.assertEqual(Libro.objects.count(), 7)
+        self.assertEqual(Libro.objects.values('isbn').distinct().count(), 7)
+
+    @skipUnless(busqueda.disponible(), "El índice FTS5 solo existe en SQLite")
+    def test_libros_importados_se_pueden_buscar(self):
+        importacion.Importador().importar([fila_catalogo(1, titulo='El oficio de vivir'), fila_catalogo(2)])
+        libro = Libro.objects.get(titulo='El oficio de vivir')
+        self.assertEqual(busqueda.buscar_ids('oficio'), [libro.id])
+        self.assertEqual(len(busqueda.buscar_ids(autor='veloz')), 2)
+        self.assertEqual(len(busqueda.buscar_ids('clasico')), 2)
+
+
+# ============================
+# Paginación por cursor
+# ============================
+class PaginacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('ana')
+        usuario = Usuario.objects.create(user=user, nombre='Ana', apellido='Pérez', email='ana@example.com')
+        autor = Autor.objects.create(nombre='Hilma Contreras')
+        libro = Libro.objects.create(
+            titulo='La tierra está bramando', isbn='9780000000301', autor=autor,
+            fecha_publicacion=date(1986, 1, 1), paginas=180, ejemplares=30,
+        )
+        Prestamo.objects.bulk_create([
+            Prestamo(usuario=usuario, libro=libro, fecha_limite=date.today()) for _ in range(23)
+        ])
+        # Muchos préstamos con la misma fecha: el desempate es el id
+        ids = list(Prestamo.objects.order_by('id').values_list('id', flat=True))
+        base = timezone.now().replace(microsecond=0)
+        for grupo, inicio in enumerate(range(0, len(ids), 8)):
+            Prestamo.objects.filter(id__in=ids[inicio:inicio + 8]).update(fecha_prestamo=base - timedelta(days=grupo))
+
+    def test_recorrer_en_ambos_sentidos_con_fechas_repetidas(self):
+        consulta = Prestamo.objects.all()
+        esperados = list(consulta.order_by('-fecha_prestamo', '-id').values_list('id', flat=True))
+
+        paginas, cursor = [], None
+        while True:
+            pagina = paginacion.paginar(consulta, 'fecha_prestamo', despues=cursor, tamano=5)
+            paginas.append([prestamo.id for prestamo in pagina])
+            if not pagina.siguiente:
+                break
+            cursor = pagina.siguiente
+        self.assertEqual([pk for ids in paginas for pk in ids], esperados)
+
+        cursor = pagina.anterior
+        for esperada in reversed(paginas[:-1]):
+            pagina = paginacion.paginar(consulta, 'fecha_prestamo', antes=cursor, tamano=5)
+            self.assertEqual([prestamo.id for prestamo in pagina], esperada)
+            cursor = pagina.anterior
+        self.assertIsNone(cursor)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 from django.contrib.auth import views as auth_views
 
 
@@ -78,8 +78,27 @@ urlpatterns = [
     path('devolver/<int:libro_id>/', views.devolver_libro, name='devolver_libro'),
     path('sitemap/', views.sitemap_html, name='sitemap'),
     # URL para actualizar inventario
-    path('inventario/actualizar/', views. actualizar_inventario_y_estadisticas, name='actualizar_inventario'),
+    path('inventario/actualizar/', views.actualizar_inventario, name='actualizar_inventario'),
+    path('autocompletar/libros/', views.autocompletar_libros, name='autocompletar_libros'),
+    path('autocompletar/usuarios/', views.autocompletar_usuarios, name='autocompletar_usuarios'),
     path('multas/', views.listar_multas_notificacion, name='listar_multas_notificacion'),
+    path('prestamos/exportar/', views.exportar_prestamos, name='exportar_prestamos'),
+    path('reservas/exportar/', views.exportar_reservas, name='exportar_reservas'),
+    path('multas/exportar/', views.exportar_multas, name='exportar_multas'),
+
+    # ----------------------
+    # API JSON v1 (hola/api.py)
+    # ----------------------
+    path('api/v1/libros/', api.lista, {'recurso': 'libros'}, name='api_libros'),
+    path('api/v1/libros/<int:pk>/', api.detalle, {'recurso': 'libros'}, name='api_libro'),
+    path('api/v1/prestamos/', api.lista, {'recurso': 'prestamos'}, name='api_prestamos'),
+    path('api/v1/prestamos/<int:pk>/', api.detalle, {'recurso': 'prestamos'}, name='api_prestamo'),
+    path('api/v1/prestamos/lote/', api.prestamos_lote, name='api_prestamos_lote'),
+    path('api/v1/devoluciones/lote/', api.devoluciones_lote, name='api_devoluciones_lote'),
+    path('api/v1/reservas/', api.lista, {'recurso': 'reservas'}, name='api_reservas'),
+    path('api/v1/reservas/<int:pk>/', api.detalle, {'recurso': 'reservas'}, name='api_reserva'),
+    path('api/v1/multas/', api.lista, {'recurso': 'multas'}, name='api_multas'),
+    path('api/v1/multas/<int:pk>/', api.detalle, {'recurso': 'multas'}, name='api_multa'),
     
 
 
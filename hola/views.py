@@ -3,23 +3,33 @@ from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.db.models import Count, F
-from django.db.models.functions import TruncDate
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Prefetch
 from django.dispatch import receiver
 from django.utils import timezone
 from django.db.models.signals import post_save
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
-from datetime import date
-from django.core.mail import send_mail
-from .models import Perfil, Usuario, Libro, Prestamo, Reserva, Categoria, Autor, Multa, Notificacion
+import json
+from asgiref.sync import sync_to_async
+from .models import Perfil, Usuario, Libro, Prestamo, Reserva, Categoria, Autor, Multa, Escritor
+from . import autocompletar, busqueda, exports, inventario, multas, paginacion
+from . import estadisticas as acumulados
+from .correo import aencolar_correo
+from .cache_http import pagina_cacheada, version_catalogo
+from .routers import usar_base_lectura
 from .forms import (
     PerfilForm, PrestamoForm, ReservaForm, LibroForm, UsuarioForm,
-    BuscarLibroForm, CustomUserCreationForm
+    BuscarLibroForm, CustomUserCreationForm, FiltroPrestamosForm, FiltroReservasForm, FiltroMultasForm
 )
 
 User = get_user_model()
 
+# Las vistas asíncronas consultan con el ORM asíncrono y renderizan en un
+# hilo: las plantillas pueden tocar la sesión, request.user o formularios
+arender = sync_to_async(render)
+
 # =========================
 # LOGIN / LOGOUT / REGISTRO
 # =========================
@@ -109,15 +119,14 @@ def prestamos(request):
 
     if request.method == 'POST' and form.is_valid():
         libro = form.cleaned_data['libro']
-        if libro.disponible_real <= 0:
-            messages.error(request, f"El libro '{libro.titulo}' no tiene ejemplares disponibles.")
-            return redirect('prestamos')
-
         prestamo = form.save(commit=False)
         if not es_admin:
             prestamo.usuario = usuario_logueado
-        prestamo.save()
-        Libro.objects.filter(id=libro.id).update(ejemplares=F('ejemplares') - 1)
+        try:
+            inventario.realizar_prestamo(prestamo)
+        except inventario.LibroNoDisponible:
+            messages.error(request, f"El libro '{libro.titulo}' no tiene ejemplares disponibles.")
+            return redirect('prestamos')
         messages.success(request, f"Préstamo del libro '{libro.titulo}' guardado correctamente.")
         form = PrestamoForm(usuario_logueado=usuario_logueado)
 
@@ -156,45 +165,56 @@ def es_bibliotecario(user):
 # =========================
 
 @login_required
-def libros_view(request):
-    user = request.user
+async def libros_view(request):
+    user = await request.auser()
 
     es_admin = (
         user.is_superuser or 
-        user.groups.filter(name="Bibliotecario").exists()
+        await user.groups.filter(name="Bibliotecario").aexists()
     )
 
     # ✅ Si envía formulario GUARDAMOS
     if request.method == "POST" and es_admin:
-        form = LibroForm(request.POST)
-        if form.is_valid():
-            form.save()
+        form = LibroForm(request.POST, request.FILES)
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(form.save)()
             messages.success(request, "Libro guardado correctamente ✅")
             return redirect('libros')  # 👉 Recarga la página y se ve en la lista
     else:
         form = LibroForm() if es_admin else None
 
     # ✅ Lista + filtros búsqueda como ya tenías ✅
-    libros = Libro.objects.select_related("autor", "categoria").all()
+    libros = Libro.objects.select_related("autor", "categoria", "editorial").with_availability()
 
+    q = request.GET.get("q", "")
     titulo = request.GET.get("titulo", "")
     autor = request.GET.get("autor", "")
     categoria = request.GET.get("categoria", "")
 
-    if titulo:
-        libros = libros.filter(titulo__icontains=titulo)
-    if autor:
-        libros = libros.filter(autor__nombre__icontains=autor)
-    if categoria:
-        libros = libros.filter(categoria__nombre__icontains=categoria)
-
-    categorias = Categoria.objects.all()
-
-    return render(request, 'hola/Libro.html', {
+    if busqueda.disponible() and (q or titulo or autor or categoria):
+        # Búsqueda FTS5: sin acentos y ordenada por relevancia
+        ids = await sync_to_async(busqueda.buscar_ids)(q, titulo=titulo, autor=autor, categoria=categoria)
+        posicion = {libro_id: i for i, libro_id in enumerate(ids)}
+        libros = sorted([libro async for libro in libros.filter(id__in=ids)], key=lambda libro: posicion[libro.id])
+    else:
+        if q:
+            libros = libros.filter(titulo__icontains=q)
+        if titulo:
+            libros = libros.filter(titulo__icontains=titulo)
+        if autor:
+            libros = libros.filter(autor__nombre__icontains=autor)
+        if categoria:
+            libros = libros.filter(categoria__nombre__icontains=categoria)
+        libros = [libro async for libro in libros]
+
+    categorias = [categoria async for categoria in Categoria.objects.all()]
+
+    return await arender(request, 'hola/Libro.html', {
         'libros': libros,
         'categorias': categorias,
         'form': form,
         'es_admin': es_admin,
+        'q': q,
         'titulo': titulo,
         'autor': autor,
         'categoria': categoria,
@@ -212,16 +232,14 @@ def prestamos(request):
 
     if request.method == 'POST' and form.is_valid():
         libro = form.cleaned_data['libro']
-        if libro.disponible_real <= 0:
-            messages.error(request, f"El libro '{libro.titulo}' no tiene ejemplares disponibles.")
-            return redirect('prestamos')
-
         prestamo = form.save(commit=False)
         if not es_admin:
             prestamo.usuario = usuario_logueado
-        prestamo.save()
-        Libro.objects.filter(id=libro.id).update(ejemplares=F('ejemplares') - 1)
-        actualizar_inventario_y_estadisticas() 
+        try:
+            inventario.realizar_prestamo(prestamo)
+        except inventario.LibroNoDisponible:
+            messages.error(request, f"El libro '{libro.titulo}' no tiene ejemplares disponibles.")
+            return redirect('prestamos')
         messages.success(request, f"Préstamo del libro '{libro.titulo}' guardado correctamente.")
         form = PrestamoForm(usuario_logueado=usuario_logueado)
 
@@ -234,37 +252,48 @@ def devolver_prestamo(request, pk):
         messages.warning(request, "Este préstamo ya fue devuelto.")
         return redirect("listaprestamos")
 
-    prestamo.devuelto = True
-    prestamo.fecha_devolucion = date.today()
-    prestamo.save()
-    Libro.objects.filter(id=prestamo.libro.id).update(ejemplares=F('ejemplares') + 1)
-    actualizar_inventario_y_estadisticas()
-
-    retraso = (prestamo.fecha_devolucion - prestamo.fecha_limite).days
-    if retraso > 0:
-        monto = retraso * 100
-        Multa.objects.create(prestamo=prestamo, monto=monto)
-        Notificacion.objects.create(
-            usuario=prestamo.usuario,
-            prestamo=prestamo,
-            mensaje=f"Tienes una multa de ${monto} por devolver con {retraso} día(s) de retraso."
-        )
+    try:
+        monto = inventario.realizar_devolucion(prestamo)
+    except inventario.PrestamoYaDevuelto:
+        messages.warning(request, "Este préstamo ya fue devuelto.")
+        return redirect("listaprestamos")
+
+    if monto:
         messages.error(request, f"Libro devuelto con retraso. Multa generada: ${monto}")
     else:
-        Notificacion.objects.create(
-            usuario=prestamo.usuario,
-            prestamo=prestamo,
-            mensaje="Has devuelto tu libro a tiempo. ¡Gracias!"
-        )
         messages.success(request, "Libro devuelto correctamente y sin multa.")
 
     return redirect("listaprestamos")
 
+def _filtrar_listado(queryset, filtros, campo_fecha, con_hora=False):
+    """
+    Aplica los filtros comunes (rango de fechas y usuario) de los listados paginados.
+    """
+    if not filtros.is_valid():
+        return queryset
+    datos = filtros.cleaned_data
+    queryset = queryset.filter(**paginacion.rango_fechas(campo_fecha, datos['desde'], datos['hasta'], con_hora))
+    if datos.get('usuario'):
+        queryset = queryset.filter(usuario_id=datos['usuario'])
+    return queryset
+
 @login_required
 def listaprestamos(request):
     es_admin = request.user.is_superuser or es_bibliotecario(request.user)
-    prestamos = Prestamo.objects.select_related('usuario','libro').prefetch_related('multa_set')
-    return render(request, 'hola/listaprestamos.html', {'prestamos': prestamos, 'es_admin': es_admin})
+    filtros = FiltroPrestamosForm(request.GET or None)
+    prestamos = _filtrar_listado(
+        Prestamo.objects.select_related('usuario', 'libro'), filtros, 'fecha_prestamo', con_hora=True
+    )
+    if filtros.is_valid() and filtros.cleaned_data['devuelto']:
+        prestamos = prestamos.filter(devuelto=filtros.cleaned_data['devuelto'] == 'si')
+    pagina = paginacion.paginar(prestamos, 'fecha_prestamo', request.GET.get('despues'), request.GET.get('antes'))
+    return render(request, 'hola/listaprestamos.html', {
+        'prestamos': pagina,
+        'filtros': filtros,
+        'parametros': paginacion.parametros_sin_cursor(request),
+        'es_admin': es_admin,
+        'url_exportar': reverse('exportar_prestamos') if es_admin else None,
+    })
 
 @login_required
 def eliminar_prestamos(request):
@@ -272,9 +301,12 @@ def eliminar_prestamos(request):
         ids = request.POST.getlist('prestamos_ids')
         es_admin = request.user.is_superuser or es_bibliotecario(request.user)
         if es_admin:
-            Prestamo.objects.filter(id__in=ids).delete()
+            seleccionados = Prestamo.objects.filter(id__in=ids)
         else:
-            Prestamo.objects.filter(id__in=ids, usuario__user=request.user).delete()
+            seleccionados = Prestamo.objects.filter(id__in=ids, usuario__user=request.user)
+        with transaction.atomic():
+            inventario.descontar_prestamos_eliminados(seleccionados)
+            seleccionados.delete()
     return redirect('listaprestamos')
 
 @login_required
@@ -297,13 +329,15 @@ def reservas(request):
             if not es_admin:
                 reserva.usuario = usuario_logueado
             reserva.estado = 'activo'
-            reserva.save()
+            with transaction.atomic():
+                reserva.save()
+                inventario.registrar_reserva(reserva.libro_id, reserva.estado, reserva.fecha_inicio)
             messages.success(request, f"Reserva del libro '{reserva.libro.titulo}' guardada correctamente ✅")
             return redirect('mis_reservas')
     else:
         form = ReservaForm(usuario_logueado=usuario_logueado)
 
-    libros = [libro for libro in Libro.objects.all() if libro.disponible_real > 0]
+    libros = Libro.objects.disponibles()
     return render(request, "hola/reservas.html", {"form": form, "libros": libros, "es_admin": es_admin})
 
 
@@ -329,8 +363,20 @@ def perfil_usuario(request):
 @login_required
 def listaprestamos(request):
     es_admin = request.user.is_superuser or es_bibliotecario(request.user)
-    prestamos = Prestamo.objects.select_related('usuario','libro').prefetch_related('multa_set')
-    return render(request, 'hola/listaprestamos.html', {'prestamos': prestamos, 'es_admin': es_admin})
+    filtros = FiltroPrestamosForm(request.GET or None)
+    prestamos = _filtrar_listado(
+        Prestamo.objects.select_related('usuario', 'libro'), filtros, 'fecha_prestamo', con_hora=True
+    )
+    if filtros.is_valid() and filtros.cleaned_data['devuelto']:
+        prestamos = prestamos.filter(devuelto=filtros.cleaned_data['devuelto'] == 'si')
+    pagina = paginacion.paginar(prestamos, 'fecha_prestamo', request.GET.get('despues'), request.GET.get('antes'))
+    return render(request, 'hola/listaprestamos.html', {
+        'prestamos': pagina,
+        'filtros': filtros,
+        'parametros': paginacion.parametros_sin_cursor(request),
+        'es_admin': es_admin,
+        'url_exportar': reverse('exportar_prestamos') if es_admin else None,
+    })
 
 @login_required
 def eliminar_prestamos(request):
@@ -338,9 +384,12 @@ def eliminar_prestamos(request):
         ids = request.POST.getlist('prestamos_ids')
         es_admin = request.user.is_superuser or es_bibliotecario(request.user)
         if es_admin:
-            Prestamo.objects.filter(id__in=ids).delete()
+            seleccionados = Prestamo.objects.filter(id__in=ids)
         else:
-            Prestamo.objects.filter(id__in=ids, usuario__user=request.user).delete()
+            seleccionados = Prestamo.objects.filter(id__in=ids, usuario__user=request.user)
+        with transaction.atomic():
+            inventario.descontar_prestamos_eliminados(seleccionados)
+            seleccionados.delete()
     return redirect('listaprestamos')
 
 @login_required
@@ -369,12 +418,14 @@ def reservas(request):
             if not es_admin:
                 reserva.usuario = usuario_logueado
             reserva.estado = 'activo'
-            reserva.save()
+            with transaction.atomic():
+                reserva.save()
+                inventario.registrar_reserva(reserva.libro_id, reserva.estado, reserva.fecha_inicio)
             messages.success(request, f"Reserva del libro '{reserva.libro.titulo}' guardada correctamente ✅")
             return redirect('mis_reservas')
 
     # Lista de libros disponibles
-    libros = [libro for libro in Libro.objects.all() if libro.disponible_real > 0]
+    libros = Libro.objects.disponibles()
 
     # Lista de usuarios para el formulario
     usuarios = Usuario.objects.all() if es_admin else [usuario_logueado]
@@ -391,34 +442,37 @@ def reservas(request):
 @login_required
 def mis_reservas(request):
     usuario = get_object_or_404(Usuario, user=request.user)
-    reservas = Reserva.objects.filter(usuario=usuario).select_related('libro').order_by('-fecha_inicio')
-    return render(request, "hola/mis_reservas.html", {'reservas': reservas})
+    filtros = FiltroReservasForm(request.GET or None)
+    del filtros.fields['usuario']  # siempre son las del usuario actual
+    reservas = _filtrar_listado(Reserva.objects.filter(usuario=usuario).select_related('libro'), filtros, 'fecha_inicio')
+    if filtros.is_valid() and filtros.cleaned_data['estado']:
+        reservas = reservas.filter(estado=filtros.cleaned_data['estado'])
+    pagina = paginacion.paginar(reservas, 'fecha_inicio', request.GET.get('despues'), request.GET.get('antes'))
+    return render(request, "hola/mis_reservas.html", {
+        'reservas': pagina,
+        'filtros': filtros,
+        'parametros': paginacion.parametros_sin_cursor(request),
+    })
 
 
 
 
-def estadisticas(request):
-    # Total de préstamos
-    total_prestamos = Prestamo.objects.count()
-    
-    # Total de reservas
-    total_reservas = Reserva.objects.count()
+@usar_base_lectura
+async def estadisticas(request):
+    # Totales de préstamos y reservas (contadores de inventario)
+    totales = await inventario.aresumen()
+    total_prestamos = totales['total_prestamos']
+    total_reservas = totales['total_reservas']
     
     # Usuarios registrados
-    usuarios_activos = Usuario.objects.count()
-    
-    # Top 5 libros prestados
-    top_prestados = Prestamo.objects.values('libro__titulo')\
-        .annotate(total=Count('libro'))\
-        .order_by('-total')[:5]
+    usuarios_activos = await Usuario.objects.acount()
     
-    # Top 5 libros reservados
-    top_reservados = Reserva.objects.values('libro__titulo')\
-        .annotate(total=Count('libro'))\
-        .order_by('-total')[:5]
+    # Top 5 libros prestados / reservados (estadísticas acumuladas)
+    top_prestados = await acumulados.atop_libros('total_prestamos')
+    top_reservados = await acumulados.atop_libros('total_reservas')
     
     # Préstamos por día para gráfico
-    prestamos_por_dia = Prestamo.objects.extra({'dia': "date(fecha_prestamo)"}).values('dia').annotate(total=Count('id')).order_by('dia')
+    prestamos_por_dia = await acumulados.aserie_diaria('prestamos')
 
     context = {
         'total_prestamos': total_prestamos,
@@ -426,45 +480,65 @@ def estadisticas(request):
         'usuarios_activos': usuarios_activos,
         'top_prestados': top_prestados,
         'top_reservados': top_reservados,
-        'prestamos_por_dia': prestamos_por_dia
+        'prestamos_por_dia': prestamos_por_dia,
+        'top_prestados_json': json.dumps(top_prestados),
+        'top_reservados_json': json.dumps(top_reservados),
+        'prestamos_por_dia_json': json.dumps(prestamos_por_dia),
     }
     
-    return render(request, 'hola/reportesestadisticas.html', context)
+    return await arender(request, 'hola/reportesestadisticas.html', context)
 
 
 @login_required
 def marcar_reserva_finalizado(request, reserva_id):
     reserva = get_object_or_404(Reserva, id=reserva_id)
+    estado_anterior = reserva.estado
     reserva.estado = 'finalizado'
-    reserva.save()
+    with transaction.atomic():
+        reserva.save()
+        inventario.registrar_cambio_estado_reserva(reserva.libro_id, estado_anterior, reserva.estado)
     return redirect('lista_reservas')
 
 @login_required
 def limpiar_reserva(request, reserva_id):
     reserva = get_object_or_404(Reserva, id=reserva_id)
-    reserva.delete()
+    with transaction.atomic():
+        inventario.aplicar_cambio_reserva((reserva.libro_id, reserva.estado), None)
+        reserva.delete()
     messages.success(request, "Reserva eliminada correctamente.")
     return redirect('lista_reservas')
 
 @login_required
 def limpiar_todas_reservas(request):
-    Reserva.objects.all().delete()
+    with transaction.atomic():
+        inventario.descontar_reservas_eliminadas(Reserva.objects.all())
+        Reserva.objects.all().delete()
     messages.success(request, "Todas las reservas se han eliminado correctamente.")
     return redirect('lista_reservas')
 
 @login_required
 def limpiar_reservas_finalizadas(request):
     finalizadas = Reserva.objects.filter(estado='finalizado')
-    count = finalizadas.count()
-    finalizadas.delete()
+    with transaction.atomic():
+        inventario.descontar_reservas_eliminadas(finalizadas)
+        count, _ = finalizadas.delete()
     messages.success(request, f"{count} reservas finalizadas fueron eliminadas correctamente.")
     return redirect('reservas')
 
 @login_required
 def lista_reservas(request):
     if request.user.is_superuser or es_bibliotecario(request.user):
-        reservas = Reserva.objects.select_related('usuario', 'libro').order_by('-fecha_inicio')
-        return render(request, 'hola/lista_reservas.html', {'reservas': reservas})
+        filtros = FiltroReservasForm(request.GET or None)
+        reservas = _filtrar_listado(Reserva.objects.select_related('usuario', 'libro'), filtros, 'fecha_inicio')
+        if filtros.is_valid() and filtros.cleaned_data['estado']:
+            reservas = reservas.filter(estado=filtros.cleaned_data['estado'])
+        pagina = paginacion.paginar(reservas, 'fecha_inicio', request.GET.get('despues'), request.GET.get('antes'))
+        return render(request, 'hola/lista_reservas.html', {
+            'reservas': pagina,
+            'filtros': filtros,
+            'parametros': paginacion.parametros_sin_cursor(request),
+            'url_exportar': reverse('exportar_reservas'),
+        })
     messages.error(request, "No tienes permiso para ver esta página.")
     return redirect('principal')
 
@@ -505,323 +579,171 @@ def editar_perfil(request):
 # INVENTARIO
 # =========================
 @login_required
+@usar_base_lectura
 def inventario_sgb(request):
     if not request.user.is_superuser:
         return redirect('principal')
 
-    libros = Libro.objects.all()
-    inventario = []
-
-    for libro in libros:
-        # Prestamos activos (no devueltos)
-        prestados = Prestamo.objects.filter(libro=libro, devuelto=False).count()
-        # Reservas activas/pendientes
-        reservados = Reserva.objects.filter(libro=libro, estado__in=['activo', 'pendiente']).count()
-        # Disponibles reales
-        disponible = max(libro.ejemplares - prestados - reservados, 0)
-
-        inventario.append({
-            'id': libro.id,
-            'titulo': libro.titulo,
-            'ejemplares': libro.ejemplares,
-            'prestados_real': prestados,
-            'reservados_real': reservados,
-            'disponible_real': disponible,
-        })
+    orden = request.GET.get('orden', 'titulo')
+    if orden not in inventario.ORDENES_INVENTARIO:
+        orden = 'titulo'
+    filas = inventario.consulta_inventario(orden)
 
-    # Estadísticas básicas (opcional)
-    total_prestamos = Prestamo.objects.count()
-    total_reservas = Reserva.objects.count()
+    # Exportación completa en streaming (memoria constante)
+    if request.GET.get('exportar') == 'csv':
+        return exports.respuesta_csv(*exports.exportar_inventario(orden), request=request)
+
+    pagina = Paginator(filas, 50).get_page(request.GET.get('page'))
+
+    # Estadísticas básicas (contadores de inventario)
+    totales = inventario.resumen()
 
     return render(request, 'hola/inventario_sgb.html', {
-        'inventario': inventario,
-        'total_prestamos': total_prestamos,
-        'total_reservas': total_reservas,
+        'inventario': pagina.object_list,
+        'page_obj': pagina,
+        'orden': orden,
+        'total_prestamos': totales['total_prestamos'],
+        'total_reservas': totales['total_reservas'],
     })
 
 
+# =========================
+# EXPORTACIONES CSV (circulación)
+# =========================
+def _exportar(request, formulario, exportacion, campo_si_no=None):
+    """
+    CSV filtrado por la querystring. Un filtro no válido responde 400 con
+    los errores: ignorarlo exportaría la tabla entera.
+    """
+    if not formulario.is_valid():
+        return JsonResponse(
+            {'error': "Filtros no válidos", 'errores': formulario.errors.get_json_data()}, status=400
+        )
+    filtros = {campo: valor for campo, valor in formulario.cleaned_data.items() if valor not in (None, '')}
+    if campo_si_no and campo_si_no in filtros:
+        filtros[campo_si_no] = filtros[campo_si_no] == 'si'
+    return exports.respuesta_csv(*exportacion(**filtros), request=request)
+
+@login_required
+@usar_base_lectura
+def exportar_prestamos(request):
+    if not (request.user.is_superuser or es_bibliotecario(request.user)):
+        return redirect('principal')
+    return _exportar(request, FiltroPrestamosForm(request.GET), exports.exportar_prestamos, 'devuelto')
+
+@login_required
+@usar_base_lectura
+def exportar_reservas(request):
+    if not (request.user.is_superuser or es_bibliotecario(request.user)):
+        return redirect('principal')
+    return _exportar(request, FiltroReservasForm(request.GET), exports.exportar_reservas)
+
+@login_required
+@usar_base_lectura
+def exportar_multas(request):
+    if not request.user.is_superuser:
+        return redirect('principal')
+    return _exportar(request, FiltroMultasForm(request.GET), exports.exportar_multas, 'pagada')
+
+
+@login_required
 def generar_multas(request):
-    prestamos_vencidos = Prestamo.objects.filter(devuelto=False, fecha_limite__lt=date.today())
-
-    for prestamo in prestamos_vencidos:
-        retraso = (date.today() - prestamo.fecha_limite).days
-        if retraso > 0:
-            # Crear o actualizar la multa según días de retraso
-            multa, created = Multa.objects.get_or_create(prestamo=prestamo)
-            multa.monto = retraso * 100  # ajusta según tu regla
-            multa.save()
-
-            # Crear o actualizar notificación
-            noti, _ = Notificacion.objects.get_or_create(
-                usuario=prestamo.usuario,
-                prestamo=prestamo,
-            )
-            noti.mensaje = f"Tienes una multa de ${multa.monto} por el libro '{prestamo.libro.titulo}'."
-            noti.save()
+    if not request.user.is_superuser:
+        return redirect('principal')
 
-    return HttpResponse("Multas y notificaciones generadas ✅")
+    resultado = multas.generar_multas()
+    return HttpResponse(
+        f"Multas y notificaciones generadas ✅ "
+        f"({resultado['multas_creadas']} nuevas, {resultado['multas_actualizadas']} actualizadas)"
+    )
 
+@pagina_cacheada()
 def contacto(request):
     return render(request, 'hola/contacto.html')  # o la plantilla que uses
 
 
 
+@pagina_cacheada(version_catalogo)
 def galerialibro(request):
-    libros = list(Libro.objects.all())
-
-    # Asignar la imagen a cada libro manualmente
-    imagenes = [
-        "CasaDeEspiritus.png",
-        "CienAñosSoledad.png",
-        "DonQuijote.png",
-        "PoesiaCompleta.png",
-        "TierraDeAlborada.png",
-        "LaciudadYLosperros.png",
-        "Elprincipito.png",
-        "LaberintoSoledad.png",
-        "CuentosDeLaselva.png",
-        "ElReinoDelReves.png",
-        "LaInvencionDelMorel.png",
-        "LaMaňosa.png"
-    ]
-
-    # Agregar la propiedad imagen_nombre a cada libro
-    for i, libro in enumerate(libros):
-        libro.imagen_nombre = imagenes[i] if i < len(imagenes) else "default.png"
+    libros = Libro.objects.select_related('autor').with_availability()
 
     return render(request, "hola/galerialibro.html", {"libros": libros})
 
 
 
+@pagina_cacheada(version_catalogo)
 def escritores(request):
-    escritores = [
-        {'nombre': 'Gabriel García Márquez', 'slug': 'gabriel-garcia-marquez', 'imagen': 'hola/js/gabrielgarciamarquez.jpg'},
-        {'nombre': 'Isabel Allende', 'slug': 'isabel-allende', 'imagen': 'hola/js/IsabelAllende.png'},
-        {'nombre': 'Miguel de Cervantes', 'slug': 'miguel-cervantes', 'imagen': 'hola/js/MiguelCervante.png'},
-        {'nombre': 'María Elena Walsh', 'slug': 'maria-elena-walsh', 'imagen': 'hola/js/MariaElenWalsh.png'},
-        {'nombre': 'Juan Bosch', 'slug': 'juan-bosch', 'imagen': 'hola/js/JuanBosh.png'},
-        {'nombre': 'Mario Vargas Llosa', 'slug': 'mario-vargas-llosa', 'imagen': 'hola/js/MarioVargaLLosa.png'},
-        {'nombre': 'Pedro Mir', 'slug': 'pedro-mir', 'imagen': 'hola/js/PedroMir.png'},
-        {'nombre': 'Octavio Paz', 'slug': 'octavio-paz', 'imagen': 'hola/js/OctavioPaz.png'},
-        {'nombre': 'Pablo Neruda', 'slug': 'pablo-neruda', 'imagen': 'hola/js/PabloNeruda.png'},
-        {'nombre': 'Antoine de Saint-Exupéry', 'slug': 'antoine-de-saint-exupery', 'imagen': 'hola/js/AntonioDeSaint.png'},
-        {'nombre': 'Horacio Quiroga', 'slug': 'horacio-quiroga', 'imagen': 'hola/js/HoracioQuiroga.png'},
-        {'nombre': 'Adolfo Bioy Casares', 'slug': 'adolfo-bioy-casares', 'imagen': 'hola/js/AdolfoBIOYCas.png'},
-    ]
+    escritores = Escritor.objects.select_related('autor')
     return render(request, 'hola/escritores.html', {'escritores': escritores})
 
 
+@pagina_cacheada(version_catalogo)
 def detalle_escritor(request, slug):
-  
-    escritores_detalle = {
-        'gabriel-garcia-marquez': {
-            'nombre': 'Gabriel García Márquez',
-            'imagen': 'hola/js/gabrielgarciamarquez.jpg',
-            'biografia': 'Escritor colombiano, premio Nobel de Literatura en 1982, conocido por su obra maestra "Cien Años de Soledad".',
-            'libros': [
-                {'titulo': 'Cien Años de Soledad', 'url': 'https://www.google.com/search?q=Cien+Años+de+Soledad'},
-                {'titulo': 'El Otoño del Patriarca', 'url': 'https://www.google.com/search?q=El+Otoño+del+Patriarca'},
-                {'titulo': 'Crónica de una Muerte Anunciada', 'url': 'https://www.google.com/search?q=Crónica+de+una+Muerte+Anunciada'},
-                {'titulo': 'El General en su Labio de Hierro', 'url': 'https://www.google.com/search?q=El+General+en+su+Labio+de+Hierro'},
-                {'titulo': 'Del Amor y Otros Demonios', 'url': 'https://www.google.com/search?q=Del+Amor+y+Otros+Demonios'}
-            ]
-        },
-        
-        
-        'isabel-allende': {
-            'nombre': 'Isabel Allende',
-            'imagen': 'hola/js/IsabelAllende.png',
-            'biografia': 'Escritora chilena conocida por novelas como "La Casa de los Espíritus", con gran influencia del realismo mágico.',
-            'libros': [
-                {'titulo': 'La Casa de los Espíritus', 'url': 'https://www.google.com/search?q=La+Casa+de+los+Espíritus'},
-                {'titulo': 'Eva Luna', 'url': 'https://www.google.com/search?q=Eva+Luna'},
-                {'titulo': 'Paula', 'url': 'https://www.google.com/search?q=Paula+Isabel+Allende'},
-                {'titulo': 'Hija de la Fortuna', 'url': 'https://www.google.com/search?q=Hija+de+la+Fortuna'},
-                {'titulo': 'El Plan Infinito', 'url': 'https://www.google.com/search?q=El+Plan+Infinito'}
-            ]
-        },
-        # ... Agrega los demás escritores aquí ...
-        'pablo-neruda': {
-            'nombre': 'Pablo Neruda',
-            'imagen': 'hola/js/PabloNeruda.png',
-            'biografia': 'Poeta chileno, premio Nobel de Literatura 1971, conocido por su poesía romántica y social.',
-            'libros': [
-                {'titulo': 'Veinte Poemas de Amor y una Canción Desesperada', 'url': 'https://www.google.com/search?q=Veinte+Poemas+de+Amor+y+una+Canción+Desesperada'},
-                {'titulo': 'Canto General', 'url': 'https://www.google.com/search?q=Canto+General'},
-                {'titulo': 'Residencia en la Tierra', 'url': 'https://www.google.com/search?q=Residencia+en+la+Tierra'},
-                {'titulo': 'Odisea de una Soledad', 'url': 'https://www.google.com/search?q=Odisea+de+una+Soledad'},
-                {'titulo': 'Confieso que he Vivido', 'url': 'https://www.google.com/search?q=Confieso+que+he+Vivido'}
-            ]
-        },
-        'maria-elena-walsh': {
-    'nombre': 'María Elena Walsh',
-    'imagen': 'hola/js/MariaElenWalsh.png',
-    'biografia': 'Escritora y poeta argentina, famosa por su literatura infantil y compromiso social.',
-    'libros': [
-        {'titulo': 'Manuelita', 'url': 'https://www.google.com/search?q=Manuelita'},
-        {'titulo': 'El Reino del Revés', 'url': 'https://www.google.com/search?q=El+Reino+del+Revés'},
-        {'titulo': 'Dailan Kifki', 'url': 'https://www.google.com/search?q=Dailan+Kifki'},
-        {'titulo': 'Canciones para mirar', 'url': 'https://www.google.com/search?q=Canciones+para+mirar'},
-        {'titulo': 'Versos rimados', 'url': 'https://www.google.com/search?q=Versos+rimados'}
-    ]
-},
-'juan-bosch': {
-    'nombre': 'Juan Bosch',
-    'imagen': 'hola/js/JuanBosh.png',
-    'biografia': 'Escritor y político dominicano, fundador del Partido Revolucionario Dominicano y prolífico cuentista.',
-    'libros': [
-        {'titulo': 'Cuentos escritos en el exilio', 'url': 'https://www.google.com/search?q=Cuentos+escritos+en+el+exilio'},
-        {'titulo': 'La Mañosa', 'url': 'https://www.google.com/search?q=La+Mañosa'},
-        {'titulo': 'Camino Real', 'url': 'https://www.google.com/search?q=Camino+Real'},
-        {'titulo': 'La manigua', 'url': 'https://www.google.com/search?q=La+manigua'},
-        {'titulo': 'Vino con lluvia', 'url': 'https://www.google.com/search?q=Vino+con+lluvia'}
-    ]
-},
-'mario-vargas-llosa': {
-    'nombre': 'Mario Vargas Llosa',
-    'imagen': 'hola/js/MarioVargaLLosa.png',
-    'biografia': 'Escritor peruano, premio Nobel de Literatura 2010, conocido por novelas políticas y sociales.',
-    'libros': [
-        {'titulo': 'La Ciudad y los Perros', 'url': 'https://www.google.com/search?q=La+Ciudad+y+los+Perros'},
-        {'titulo': 'Conversación en La Catedral', 'url': 'https://www.google.com/search?q=Conversación+en+La+Catedral'},
-        {'titulo': 'Pantaleón y las Visitadoras', 'url': 'https://www.google.com/search?q=Pantaleón+y+las+Visitadoras'},
-        {'titulo': 'La Fiesta del Chivo', 'url': 'https://www.google.com/search?q=La+Fiesta+del+Chivo'},
-        {'titulo': 'El Sueño del Celta', 'url': 'https://www.google.com/search?q=El+Sueño+del+Celta'}
-    ]
-},
-'pedro-mir': {
-    'nombre': 'Pedro Mir',
-    'imagen': 'hola/js/PedroMir.png',
-    'biografia': 'Poeta dominicano, conocido por su obra social y compromiso con la realidad de su país.',
-    'libros': [
-        {'titulo': 'Hay un país en el mundo', 'url': 'https://www.google.com/search?q=Hay+un+país+en+el+mundo'},
-        {'titulo': 'Contracanto a Walt Whitman', 'url': 'https://www.google.com/search?q=Contracanto+a+Walt+Whitman'},
-        {'titulo': 'Prosa completa', 'url': 'https://www.google.com/search?q=Prosa+completa+Pedro+Mir'},
-        {'titulo': 'Obras completas', 'url': 'https://www.google.com/search?q=Obras+completas+Pedro+Mir'},
-        {'titulo': 'Poemas', 'url': 'https://www.google.com/search?q=Poemas+Pedro+Mir'}
-    ]
-},
-'octavio-paz': {
-    'nombre': 'Octavio Paz',
-    'imagen': 'hola/js/OctavioPaz.png',
-    'biografia': 'Poeta y ensayista mexicano, premio Nobel de Literatura 1990, conocido por su obra lírica y crítica.',
-    'libros': [
-        {'titulo': 'El Laberinto de la Soledad', 'url': 'https://www.google.com/search?q=El+Laberinto+de+la+Soledad'},
-        {'titulo': 'Piedra de Sol', 'url': 'https://www.google.com/search?q=Piedra+de+Sol'},
-        {'titulo': 'Libertad bajo palabra', 'url': 'https://www.google.com/search?q=Libertad+bajo+palabra'},
-        {'titulo': 'Sor Juana Inés de la Cruz', 'url': 'https://www.google.com/search?q=Sor+Juana+Inés+de+la+Cruz'},
-        {'titulo': 'La Otra Voz', 'url': 'https://www.google.com/search?q=La+Otra+Voz'}
-    ]
-},
-'pablo-neruda': {
-    'nombre': 'Pablo Neruda',
-    'imagen': 'hola/js/PabloNeruda.png',
-    'biografia': 'Poeta chileno, premio Nobel de Literatura 1971, conocido por su poesía romántica y social.',
-    'libros': [
-        {'titulo': 'Veinte Poemas de Amor y una Canción Desesperada', 'url': 'https://www.google.com/search?q=Veinte+Poemas+de+Amor+y+una+Canción+Desesperada'},
-        {'titulo': 'Canto General', 'url': 'https://www.google.com/search?q=Canto+General'},
-        {'titulo': 'Residencia en la Tierra', 'url': 'https://www.google.com/search?q=Residencia+en+la+Tierra'},
-        {'titulo': 'Odisea de una Soledad', 'url': 'https://www.google.com/search?q=Odisea+de+una+Soledad'},
-        {'titulo': 'Confieso que he Vivido', 'url': 'https://www.google.com/search?q=Confieso+que+he+Vivido'}
-    ]
-},
-'antoine-de-saint-exupery': {
-    'nombre': 'Antoine de Saint-Exupéry',
-    'imagen': 'hola/js/AntonioDeSaint.png',
-    'biografia': 'Escritor y aviador francés, autor de "El Principito", conocido por su poesía y filosofía en narrativa infantil.',
-    'libros': [
-        {'titulo': 'El Principito', 'url': 'https://www.google.com/search?q=El+Principito'},
-        {'titulo': 'Vuelo Nocturno', 'url': 'https://www.google.com/search?q=Vuelo+Nocturno'},
-        {'titulo': 'Tierra de Hombres', 'url': 'https://www.google.com/search?q=Tierra+de+Hombres'},
-        {'titulo': 'Carta a un rehén', 'url': 'https://www.google.com/search?q=Carta+a+un+rehén'},
-        {'titulo': 'Piloto de guerra', 'url': 'https://www.google.com/search?q=Piloto+de+guerra'}
-    ]
-},
-'horacio-quiroga': {
-    'nombre': 'Horacio Quiroga',
-    'imagen': 'hola/js/HoracioQuiroga.png',
-    'biografia': 'Cuentista y dramaturgo uruguayo, conocido por sus cuentos cortos y relatos de la selva.',
-    'libros': [
-        {'titulo': 'Cuentos de la selva', 'url': 'https://www.google.com/search?q=Cuentos+de+la+selva'},
-        {'titulo': 'Anaconda', 'url': 'https://www.google.com/search?q=Anaconda+Horacio+Quiroga'},
-        {'titulo': 'Los desterrados', 'url': 'https://www.google.com/search?q=Los+desterrados+Horacio+Quiroga'},
-        {'titulo': 'El infierno artificial', 'url': 'https://www.google.com/search?q=El+infierno+artificial+Horacio+Quiroga'},
-        {'titulo': 'Cuentos de amor, de locura y de muerte', 'url': 'https://www.google.com/search?q=Cuentos+de+amor,+de+locura+y+de+muerte'}
-    ]
-},
-'adolfo-bioy-casares': {
-    'nombre': 'Adolfo Bioy Casares',
-    'imagen': 'hola/js/AdolfoBIOYCas.png',
-    'biografia': 'Escritor argentino, colaborador de Jorge Luis Borges, famoso por su literatura fantástica y policial.',
-    'libros': [
-        {'titulo': 'La invención de Morel', 'url': 'https://www.google.com/search?q=La+invención+de+Morel'},
-        {'titulo': 'Diario de la guerra del cerdo', 'url': 'https://www.google.com/search?q=Diario+de+la+guerra+del+cerdo'},
-        {'titulo': 'El sueño de los héroes', 'url': 'https://www.google.com/search?q=El+sueño+de+los+héroes'},
-        {'titulo': 'El perjurio de la nieve', 'url': 'https://www.google.com/search?q=El+perjurio+de+la+nieve'},
-        {'titulo': 'Dormir al sol', 'url': 'https://www.google.com/search?q=Dormir+al+sol'}
-    ]
-}
-
-    }
-
-    escritor = escritores_detalle.get(slug)
-    if not escritor:
-        return render(request, 'hola/error.html', {'mensaje': 'Escritor no encontrado'})
-
-    # Este return siempre se ejecuta si se encuentra el escritor
-    return render(request, 'hola/detalle_escritor.html', {'escritor': escritor})
-
-            
-        
-        # Repite para los otros 11 escritores
+    # Los libros del autor salen del catálogo real en una sola consulta extra
+    libros = Prefetch(
+        'autor__libro_set',
+        queryset=Libro.objects.with_availability().select_related('categoria').order_by('titulo'),
+        to_attr='libros_catalogo',
+    )
+    escritor = get_object_or_404(
+        Escritor.objects.select_related('autor').prefetch_related(libros), slug=slug,
+    )
+    return render(request, 'hola/detalle_escritor.html', {
+        'escritor': escritor,
+        'libros': escritor.autor.libros_catalogo,
+    })
 
 
+@pagina_cacheada()
 def redessociales(request):
     return render(request, "hola/redessociales.html")
 
 
+@pagina_cacheada()
 def acerca(request):
     return render(request, 'hola/acercanosotros.html')
 
+@pagina_cacheada()
 def sitemap_html(request):
-    return render(request, 'hola/sitemap.html')
+    return render(request, 'sitemap.html')
 
-def actualizar_inventario_y_estadisticas():
+@login_required
+@usar_base_lectura
+def actualizar_inventario(request):
     """
-    Actualiza los campos de inventario y reportes estadísticos.
+    Devuelve los totales de circulación; si se pide ?verificar=1 además
+    compara los contadores con los datos reales.
     """
-    libros = Libro.objects.all()
-    
-    for libro in libros:
-        # Prestamos activos (no devueltos)
-        prestamos_activos = Prestamo.objects.filter(libro=libro, devuelto=False).count()
-        # Reservas activas/pendientes
-        reservas_activas = Reserva.objects.filter(libro=libro, estado__in=['activo', 'pendiente']).count()
-        # Total de ejemplares
-        total = libro.ejemplares
-        # Disponibles reales
-        disponible = max(total - prestamos_activos - reservas_activas, 0)
-        
-        # Guardamos estos valores en atributos temporales para templates (sin guardar en DB)
-        libro.prestados = prestamos_activos
-        libro.reservados = reservas_activas
-        libro.disponible_mostrar = disponible  # usar un nombre temporal para templates
-    
-    # Estadísticas básicas (opcional actualizar modelo/tabla de reportes si tienes)
-    total_prestamos = Prestamo.objects.count()
-    total_reservas = Reserva.objects.count()
-    
-    return {
-        "total_prestamos": total_prestamos,
-        "total_reservas": total_reservas,
-    }
+    if not request.user.is_superuser:
+        return redirect('principal')
+
+    datos = inventario.resumen()
+    if request.GET.get('verificar'):
+        datos['desfases'] = len(inventario.detectar_desfases())
+    return JsonResponse(datos)
+
+# =========================
+# AUTOCOMPLETAR (formularios de préstamo y reserva)
+# =========================
+@login_required
+def autocompletar_libros(request):
+    resultados = autocompletar.buscar_libros(request.GET.get('q'), request.GET.get('limite'))
+    return JsonResponse({'resultados': resultados})
+
+@login_required
+def autocompletar_usuarios(request):
+    # Solo el personal puede elegir a otro usuario en los formularios
+    if not (request.user.is_superuser or es_bibliotecario(request.user)):
+        return JsonResponse({'resultados': []}, status=403)
+    resultados = autocompletar.buscar_usuarios(request.GET.get('q'), request.GET.get('limite'))
+    return JsonResponse({'resultados': resultados})
 
 def imagen(request):
     return render(request, 'sandia.html')
 
-def enviar_notificacion_multa(request, multa_id):
+async def enviar_notificacion_multa(request, multa_id):
     try:
-        multa = Multa.objects.get(id=multa_id)
+        multa = await Multa.objects.select_related('prestamo__usuario', 'prestamo__libro').aget(id=multa_id)
         usuario = multa.prestamo.usuario
         libro = multa.prestamo.libro
 
@@ -833,14 +755,13 @@ def enviar_notificacion_multa(request, multa_id):
             "Gracias."
         )
 
-        send_mail(
-            subject='Notificación de Multa',
-            message=mensaje,
-            from_email='felixromanlebron24@gmail.com',   # tu correo remitente
-            recipient_list=[usuario.email],    # correo del usuario
-            fail_silently=False,
+        # Se encola y lo envía el comando `enviar_correos`
+        await aencolar_correo(
+            asunto='Notificación de Multa',
+            mensaje=mensaje,
+            destinatarios=[usuario.email],    # correo del usuario
         )
-        return HttpResponse("Correo enviado correctamente ✅")
+        return HttpResponse("Correo encolado correctamente ✅")
     except Multa.DoesNotExist:
         return HttpResponse("❌ Multa no encontrada")
 
@@ -848,28 +769,29 @@ def enviar_notificacion_multa(request, multa_id):
 
 
 @login_required
-def listar_multas_notificacion(request):
-    if not request.user.is_superuser:
+async def listar_multas_notificacion(request):
+    user = await request.auser()
+    if not user.is_superuser:
         return redirect('principal')
 
     hoy = timezone.now().date()
-    multas = Multa.objects.filter(pagada=False, fecha__lt=hoy)
+    multas = Multa.objects.filter(pagada=False, fecha__lt=hoy).select_related('prestamo__usuario')
 
     if request.method == 'POST':
         usuario_id = request.POST.get('usuario_id')
-        multa = multas.filter(prestamo__usuario_id=usuario_id).first()
+        multa = await multas.filter(prestamo__usuario_id=usuario_id).afirst()
         if multa:
-            send_mail(
+            usuario = multa.prestamo.usuario
+            await aencolar_correo(
                 'Notificación de Multa',
-                f'Hola {multa.prestamo.usuario.username}, tienes una multa pendiente de ${multa.monto}.',
-                'tucorreo@gmail.com',  # Cambia por tu correo
-                [multa.prestamo.usuario.email],
-                fail_silently=False,
+                f'Hola {usuario.nombre}, tienes una multa pendiente de ${multa.monto}.',
+                [usuario.email],
             )
-            messages.success(request, f'Correo enviado a {multa.prestamo.usuario.username}')
-        return redirect('listar_multa_notificacion')
+            messages.success(request, f'Correo encolado para {usuario.nombre}')
+        return redirect('listar_multas_notificacion')
 
-    return render(request, 'hola/listar_multas_notificacion.html', {'multas': multas})
+    multas = [multa async for multa in multas]
+    return await arender(request, 'hola/listar_multas_notificacion.html', {'multas': multas})
 
 
 
@@ -878,20 +800,21 @@ def devolver_libro(request, libro_id):
     # Traemos el libro
     libro = get_object_or_404(Libro, id=libro_id)
 
-    # Solo si quieres restar de inventario de préstamos activos
-    # Por ejemplo, si estabas usando Prestamo:
-    prestamo = Prestamo.objects.filter(libro=libro, devuelto=False).first()
-    if prestamo:
-        prestamo.devuelto = True
-        prestamo.fecha_devolucion = date.today()
-        prestamo.save()
-
-    # Aumentar ejemplares disponibles
-    libro.ejemplares += 1
-    libro.save()
-
-    # Actualizar inventario y estadísticas
-    actualizar_inventario_y_estadisticas()
+    # Préstamo activo más antiguo del libro; la devolución (contadores, multa
+    # y notificación) pasa por el mismo servicio que devolver_prestamo
+    prestamo = Prestamo.objects.filter(libro=libro, devuelto=False).order_by('id').first()
+    if prestamo is None:
+        messages.warning(request, "Este libro no tiene préstamos pendientes.")
+    else:
+        try:
+            monto = inventario.realizar_devolucion(prestamo)
+        except inventario.PrestamoYaDevuelto:
+            messages.warning(request, "Este préstamo ya fue devuelto.")
+        else:
+            if monto:
+                messages.error(request, f"Libro devuelto con retraso. Multa generada: ${monto}")
+            else:
+                messages.success(request, "Libro devuelto correctamente y sin multa.")
 
     # Pasamos el libro al template
     return render(request, "hola/devolucion_exitosa.html", {"libro": libro})
@@ -910,11 +833,13 @@ def formulario_prestamo(request, libro_id):
     if request.method == "POST" and form.is_valid():
         prestamo = form.save(commit=False)
         prestamo.usuario = usuario_logueado
-        prestamo.save()
 
-        # Actualizamos inventario
-        libro.ejemplares -= 1
-        libro.save()
+        # Reservamos el ejemplar y guardamos el préstamo en la misma transacción
+        try:
+            inventario.realizar_prestamo(prestamo)
+        except inventario.LibroNoDisponible:
+            messages.error(request, f"El libro '{libro.titulo}' no tiene ejemplares disponibles.")
+            return redirect("libros")
 
         messages.success(request, f"Préstamo del libro '{libro.titulo}' registrado correctamente.")
         return redirect("listaprestamos")
@@ -943,7 +868,9 @@ def formulario_reserva(request, libro_id):
         reserva = form.save(commit=False)
         reserva.usuario = usuario_logueado
         reserva.estado = 'activo'
-        reserva.save()
+        with transaction.atomic():
+            reserva.save()
+            inventario.registrar_reserva(reserva.libro_id, reserva.estado, reserva.fecha_inicio)
 
         messages.success(request, f"Reserva del libro '{libro.titulo}' registrada correctamente.")
         return redirect("mis_reservas")
@@ -0,0 +1,38 @@
+# hola/widgets.py
+from django import forms
+from django.urls import reverse
+
+
+# ============================
+# Widget de autocompletar
+# ============================
+class AutocompletarWidget(forms.Widget):
+    """
+    Campo oculto con el id elegido y un cuadro de texto que pide sugerencias
+    a un endpoint JSON (ver hola/autocompletar.py). Al dibujarse solo consulta
+    el objeto seleccionado, nunca la lista completa de opciones.
+    """
+    template_name = 'hola/widgets/autocompletar.html'
+
+    def __init__(self, url_name, modelo, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.modelo = modelo
+
+    class Media:
+        js = ('hola/autocompletar.js',)
+
+    def texto_seleccionado(self, valor):
+        if valor in (None, ''):
+            return ''
+        try:
+            objeto = self.modelo.objects.filter(pk=valor).first()
+        except (TypeError, ValueError):
+            return ''
+        return str(objeto) if objeto else ''
+
+    def get_context(self, name, value, attrs):
+        contexto = super().get_context(name, value, attrs)
+        contexto['widget']['url'] = reverse(self.url_name)
+        contexto['widget']['texto'] = self.texto_seleccionado(value)
+        return contexto